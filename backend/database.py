@@ -1,33 +1,148 @@
-from sqlalchemy import create_engine
+import itertools
+import threading
+import time
+from sqlalchemy import create_engine, event, exc, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from config import get_settings
+from services.metrics import record_query, record_pool_wait, record_pool_timeout
 
 settings = get_settings()
 
-engine_kwargs = {
-    "pool_pre_ping": True,
-    "echo": settings.debug
-}
+class InstrumentedQueuePool(QueuePool):
 
-if not settings.database_url.startswith('sqlite'):
-    engine_kwargs.update({
-        "pool_size": 5,
-        "max_overflow": 10
-    })
+    engine_name = "default"
 
-engine = create_engine(settings.database_url, **engine_kwargs)
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            record_pool_timeout(self.engine_name)
+            raise
+        finally:
+            record_pool_wait(self.engine_name, time.perf_counter() - start)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def build_engine(url: str, name: str, pool_size: int, max_overflow: int):
+    engine_kwargs = {
+        "pool_pre_ping": True,
+        "echo": settings.db_echo
+    }
+
+    if not (url.startswith('sqlite') and (url in ("sqlite://", "sqlite:///") or ":memory:" in url)):
+        engine_kwargs.update({
+            "poolclass": type("InstrumentedQueuePool", (InstrumentedQueuePool,), {"engine_name": name}),
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_recycle": settings.db_pool_recycle_seconds,
+            "pool_timeout": settings.db_pool_timeout_seconds
+        })
+
+    engine = create_engine(url, **engine_kwargs)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    return engine
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "query_started", None)
+    if started is not None:
+        record_query(statement, time.perf_counter() - started)
+
+_engines = {}
+_engines_lock = threading.Lock()
+_read_engines = None
+_read_counter = itertools.count()
+
+def _engine(name: str, url: str, pool_size: int, max_overflow: int):
+    engine = _engines.get(name)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(name)
+            if engine is None:
+                engine = _engines[name] = build_engine(url, name, pool_size, max_overflow)
+    return engine
+
+def get_write_engine():
+    return _engine("write", settings.database_url, settings.db_write_pool_size, settings.db_write_max_overflow)
+
+def get_read_engines():
+    global _read_engines
+    if _read_engines is None and settings.serving_bundle:
+        from services.serving_bundle import apply_bundle_pragmas, bundle_url
+
+        engine = _engine("bundle", bundle_url(settings.serving_bundle), settings.db_pool_size, settings.db_max_overflow)
+        event.listen(engine, "connect", apply_bundle_pragmas)
+        _read_engines = [engine]
+    elif _read_engines is None:
+        urls = [url.strip() for url in settings.database_read_urls.split(",") if url.strip()] or [settings.database_url]
+        _read_engines = [
+            _engine("read" if len(urls) == 1 else f"read-{i}", url, settings.db_pool_size, settings.db_max_overflow)
+            for i, url in enumerate(urls)
+        ]
+    return _read_engines
+
+def all_engines():
+    return dict(_engines)
+
+def __getattr__(name):
+    if name in ("engine", "write_engine"):
+        return get_write_engine()
+    if name == "read_engines":
+        return get_read_engines()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+WriteSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+def write_session():
+    return WriteSessionLocal(bind=get_write_engine())
+
+def read_session():
+    engines = get_read_engines()
+    return ReadSessionLocal(bind=engines[next(_read_counter) % len(engines)])
+
+SessionLocal = write_session
 
 Base = declarative_base()
 
 def get_db():
-    db = SessionLocal()
+    db = read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_write_db():
+    db = write_session()
     try:
         yield db
     finally:
         db.close()
 
 def init_db():
+    from models.job import Job
+    from services.partitions import create_default_partitions
+    from services.spatial_index import create_spatial_indexes
+
+    engine = get_write_engine()
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for index in Job.__table__.indexes:
+            index.create(connection, checkfirst=True)
+        create_default_partitions(connection)
+        create_spatial_indexes(connection)
+
+def check_connection() -> bool:
+    db = read_session()
+    try:
+        db.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        return False
+    finally:
+        db.close()
@@ -1,14 +1,18 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
 import logging
 
 from config import get_settings
-from database import init_db
-from routers import census, migration, biometric_risk, risk_zones, anomalies, search
-from middleware.rate_limiter import limiter
-from middleware.audit_logger import AuditLoggerMiddleware
+from routers import RouterLoader
+from middleware.lazy_routers import LazyRouterMiddleware
+from middleware.rate_limiter import RateLimitMiddleware, rate_limiter
+from middleware.audit_logger import AuditLoggerMiddleware, audit_pipeline
+from services.metrics import MetricsMiddleware, REGISTRY, Gauge, register_pool_gauges
+from services.warmup import warmup
+from services.update_stream import update_stream
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,14 +21,45 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
+serverless = settings.startup_mode == "serverless"
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info("Starting PRAVAH Backend API...")
-    init_db()
-    logger.info("Database initialized")
+    logger.info(f"Starting PRAVAH Backend API ({settings.startup_mode} mode)...")
+    if not serverless:
+        from database import init_db, read_session
+        from services.search_index import search_index
+
+        if settings.serving_bundle:
+            logger.info(f"Serving reads from read-only bundle {settings.serving_bundle}")
+        else:
+            init_db()
+            logger.info("Database initialized")
+        db = read_session()
+        try:
+            search_index.ensure_current(db)
+        except Exception as e:
+            logger.warning(f"Search index not built at startup: {e}")
+        finally:
+            db.close()
+    if settings.warmup_on_startup:
+        warmup.start(before=router_loader.include_all)
+    if settings.enable_audit_log:
+        audit_pipeline.start()
+    if settings.job_schedule and not serverless:
+        from services.jobs import job_scheduler
+        job_scheduler.start()
     yield
     logger.info("Shutting down PRAVAH Backend API...")
+    update_stream.close()
+    from services.pincode_service import pincode_service
+    await pincode_service.aclose()
+    if not serverless:
+        from services.jobs import job_runner, job_scheduler
+        job_scheduler.stop()
+        job_runner.shutdown()
+    if settings.enable_audit_log:
+        audit_pipeline.stop()
 
 
 
@@ -37,6 +72,8 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+router_loader = RouterLoader(app)
+
 origins = settings.allowed_origins.split(",")
 
 import os
@@ -50,43 +87,88 @@ if vercel_project_url:
 
 origins = list(set(origins))
 
+if serverless:
+    app.add_middleware(LazyRouterMiddleware, loader=router_loader)
+else:
+    router_loader.include_all()
+
+if settings.enable_rate_limit:
+    app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining"],
 )
 
 if settings.enable_audit_log:
     app.add_middleware(AuditLoggerMiddleware)
 
-app.state.limiter = limiter
+def database_engines():
+    from database import all_engines
+    return all_engines()
+
+if settings.enable_metrics:
+    app.add_middleware(MetricsMiddleware)
+    register_pool_gauges(database_engines)
+    Gauge(
+        "pravah_audit_log_records",
+        "Audit log pipeline record counts",
+        ("state",),
+        collect=lambda: {(key,): value for key, value in audit_pipeline.stats().items() if key != "sample_rate"}
+    )
+    Gauge(
+        "pravah_rate_limited_requests",
+        "Requests rejected by the rate limiter in this process",
+        collect=lambda: {(): rate_limiter.rejected}
+    )
+    Gauge(
+        "pravah_stream_subscribers",
+        "Clients connected to the live update stream in this process",
+        collect=lambda: {(): update_stream.subscribers}
+    )
 
 @app.get("/health")
 async def health_check():
     return {
         "status": "healthy",
         "service": "PRAVAH API",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "audit_log": audit_pipeline.stats() if settings.enable_audit_log else None
     }
 
+@app.get("/ready")
+async def readiness_check():
+    from database import check_connection
+
+    database_ok = await run_in_threadpool(check_connection)
+    warm = warmup.done or not settings.warmup_on_startup
+    return JSONResponse(
+        status_code=200 if database_ok and warm else 503,
+        content={
+            "status": "ready" if database_ok and warm else "starting",
+            "database": database_ok,
+            "warmup": warmup.status() if settings.warmup_on_startup else None
+        }
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {
         "message": "PRAVAH National Demographic Intelligence Platform API",
         "version": "1.0.0",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "ready": "/ready"
     }
 
-app.include_router(census.router, prefix="/api", tags=["Census"])
-app.include_router(migration.router, prefix="/api", tags=["Migration"])
-app.include_router(biometric_risk.router, prefix="/api", tags=["Biometric Risk"])
-app.include_router(risk_zones.router, prefix="/api", tags=["Risk Zones"])
-app.include_router(anomalies.router, prefix="/api", tags=["Anomalies"])
-app.include_router(search.router, prefix="/api", tags=["Search"])
-
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
@@ -1,4 +1,5 @@
-from middleware.audit_logger import AuditLoggerMiddleware
-from middleware.rate_limiter import limiter
+from middleware.audit_logger import AuditLoggerMiddleware, audit_pipeline
+from middleware.lazy_routers import LazyRouterMiddleware
+from middleware.rate_limiter import RateLimitMiddleware, rate_limiter
 
-__all__ = ["AuditLoggerMiddleware", "limiter"]
+__all__ = ["AuditLoggerMiddleware", "audit_pipeline", "LazyRouterMiddleware", "RateLimitMiddleware", "rate_limiter"]
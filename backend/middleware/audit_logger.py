@@ -1,47 +1,230 @@
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+import gzip
+import json
 import logging
+import os
+import random
+import shutil
+import sqlite3
+import threading
 import time
-import json
+from collections import deque
+from datetime import datetime
 from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qsl
 
+from config import get_settings
+
+settings = get_settings()
 logger = logging.getLogger("audit")
 
-log_dir = Path("logs")
-log_dir.mkdir(exist_ok=True)
+class AuditLogWriter:
+
+    def __init__(self, log_dir: str, rotation: str, max_bytes: int, backup_count: int, sqlite_path: str = ""):
+        self.log_dir = Path(log_dir)
+        self.path = self.log_dir / "audit.log"
+        self.rotation = rotation
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.sqlite_path = sqlite_path
+        self._file = None
+        self._opened_day = None
+        self._sqlite = None
+
+    def open(self):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._opened_day = datetime.now().date()
+
+        if self.sqlite_path:
+            self._sqlite = sqlite3.connect(self.sqlite_path)
+            self._sqlite.execute("PRAGMA journal_mode=WAL")
+            self._sqlite.execute(
+                "CREATE TABLE IF NOT EXISTS audit_log ("
+                "timestamp TEXT, client_ip TEXT, method TEXT, path TEXT, "
+                "query_params TEXT, status_code INTEGER, duration_ms REAL)"
+            )
+            self._sqlite.execute("CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_log (timestamp)")
+            self._sqlite.commit()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        if self._sqlite:
+            self._sqlite.close()
+            self._sqlite = None
+
+    def write(self, entries):
+        if self._file is None:
+            self.open()
+
+        self._file.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        self._file.flush()
+
+        if self._sqlite:
+            self._sqlite.executemany(
+                "INSERT INTO audit_log VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (e["timestamp"], e["client_ip"], e["method"], e["path"],
+                     json.dumps(e["query_params"]), e["status_code"], e["duration_ms"])
+                    for e in entries
+                ]
+            )
+            self._sqlite.commit()
+
+        if self._should_rotate():
+            self.rotate()
+
+    def _should_rotate(self) -> bool:
+        if self.rotation == "daily":
+            return datetime.now().date() != self._opened_day
+        return self._file.tell() >= self.max_bytes
+
+    def rotate(self):
+        self._file.close()
+        self._file = None
 
-audit_handler = logging.FileHandler(log_dir / "audit.log")
-audit_handler.setFormatter(
-    logging.Formatter('%(asctime)s - %(message)s')
-)
-logger.addHandler(audit_handler)
-logger.setLevel(logging.INFO)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        target = self.log_dir / f"audit.log.{stamp}.gz"
+        with open(self.path, "rb") as source, gzip.open(target, "wb") as compressed:
+            shutil.copyfileobj(source, compressed)
+        os.remove(self.path)
 
-class AuditLoggerMiddleware(BaseHTTPMiddleware):
+        backups = sorted(self.log_dir.glob("audit.log.*.gz"))
+        for stale in backups[:max(0, len(backups) - self.backup_count)]:
+            stale.unlink()
 
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
+        self.open()
 
-        client_ip = request.client.host if request.client else "unknown"
-        method = request.method
-        path = request.url.path
-        query_params = dict(request.query_params)
+class AuditLogPipeline:
 
-        response = await call_next(request)
+    def __init__(self, writer: AuditLogWriter = None, queue_size: int = None, sample_rate: float = None,
+                 batch_size: int = None, flush_interval: float = None):
+        self.writer = writer or AuditLogWriter(
+            settings.audit_log_dir,
+            settings.audit_log_rotation,
+            settings.audit_log_max_bytes,
+            settings.audit_log_backup_count,
+            settings.audit_log_sqlite_path
+        )
+        self.queue_size = queue_size or settings.audit_log_queue_size
+        self.sample_rate = settings.audit_log_sample_rate if sample_rate is None else sample_rate
+        self.batch_size = batch_size or settings.audit_log_batch_size
+        self.flush_interval = flush_interval or settings.audit_log_flush_interval_seconds
 
-        duration = time.time() - start_time
+        self.queue = deque()
+        self.dropped = 0
+        self.written = 0
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
 
-        audit_entry = {
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "client_ip": client_ip,
-            "method": method,
-            "path": path,
-            "query_params": query_params,
-            "status_code": response.status_code,
-            "duration_ms": round(duration * 1000, 2)
+    def sampled(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def submit(self, record: tuple):
+        if len(self.queue) >= self.queue_size:
+            self.dropped += 1
+            return
+        self.queue.append(record)
+        if len(self.queue) >= self.batch_size:
+            self._wake.set()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+            self._thread.start()
+
+    def ensure_started(self):
+        if self._thread is None:
+            self.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self.queue),
+            "written": self.written,
+            "dropped": self.dropped,
+            "sample_rate": self.sample_rate,
         }
 
-        logger.info(json.dumps(audit_entry))
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._drain()
+        self._drain()
+        self.writer.close()
+
+    def _drain(self):
+        while self.queue:
+            batch = []
+            while self.queue and len(batch) < self.batch_size:
+                batch.append(format_record(self.queue.popleft()))
+            try:
+                self.writer.write(batch)
+                self.written += len(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                logger.error(f"Failed to write audit batch: {e}")
+
+def format_record(record: tuple) -> dict:
+    started, client_ip, method, path, query_string, status_code, duration = record
+    return {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(started)),
+        "client_ip": client_ip,
+        "method": method,
+        "path": path,
+        "query_params": dict(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)),
+        "status_code": status_code,
+        "duration_ms": round(duration * 1000, 2)
+    }
+
+audit_pipeline = AuditLogPipeline()
+
+class AuditLoggerMiddleware:
+
+    def __init__(self, app, pipeline: AuditLogPipeline = None):
+        self.app = app
+        self.pipeline = pipeline or audit_pipeline
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.pipeline.sampled():
+            await self.app(scope, receive, send)
+            return
+
+        self.pipeline.ensure_started()
+        started = time.time()
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
-        return response
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            client = scope.get("client")
+            self.pipeline.submit((
+                started,
+                client[0] if client else "unknown",
+                scope["method"],
+                scope["path"],
+                scope.get("query_string", b""),
+                status_code,
+                time.perf_counter() - start
+            ))
@@ -0,0 +1,15 @@
+SCHEMA_PATHS = {"/docs", "/redoc", "/openapi.json"}
+
+class LazyRouterMiddleware:
+
+    def __init__(self, app, loader):
+        self.app = app
+        self.loader = loader
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            if scope["path"] in SCHEMA_PATHS:
+                self.loader.include_all()
+            else:
+                self.loader.include_for_path(scope["path"])
+        await self.app(scope, receive, send)
@@ -1,11 +1,240 @@
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import orjson
+
 from config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+EXEMPT_PATHS = {"/", "/health", "/ready", "/metrics", "/docs", "/redoc", "/openapi.json"}
+API_KEY_HASHES = {digest.strip().lower() for digest in settings.rate_limit_api_key_hashes.split(",") if digest.strip()}
+
+class MemoryBucketStore:
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    async def consume(self, key: str, cost: float, capacity: float, rate: float, now: float) -> Tuple[bool, float]:
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+
+            self._calls += 1
+            if self._calls % 10000 == 0:
+                self._prune(capacity, rate, now)
+
+        return allowed, tokens
+
+    def _prune(self, capacity: float, rate: float, now: float):
+        idle = capacity / rate
+        for key in [key for key, (_, updated) in self._buckets.items() if now - updated > idle]:
+            del self._buckets[key]
+
+class SQLiteBucketStore:
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    async def consume(self, key: str, cost: float, capacity: float, rate: float, now: float) -> Tuple[bool, float]:
+        try:
+            return await asyncio.to_thread(self._consume, key, cost, capacity, rate, now)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Rate limit store unavailable, allowing request: {e}")
+            return True, capacity
+
+    def _consume(self, key: str, cost: float, capacity: float, rate: float, now: float) -> Tuple[bool, float]:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            connection.execute(
+                "INSERT INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now)
+            )
+
+            self._calls += 1
+            if self._calls % 10000 == 0:
+                connection.execute("DELETE FROM rate_limit_buckets WHERE updated < ?", (now - capacity / rate,))
+
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+        return allowed, tokens
+
+REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+class RedisBucketStore:
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(REDIS_TOKEN_BUCKET)
+
+    async def consume(self, key: str, cost: float, capacity: float, rate: float, now: float) -> Tuple[bool, float]:
+        allowed, tokens = await self.script(keys=[f"pravah:ratelimit:{key}"], args=[capacity, rate, now, cost])
+        return bool(allowed), float(tokens)
+
+def parse_route_costs(spec: str) -> Dict[str, float]:
+    costs = {}
+    for item in spec.split(","):
+        path, _, cost = item.strip().partition("=")
+        if path and cost:
+            costs[path.strip().rstrip("/") or "/"] = float(cost)
+    return costs
+
+def create_store(backend: str):
+    if backend == "sqlite":
+        return SQLiteBucketStore(settings.rate_limit_sqlite_path)
+    if backend == "redis":
+        if not settings.redis_url:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis needs REDIS_URL")
+        return RedisBucketStore(settings.redis_url)
+
+    workers = int(os.environ.get("WEB_CONCURRENCY") or 1)
+    if workers > 1:
+        raise RuntimeError(
+            f"RATE_LIMIT_BACKEND=memory keeps separate buckets in each of the {workers} workers; "
+            "use sqlite or redis so the limit is shared"
+        )
+    return MemoryBucketStore()
+
+class RateLimiter:
+
+    def __init__(self, store=None, per_minute: int = None, burst: int = None, route_costs: Dict[str, float] = None):
+        per_minute = per_minute or settings.rate_limit_per_minute
+        self.store = store or create_store(settings.rate_limit_backend)
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst or settings.rate_limit_burst or per_minute)
+        self.route_costs = parse_route_costs(settings.rate_limit_route_costs) if route_costs is None else route_costs
+        self.rejected = 0
+
+    def cost_for(self, path: str) -> float:
+        return self.route_costs.get(path.rstrip("/") or "/", 1.0)
+
+    async def check(self, key: str, path: str) -> Tuple[bool, float, Optional[int]]:
+        cost = self.cost_for(path)
+        allowed, tokens = await self.store.consume(key, cost, self.capacity, self.rate, time.time())
+        if allowed:
+            return True, tokens, None
+        self.rejected += 1
+        return False, tokens, max(1, math.ceil((min(cost, self.capacity) - tokens) / self.rate))
+
+def client_key(scope) -> str:
+    headers = dict(scope.get("headers") or [])
+
+    api_key = headers.get(b"x-api-key")
+    if api_key and API_KEY_HASHES:
+        digest = hashlib.sha256(api_key).hexdigest()
+        if digest in API_KEY_HASHES:
+            return "key:" + digest[:32]
+
+    hops = settings.rate_limit_trusted_proxies
+    forwarded = headers.get(b"x-forwarded-for") if hops > 0 else None
+    if forwarded:
+        addresses = [address.strip() for address in forwarded.decode("latin-1").split(",")]
+        if len(addresses) >= hops and addresses[-hops]:
+            return "ip:" + addresses[-hops]
+
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+rate_limiter = RateLimiter()
+
+class RateLimitMiddleware:
+
+    def __init__(self, app, limiter: RateLimiter = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        allowed, remaining, retry_after = await self.limiter.check(client_key(scope), scope["path"])
+        limit_headers = [
+            (b"x-ratelimit-limit", str(int(self.limiter.capacity)).encode()),
+            (b"x-ratelimit-remaining", str(int(remaining)).encode()),
+        ]
+
+        if not allowed:
+            body = orjson.dumps({
+                "error": "Rate limit exceeded",
+                "message": f"Too many requests; retry in {retry_after} seconds"
+            })
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": limit_headers + [
+                    (b"retry-after", str(retry_after).encode()),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + limit_headers
+            await send(message)
 
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=[f"{settings.rate_limit_per_minute}/minute"]
-)
+        await self.app(scope, receive, send_with_headers)
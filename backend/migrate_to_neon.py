@@ -4,71 +4,314 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+import argparse
+import io
+import json
+import math
+import threading
+import time
+from datetime import date
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from sqlalchemy import create_engine, func, select, text, Enum, Float, Integer, String
+from sqlalchemy.schema import CreateTable
 import logging
 
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 SQLITE_URL = "sqlite:///./pravah.db"
-NEON_URL = os.environ.get("DATABASE_URL", "").replace("?sslmode=require", "?sslmode=require")
+NEON_URL = os.environ.get("DATABASE_URL", "")
+CHECKPOINT_PATH = ".migrate_checkpoint.json"
 
 from models import Base
-from models.pincode_metadata import PincodeMetadata
-from models.biometric import BiometricData
-from models.demographic import DemographicData
-from models.enrolment import EnrolmentData
-from models.risk_zones import RiskZone
-
-def migrate_sqlite_to_neon():
-    if not NEON_URL or "sqlite" in NEON_URL:
-        logger.error("NEON_URL not set or is SQLite. Set DATABASE_URL env var to Neon PostgreSQL URL.")
+from services.spatial_index import create_spatial_indexes
+from services.partitions import FACT_TABLES, create_default_partitions, ensure_partitions, is_partitioned
+
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+def copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bytes):
+        return "\\\\x" + value.hex()
+    return str(value).translate(COPY_ESCAPES)
+
+def copy_buffer(rows) -> io.StringIO:
+    buffer = io.StringIO()
+    buffer.writelines("\t".join(map(copy_value, row)) + "\n" for row in rows)
+    buffer.seek(0)
+    return buffer
+
+class Checkpoint:
+
+    def __init__(self, path: str, source: str):
+        self.path = Path(path)
+        self.source = source
+        self._lock = threading.Lock()
+        self.tables = {}
+
+        if self.path.exists():
+            state = json.loads(self.path.read_text())
+            if state.get("source") == source:
+                self.tables = state.get("tables", {})
+            else:
+                logger.warning(f"Ignoring checkpoint for a different source ({state.get('source')})")
+
+    def get(self, table: str) -> dict:
+        with self._lock:
+            return dict(self.tables.get(table, {}))
+
+    def update(self, table: str, **values):
+        with self._lock:
+            self.tables.setdefault(table, {}).update(values)
+            temporary = self.path.with_suffix(".tmp")
+            temporary.write_text(json.dumps({"source": self.source, "tables": self.tables}, indent=2))
+            os.replace(temporary, self.path)
+
+    def clear(self):
+        with self._lock:
+            self.tables = {}
+            if self.path.exists():
+                self.path.unlink()
+
+def create_tables_without_indexes(target_engine, tables):
+    with target_engine.begin() as connection:
+        for table in tables:
+            for column in table.columns:
+                if isinstance(column.type, Enum):
+                    column.type.create(connection, checkfirst=True)
+            connection.execute(CreateTable(table, if_not_exists=True))
+            for index in table.indexes:
+                connection.execute(text(f'DROP INDEX IF EXISTS "{index.name}"'))
+
+def create_partitions(source_engine, target_engine, tables):
+    with source_engine.connect() as source, target_engine.begin() as target:
+        for table in tables:
+            if table.name in FACT_TABLES and is_partitioned(target, table.name):
+                months = source.exec_driver_sql(f"SELECT DISTINCT substr(date, 1, 7) FROM {table.name}").scalars()
+                names = ensure_partitions(target, table.name, [date.fromisoformat(f"{month}-01") for month in months])
+                logger.info(f"{table.name}: {len(names)} monthly partitions ready")
+        create_default_partitions(target)
+
+def create_indexes(target_engine, tables):
+    with target_engine.begin() as connection:
+        for table in tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+            serial = table.autoincrement_column
+            if serial is not None:
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', '{serial.name}'), "
+                    f"COALESCE((SELECT MAX({serial.name}) FROM {table.name}), 0) + 1, false)"
+                ))
+        create_spatial_indexes(connection)
+
+    with target_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for table in tables:
+            connection.execute(text(f"ANALYZE {table.name}"))
+
+def table_dependencies(tables) -> dict:
+    names = {table.name for table in tables}
+    return {
+        table.name: {key.column.table.name for key in table.foreign_keys if key.column.table.name in names - {table.name}}
+        for table in tables
+    }
+
+def reset_dependents(tables, checkpoint: Checkpoint):
+    dependencies = table_dependencies(tables)
+    pending = {table.name for table in tables if not checkpoint.get(table.name).get("done")}
+    while True:
+        dependents = {name for name, parents in dependencies.items() if parents & pending} - pending
+        if not dependents:
+            return
+        for name in dependents:
+            logger.info(f"{name}: copying again because a table it references is being copied")
+            checkpoint.update(name, last_key=None, rows=0, done=False)
+        pending |= dependents
+
+def copy_table(table, total: int, source_engine, target_engine, checkpoint: Checkpoint, chunk_size: int,
+               referenced: bool = False) -> int:
+    state = checkpoint.get(table.name)
+    if state.get("done"):
+        logger.info(f"{table.name}: already copied ({state.get('rows', 0)} rows), skipping")
+        return state.get("rows", 0)
+
+    last_key = None if referenced else state.get("last_key")
+    copied = state.get("rows", 0) if last_key else 0
+    columns = [column.name for column in table.columns]
+    column_list = ", ".join(f'"{name}"' for name in columns)
+    key_columns = [column.name for column in table.primary_key.columns]
+    key_positions = [columns.index(name) for name in key_columns]
+    key_list = ", ".join(f'"{name}"' for name in key_columns)
+    key_row = f"({key_list})"
+    target_key_row = "({})".format(", ".join(
+        f'"{column.name}" COLLATE "C"' if isinstance(column.type, String) else f'"{column.name}"'
+        for column in table.primary_key.columns
+    ))
+
+    raw = target_engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("SET synchronous_commit TO OFF")
+        if last_key:
+            placeholders = ", ".join(["%s"] * len(last_key))
+            cursor.execute(f"DELETE FROM {table.name} WHERE {target_key_row} > ({placeholders})", last_key)
+            logger.info(f"{table.name}: resuming after key {last_key} ({copied}/{total} rows)")
+        else:
+            cursor.execute(f"TRUNCATE {table.name} CASCADE")
+        raw.commit()
+
+        start = time.perf_counter()
+        with source_engine.connect().execution_options(stream_results=True) as source:
+            if last_key:
+                placeholders = ", ".join(["?"] * len(last_key))
+                result = source.exec_driver_sql(
+                    f"SELECT {column_list} FROM {table.name} WHERE {key_row} > ({placeholders}) ORDER BY {key_list}",
+                    tuple(last_key)
+                )
+            else:
+                result = source.exec_driver_sql(f"SELECT {column_list} FROM {table.name} ORDER BY {key_list}")
+            for rows in result.partitions(chunk_size):
+                cursor.copy_expert(f"COPY {table.name} ({column_list}) FROM STDIN", copy_buffer(rows))
+                raw.commit()
+
+                copied += len(rows)
+                last_key = [rows[-1][position] for position in key_positions]
+                checkpoint.update(table.name, last_key=last_key, rows=copied, done=False)
+
+                elapsed = time.perf_counter() - start
+                logger.info(f"{table.name}: {copied}/{total} rows ({copied / max(elapsed, 1e-9):,.0f} rows/s)")
+
+        checkpoint.update(table.name, last_key=last_key, rows=copied, done=True)
+        return copied
+    finally:
+        raw.close()
+
+def table_checksum(engine, table) -> tuple:
+    numeric = [column for column in table.columns if isinstance(column.type, (Integer, Float))]
+    with engine.connect() as connection:
+        return tuple(connection.execute(
+            select(func.count(), *[func.coalesce(func.sum(column), 0) for column in numeric]).select_from(table)
+        ).one())
+
+def verify(source_engine, target_engine, tables) -> bool:
+    ok = True
+    for table in tables:
+        source = table_checksum(source_engine, table)
+        target = table_checksum(target_engine, table)
+        matches = len(source) == len(target) and all(
+            math.isclose(float(a), float(b), rel_tol=1e-9, abs_tol=1e-6) for a, b in zip(source, target)
+        )
+        if matches:
+            logger.info(f"{table.name}: verified {target[0]} rows, column checksums match")
+        else:
+            logger.error(f"{table.name}: MISMATCH source={source} target={target}")
+            ok = False
+    return ok
+
+def migrate_sqlite_to_neon(sqlite_url: str = SQLITE_URL, target_url: str = NEON_URL, tables=None, workers: int = 4,
+                           chunk_size: int = 50000, fresh: bool = False, checkpoint_path: str = CHECKPOINT_PATH,
+                           check: bool = True) -> bool:
+    if not target_url or not target_url.startswith("postgres"):
+        logger.error("NEON_URL not set or is not PostgreSQL. Set DATABASE_URL env var to Neon PostgreSQL URL.")
         return False
-    
-    logger.info("Connecting to SQLite...")
-    sqlite_engine = create_engine(SQLITE_URL, echo=False)
-    SqliteSession = sessionmaker(bind=sqlite_engine)
-    sqlite_session = SqliteSession()
-    
-    logger.info("Connecting to Neon PostgreSQL...")
-    neon_engine = create_engine(NEON_URL, echo=False)
-    NeonSession = sessionmaker(bind=neon_engine)
-    neon_session = NeonSession()
-    
-    logger.info("Creating tables in Neon...")
-    Base.metadata.create_all(neon_engine)
-    
-    models_to_migrate = [
-        ("PincodeMetadata", PincodeMetadata),
-        ("BiometricData", BiometricData),
-        ("DemographicData", DemographicData),
-        ("EnrolmentData", EnrolmentData),
-        ("RiskZone", RiskZone),
-    ]
-    
-    for model_name, model_class in models_to_migrate:
-        logger.info(f"Migrating {model_name}...")
-        
-        records = sqlite_session.query(model_class).all()
-        logger.info(f"  Found {len(records)} records")
-        
-        if records:
-            neon_session.query(model_class).delete()
-            neon_session.commit()
-            
-            for record in records:
-                neon_session.merge(record)
-            
-            neon_session.commit()
-            logger.info(f"  Migrated {len(records)} {model_name} records")
-    
-    sqlite_session.close()
-    neon_session.close()
-    
+
+    source_engine = create_engine(sqlite_url, echo=False)
+    target_engine = create_engine(target_url, echo=False, pool_size=workers, max_overflow=0, pool_pre_ping=True)
+
+    names = set(tables or [table.name for table in Base.metadata.sorted_tables])
+    dependencies = table_dependencies(Base.metadata.sorted_tables)
+    while True:
+        dependents = {name for name, parents in dependencies.items() if parents & names} - names
+        if not dependents:
+            break
+        logger.info(f"Also copying {', '.join(sorted(dependents))}, which reference the selected tables")
+        names |= dependents
+    selected = [table for table in Base.metadata.sorted_tables if table.name in names]
+
+    checkpoint = Checkpoint(checkpoint_path, sqlite_url)
+    if fresh:
+        checkpoint.clear()
+
+    reset_dependents(selected, checkpoint)
+    pending = [table for table in selected if not checkpoint.get(table.name).get("done")]
+    logger.info(f"Creating {len(pending)} tables in target without secondary indexes...")
+    create_tables_without_indexes(target_engine, pending)
+    create_partitions(source_engine, target_engine, pending)
+
+    with source_engine.connect() as source:
+        totals = {table.name: source.execute(select(func.count()).select_from(table)).scalar() for table in selected}
+
+    start = time.perf_counter()
+    failed = []
+    copied = set()
+    dependencies = table_dependencies(selected)
+    referenced = set().union(*dependencies.values())
+    waiting = sorted(selected, key=lambda table: -totals[table.name])
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="copy") as executor:
+        while waiting or running:
+            for table in [table for table in waiting if dependencies[table.name] <= copied]:
+                waiting.remove(table)
+                future = executor.submit(
+                    copy_table, table, totals[table.name], source_engine, target_engine, checkpoint, chunk_size,
+                    table.name in referenced
+                )
+                running[future] = table
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                table = running.pop(future)
+                try:
+                    future.result()
+                    copied.add(table.name)
+                except Exception as e:
+                    logger.error(f"{table.name}: copy failed, rerun to resume from checkpoint: {e}")
+                    failed.append(table.name)
+
+    for table in waiting:
+        logger.error(f"{table.name}: not copied because a table it references failed")
+        failed.append(table.name)
+
+    if failed:
+        return False
+
+    logger.info(f"Copied {len(selected)} tables in {time.perf_counter() - start:.1f}s; building indexes...")
+    create_indexes(target_engine, selected)
+
+    if check and not verify(source_engine, target_engine, selected):
+        return False
+
+    checkpoint.clear()
     logger.info("Migration complete!")
     return True
 
+def main():
+    parser = argparse.ArgumentParser(description="Copy the local SQLite database into Neon/PostgreSQL")
+    parser.add_argument("--sqlite-url", default=SQLITE_URL)
+    parser.add_argument("--target-url", default=NEON_URL)
+    parser.add_argument("--tables", nargs="*", help="Only copy these tables")
+    parser.add_argument("--workers", type=int, default=4, help="Tables copied in parallel")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--fresh", action="store_true", help="Ignore the checkpoint and copy every table again")
+    parser.add_argument("--skip-verify", action="store_true")
+    args = parser.parse_args()
+
+    return migrate_sqlite_to_neon(
+        sqlite_url=args.sqlite_url,
+        target_url=args.target_url,
+        tables=args.tables,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        fresh=args.fresh,
+        checkpoint_path=args.checkpoint,
+        check=not args.skip_verify
+    )
+
 if __name__ == "__main__":
-    success = migrate_sqlite_to_neon()
+    success = main()
     sys.exit(0 if success else 1)
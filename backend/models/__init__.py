@@ -1,16 +1,29 @@
 from database import Base
 
+from models.dimensions import State, District
 from models.biometric import BiometricData
 from models.demographic import DemographicData
 from models.enrolment import EnrolmentData
 from models.risk_zones import RiskZone
+from models.risk_factor import RiskFactor
 from models.pincode_metadata import PincodeMetadata
+from models.rollup import RollupCell
+from models.data_version import DataVersion
+from models.anomaly_event import AnomalyEvent
+from models.job import Job
 
 __all__ = [
     "Base",
+    "State",
+    "District",
     "BiometricData",
     "DemographicData",
     "EnrolmentData",
     "RiskZone",
+    "RiskFactor",
     "PincodeMetadata",
+    "RollupCell",
+    "DataVersion",
+    "AnomalyEvent",
+    "Job",
 ]
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Date, Float, DateTime, Index
+from sqlalchemy.sql import func
+from database import Base
+
+class AnomalyEvent(Base):
+
+    __tablename__ = "anomaly_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    pincode = Column(String(10), nullable=False)
+    date = Column(Date, nullable=False)
+    dataset = Column(String(20), nullable=False)
+    anomaly_type = Column(String(30), nullable=False)
+
+    observed = Column(Integer, nullable=False)
+    expected = Column(Float, nullable=False)
+    score = Column(Float, nullable=False)
+    ewma_score = Column(Float)
+
+    detected_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('idx_anomaly_date_score', 'date', 'score'),
+        Index('idx_anomaly_pincode_date', 'pincode', 'date'),
+    )
+
+    def __repr__(self):
+        return f"<AnomalyEvent(pincode={self.pincode}, date={self.date}, type={self.anomaly_type}, score={self.score})>"
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from database import Base
+
+class DataVersion(Base):
+
+    __tablename__ = "data_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    version = Column(String(64), unique=True, nullable=False)
+    risk_zone_count = Column(Integer, default=0)
+    published_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    def __repr__(self):
+        return f"<DataVersion(version={self.version}, published_at={self.published_at})>"
@@ -1,15 +1,16 @@
-from sqlalchemy import Column, Integer, String, Date, Float, Index
+from sqlalchemy import Column, Integer, SmallInteger, Date, Float, Index
 from database import Base
+from services.partitions import PARTITIONED, partition_table_args
 
 class DemographicData(Base):
 
     __tablename__ = "demographic_data"
 
-    id = Column(Integer, primary_key=True, index=True)
-    date = Column(Date, nullable=False, index=True)
-    state = Column(String(100), nullable=False, index=True)
-    district = Column(String(100), nullable=False, index=True)
-    pincode = Column(String(10), nullable=False, index=True)
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    date = Column(Date, nullable=False, index=True, primary_key=PARTITIONED)
+    state_id = Column(SmallInteger, nullable=False)
+    district_id = Column(SmallInteger, nullable=False)
+    pincode = Column(Integer, nullable=False)
 
     demo_age_0_5 = Column(Integer, default=0)
     demo_age_5_17 = Column(Integer, default=0)
@@ -19,7 +20,8 @@ class DemographicData(Base):
 
     __table_args__ = (
         Index('idx_demo_pincode_date', 'pincode', 'date'),
-        Index('idx_demo_state_district', 'state', 'district'),
+        Index('idx_demo_district_date', 'district_id', 'date'),
+        partition_table_args(),
     )
 
     def __repr__(self):
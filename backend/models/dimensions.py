@@ -0,0 +1,27 @@
+from sqlalchemy import Column, SmallInteger, String, ForeignKey, UniqueConstraint
+from database import Base
+
+class State(Base):
+
+    __tablename__ = "states"
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    name = Column(String(100), nullable=False, unique=True)
+
+    def __repr__(self):
+        return f"<State(id={self.id}, name={self.name})>"
+
+class District(Base):
+
+    __tablename__ = "districts"
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    state_id = Column(SmallInteger, ForeignKey("states.id"), nullable=False)
+    name = Column(String(100), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('state_id', 'name', name='uq_district_state_name'),
+    )
+
+    def __repr__(self):
+        return f"<District(id={self.id}, state_id={self.state_id}, name={self.name})>"
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index, text
+from sqlalchemy.sql import func
+from database import Base
+
+class Job(Base):
+
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(20), nullable=False)
+    status = Column(String(20), nullable=False, default="queued")
+    trigger = Column(String(20), nullable=False, default="api")
+
+    stage = Column(String(50))
+    rows_done = Column(Integer, default=0)
+    rows_total = Column(Integer)
+    result = Column(Text)
+    error = Column(Text)
+
+    submitted_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    stage_started_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index('idx_job_kind_status', 'kind', 'status'),
+        Index('idx_job_submitted', 'submitted_at'),
+        Index(
+            'uq_job_active_kind', 'kind', unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')")
+        ),
+    )
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind={self.kind}, status={self.status}, stage={self.stage})>"
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Float
+from database import Base
+
+class RiskFactor(Base):
+
+    __tablename__ = "risk_factors"
+
+    pincode = Column(String(10), primary_key=True)
+    migration = Column(Float, nullable=False)
+    biometric = Column(Float, nullable=False)
+    digital = Column(Float, nullable=False)
+    border = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<RiskFactor(pincode={self.pincode})>"
@@ -47,6 +47,7 @@ class RiskZone(Base):
     __table_args__ = (
         Index('idx_risk_level_score', 'risk_level', 'risk_score'),
         Index('idx_risk_location', 'state', 'district'),
+        Index('idx_risk_lat_lon', 'latitude', 'longitude'),
     )
 
     def __repr__(self):
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Date, Boolean, Index
+from database import Base
+
+class RollupCell(Base):
+
+    __tablename__ = "rollup_cells"
+
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String(10), nullable=False)
+    level = Column(String(10), nullable=False)
+    period = Column(Date, nullable=False)
+    dataset = Column(String(20), nullable=False)
+    age_bucket = Column(String(10), nullable=False)
+
+    state = Column(String(100))
+    district = Column(String(100))
+
+    value = Column(Integer)
+    is_suppressed = Column(Boolean, default=False)
+
+    __table_args__ = (
+        Index('idx_rollup_lookup', 'granularity', 'dataset', 'age_bucket', 'level', 'state', 'district', 'period'),
+    )
+
+    def __repr__(self):
+        return f"<RollupCell(level={self.level}, state={self.state}, district={self.district}, period={self.period}, value={self.value})>"
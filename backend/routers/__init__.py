@@ -1,3 +1,63 @@
-from routers import census, migration, biometric_risk, risk_zones, anomalies, search
+import importlib
+import threading
 
-__all__ = ["census", "migration", "biometric_risk", "risk_zones", "anomalies", "search"]
+API_PREFIX = "/api"
+
+API_ROUTERS = {
+    "census": ("Census", True, ("census",)),
+    "migration": ("Migration", False, ("migration",)),
+    "biometric_risk": ("Biometric Risk", True, ("biometric-risk",)),
+    "risk_zones": ("Risk Zones", True, ("stats", "risk-zones")),
+    "anomalies": ("Anomalies", True, ("anomalies",)),
+    "search": ("Search", True, ("search",)),
+    "rollup": ("Rollup", True, ("rollup",)),
+    "stream": ("Stream", False, ("stream",)),
+    "jobs": ("Jobs", False, ("jobs", "admin")),
+}
+
+class RouterLoader:
+
+    def __init__(self, app):
+        self.app = app
+        self.loaded = set()
+        self._lock = threading.Lock()
+        self._segments = {
+            segment: name
+            for name, (_, _, segments) in API_ROUTERS.items()
+            for segment in segments
+        }
+
+    def include(self, name: str):
+        if name in self.loaded:
+            return
+        with self._lock:
+            if name in self.loaded:
+                return
+
+            from fastapi import Depends
+            from services.http_cache import conditional_get
+
+            tag, cached, _ = API_ROUTERS[name]
+            module = importlib.import_module(f"routers.{name}")
+            self.app.include_router(
+                module.router,
+                prefix=API_PREFIX,
+                tags=[tag],
+                dependencies=[Depends(conditional_get)] if cached else None
+            )
+            self.app.openapi_schema = None
+            self.loaded.add(name)
+
+    def include_all(self):
+        for name in API_ROUTERS:
+            self.include(name)
+
+    def include_for_path(self, path: str):
+        if not path.startswith(API_PREFIX + "/"):
+            return
+        segment = path[len(API_PREFIX) + 1:].split("/", 1)[0]
+        name = self._segments.get(segment)
+        if name:
+            self.include(name)
+
+__all__ = ["API_ROUTERS", "RouterLoader"]
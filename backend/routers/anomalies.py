@@ -1,43 +1,129 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
+from typing import List, Optional, Dict, Any
+from datetime import date, datetime
 
 from database import get_db
 from models.risk_zones import RiskZone
-from schemas import AnomalyResponse
+from models.anomaly_event import AnomalyEvent
+from schemas import AnomalyResponse, DatasetEnum
+from services.http_cache import conditional_get
+from services.privacy_enforcer import privacy_enforcer
+from services.payloads import payload_cache, payload_response
 
 router = APIRouter()
 
 @router.get("/anomalies", response_model=List[AnomalyResponse])
 async def get_anomalies(
+    request: Request,
+    response: Response,
     limit: int = Query(50, ge=1, le=200, description="Maximum number of results"),
+    version: str = Depends(conditional_get),
     db: Session = Depends(get_db)
 ):
-    anomalies = db.query(RiskZone).filter(
+    payload = payload_cache.get_or_build(version, ("anomalies", limit), lambda: list_anomalies(db, limit))
+    return payload_response(request, payload, response.headers)
+
+def list_anomalies(db: Session, limit: int) -> List[Dict[str, Any]]:
+    rows = db.query(
+        RiskZone.pincode,
+        RiskZone.anomaly_flag,
+        RiskZone.anomaly_score,
+        RiskZone.created_at,
+        RiskZone.updated_at,
+        RiskZone.migration_velocity,
+        RiskZone.is_suppressed,
+        RiskZone.suppression_reason
+    ).filter(
         RiskZone.anomaly_flag == True,
-        RiskZone.is_suppressed == False
+        RiskZone.is_suppressed == False,
+        privacy_enforcer.suppression_predicate(RiskZone.population)
     ).order_by(RiskZone.anomaly_score.desc()).limit(limit).all()
 
-    results = []
-    for zone in anomalies:
-        results.append(AnomalyResponse(
-            pincode=zone.pincode,
-            anomaly_flag=zone.anomaly_flag,
-            anomaly_score=zone.anomaly_score,
-            detected_at=zone.updated_at or datetime.utcnow(),
-            type="migration_spike" if zone.migration_velocity > 0.08 else "biometric_deficit",
-            suppressed=zone.is_suppressed,
-            suppression_reason=zone.suppression_reason
-        ))
+    return [
+        {
+            "pincode": row.pincode,
+            "anomaly_flag": row.anomaly_flag,
+            "anomaly_score": row.anomaly_score,
+            "detected_at": row.updated_at or row.created_at or datetime.utcnow(),
+            "type": "migration_spike" if row.migration_velocity > 0.08 else "biometric_deficit",
+            "suppressed": row.is_suppressed,
+            "suppression_reason": row.suppression_reason
+        }
+        for row in rows
+    ]
+
+@router.get("/anomalies/events", response_model=List[AnomalyResponse])
+async def get_anomaly_events(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of results"),
+    dataset: Optional[DatasetEnum] = Query(None, description="Only anomalies in this dataset"),
+    since: Optional[date] = Query(None, description="Only anomalies on or after this date (YYYY-MM-DD)"),
+    version: str = Depends(conditional_get),
+    db: Session = Depends(get_db)
+):
+    dataset_name = dataset.value if dataset else None
+    payload = payload_cache.get_or_build(
+        version,
+        ("anomaly_events", limit, dataset_name, since),
+        lambda: list_anomaly_events(db, limit, dataset_name, since)
+    )
+    return payload_response(request, payload, response.headers)
+
+def anomaly_events_query(db: Session):
+    return db.query(
+        AnomalyEvent.pincode,
+        AnomalyEvent.date,
+        AnomalyEvent.dataset,
+        AnomalyEvent.anomaly_type,
+        AnomalyEvent.detected_at,
+        privacy_enforcer.mask_column(AnomalyEvent.score, AnomalyEvent.observed, label="score"),
+        privacy_enforcer.mask_column(AnomalyEvent.expected, AnomalyEvent.observed, label="expected"),
+        privacy_enforcer.mask_column(AnomalyEvent.observed, AnomalyEvent.observed, label="observed"),
+        privacy_enforcer.suppressed_flag(AnomalyEvent.observed)
+    ).join(RiskZone, RiskZone.pincode == AnomalyEvent.pincode).filter(
+        RiskZone.is_suppressed == False,
+        privacy_enforcer.suppression_predicate(RiskZone.population)
+    )
+
+def event_payload(row) -> Dict[str, Any]:
+    return {
+        "pincode": row.pincode,
+        "anomaly_flag": True,
+        "anomaly_score": row.score,
+        "detected_at": row.detected_at,
+        "type": row.anomaly_type,
+        "event_date": row.date,
+        "dataset": row.dataset,
+        "observed": row.observed,
+        "expected": row.expected,
+        "suppressed": bool(row.suppressed),
+        "suppression_reason": privacy_enforcer.reason if row.suppressed else None
+    }
 
-    return results
+def list_anomaly_events(db: Session, limit: int, dataset: Optional[str] = None, since: Optional[date] = None) -> List[Dict[str, Any]]:
+    query = anomaly_events_query(db)
+    if dataset:
+        query = query.filter(AnomalyEvent.dataset == dataset)
+    if since:
+        query = query.filter(AnomalyEvent.date >= since)
+
+    rows = query.order_by(AnomalyEvent.date.desc(), AnomalyEvent.score.desc()).limit(limit).all()
+    return [event_payload(row) for row in rows]
 
 @router.get("/anomalies/{pincode}", response_model=AnomalyResponse)
 async def get_anomaly_by_pincode(
     pincode: str,
     db: Session = Depends(get_db)
 ):
+    event = anomaly_events_query(db).filter(AnomalyEvent.pincode == pincode).order_by(
+        AnomalyEvent.date.desc(), AnomalyEvent.score.desc()
+    ).first()
+
+    if event:
+        return AnomalyResponse(**event_payload(event))
+
     risk_zone = db.query(RiskZone).filter(RiskZone.pincode == pincode).first()
 
     if not risk_zone:
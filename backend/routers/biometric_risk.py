@@ -7,6 +7,7 @@ from models.biometric import BiometricData
 from models.risk_zones import RiskZone
 from schemas import BiometricRiskResponse
 from services.privacy_enforcer import privacy_enforcer
+from services.dimensions import pincode_key
 
 router = APIRouter()
 
@@ -21,7 +22,7 @@ async def get_biometric_risk(
         raise HTTPException(status_code=404, detail=f"Pincode {pincode} not found")
 
     bio_data = db.query(BiometricData).filter(
-        BiometricData.pincode == pincode
+        BiometricData.pincode == pincode_key(pincode)
     ).order_by(BiometricData.date.desc()).first()
 
     if not bio_data:
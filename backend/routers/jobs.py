@@ -0,0 +1,42 @@
+import secrets
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from config import get_settings
+from database import get_write_db
+from models.job import Job
+from schemas import JobRequest, JobResponse
+from services.jobs import JobConflict, job_payload, job_runner
+
+settings = get_settings()
+
+router = APIRouter()
+
+def require_admin(x_admin_key: Optional[str] = Header(None)):
+    if not settings.admin_api_key:
+        raise HTTPException(status_code=403, detail="Admin API is disabled; set ADMIN_API_KEY to enable it")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, settings.admin_api_key):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+@router.post("/admin/jobs", response_model=JobResponse, status_code=202, dependencies=[Depends(require_admin)])
+def submit_job(request: JobRequest):
+    try:
+        job = job_runner.submit(request.kind.value)
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return job_payload(job)
+
+@router.get("/admin/jobs", response_model=List[JobResponse], dependencies=[Depends(require_admin)])
+async def list_jobs(
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of jobs"),
+    db: Session = Depends(get_write_db)
+):
+    return [job_payload(job) for job in job_runner.recent(db, limit)]
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, db: Session = Depends(get_write_db)):
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job_payload(job)
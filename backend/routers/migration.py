@@ -1,17 +1,73 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import date, datetime
+from sqlalchemy import func, select, literal, union_all, case, exists, type_coerce, Date, Float, cast
+from datetime import date, datetime, timedelta
 from typing import Optional
 
 from database import get_db
 from models.biometric import BiometricData
 from models.demographic import DemographicData
-from schemas import MigrationResponse
+from schemas import MigrationResponse, MigrationSeriesResponse, MigrationSeriesPoint, TimeBucketEnum
 from services.privacy_enforcer import privacy_enforcer
+from services.cache import VersionedCache
+from services.data_version import data_version
+from services.dimensions import pincode_key
+from services.time_buckets import date_bucket, bucket_start, previous_bucket
+from config import get_settings
+
+settings = get_settings()
 
 router = APIRouter()
 
+series_cache = VersionedCache("migration_series", max_entries=settings.series_cache_entries)
+
+def migration_series_statement(pincode: str, date_from: date, date_to: date, bucket: str, dialect_name: str):
+    pincode = pincode_key(pincode)
+    flows = union_all(
+        select(
+            date_bucket(BiometricData.date, bucket, dialect_name).label("bucket_start"),
+            BiometricData.total_biometric.label("biometric"),
+            literal(0).label("demographic")
+        ).where(
+            BiometricData.pincode == pincode,
+            BiometricData.date.between(date_from, date_to)
+        ),
+        select(
+            date_bucket(DemographicData.date, bucket, dialect_name).label("bucket_start"),
+            literal(0).label("biometric"),
+            DemographicData.total_demographic.label("demographic")
+        ).where(
+            DemographicData.pincode == pincode,
+            DemographicData.date.between(date_from, date_to)
+        )
+    ).subquery()
+
+    totals = select(
+        flows.c.bucket_start,
+        func.sum(flows.c.biometric).label("biometric"),
+        func.sum(flows.c.demographic).label("demographic")
+    ).group_by(flows.c.bucket_start).subquery()
+
+    population = case(
+        (totals.c.biometric >= totals.c.demographic, totals.c.biometric),
+        else_=totals.c.demographic
+    )
+    previous_population = func.lag(population).over(order_by=totals.c.bucket_start)
+    net_change = population - previous_population
+
+    velocity = cast(net_change, Float) / func.nullif(previous_population, 0)
+
+    return select(
+        totals.c.bucket_start,
+        type_coerce(func.lag(totals.c.bucket_start).over(order_by=totals.c.bucket_start), Date).label("previous_bucket"),
+        privacy_enforcer.mask_column(totals.c.biometric, population, label="biometric"),
+        privacy_enforcer.mask_column(totals.c.demographic, population, label="demographic"),
+        privacy_enforcer.mask_column(population, population, label="population"),
+        privacy_enforcer.mask_column(net_change, population, previous_population, label="net_change"),
+        privacy_enforcer.mask_column(velocity, population, previous_population, label="velocity"),
+        privacy_enforcer.suppressed_flag(population)
+    ).order_by(totals.c.bucket_start)
+
 @router.get("/migration", response_model=MigrationResponse)
 async def get_migration_data(
     pincode: Optional[str] = Query(None, description="6-digit pincode"),
@@ -24,12 +80,12 @@ async def get_migration_data(
     target_date = date_param or datetime.utcnow().date()
 
     bio_data = db.query(BiometricData).filter(
-        BiometricData.pincode == pincode,
+        BiometricData.pincode == pincode_key(pincode),
         BiometricData.date == target_date
     ).first()
 
     demo_data = db.query(DemographicData).filter(
-        DemographicData.pincode == pincode,
+        DemographicData.pincode == pincode_key(pincode),
         DemographicData.date == target_date
     ).first()
 
@@ -63,3 +119,67 @@ async def get_migration_data(
         })
 
     return MigrationResponse(**response_data)
+
+@router.get("/migration/series", response_model=MigrationSeriesResponse)
+async def get_migration_series(
+    pincode: str = Query(..., description="6-digit pincode"),
+    date_from: Optional[date] = Query(None, alias="from", description="Start date in YYYY-MM-DD format"),
+    date_to: Optional[date] = Query(None, alias="to", description="End date in YYYY-MM-DD format"),
+    bucket: TimeBucketEnum = Query(TimeBucketEnum.DAY, description="Bucket size"),
+    db: Session = Depends(get_db)
+):
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=365)
+
+    if not (len(pincode) == 6 and pincode.isdigit()):
+        raise HTTPException(status_code=400, detail="Pincode must be 6 digits")
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+
+    date_from = bucket_start(date_from, bucket.value)
+    version = data_version.current(db)
+    cache_key = (pincode, date_from, date_to, bucket.value)
+
+    cached = series_cache.get(version, cache_key)
+    if cached is not None:
+        return cached
+
+    statement = migration_series_statement(pincode, date_from, date_to, bucket.value, db.bind.dialect.name)
+
+    points = []
+    for row in db.execute(statement):
+        consecutive = row.previous_bucket == previous_bucket(row.bucket_start, bucket.value)
+        velocity = row.velocity if consecutive else None
+        net_change = row.net_change if consecutive else None
+        points.append(MigrationSeriesPoint(
+            bucket_start=row.bucket_start,
+            biometric=row.biometric,
+            demographic=row.demographic,
+            population=row.population,
+            velocity=round(velocity, 6) if velocity is not None else None,
+            net_change=net_change,
+            direction=None if not net_change else ("inflow" if net_change > 0 else "outflow"),
+            suppressed=bool(row.suppressed),
+            suppression_reason=privacy_enforcer.reason if row.suppressed else None
+        ))
+
+    if not points:
+        known = db.query(
+            exists().where(BiometricData.pincode == pincode_key(pincode))
+        ).scalar() or db.query(
+            exists().where(DemographicData.pincode == pincode_key(pincode))
+        ).scalar()
+        if not known:
+            raise HTTPException(status_code=404, detail=f"Pincode {pincode} not found")
+
+    response = MigrationSeriesResponse(
+        pincode=pincode,
+        bucket=bucket,
+        date_from=date_from,
+        date_to=date_to,
+        data_version=version,
+        points=points
+    )
+    series_cache.set(version, cache_key, response)
+
+    return response
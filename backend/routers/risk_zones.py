@@ -1,17 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional, Dict, Any
 
 from database import get_db
 from models.risk_zones import RiskZone, RiskLevel
-from schemas import RiskZoneResponse, RiskFactors, RiskLevelEnum
+from schemas import RiskZoneResponse, RiskFactors, RiskLevelEnum, NearbyRiskZoneResponse, RiskScenarioResponse
 from services.privacy_enforcer import privacy_enforcer
+from services.spatial_index import risk_zone_index, query_within, query_nearest, ZONE_COLUMNS
+from services.risk_scenario import risk_scenario_matrix, RISK_WEIGHTS, RISK_THRESHOLDS
+from services.http_cache import conditional_get
+from services.payloads import payload_cache, payload_response, encode_payload
+from config import get_settings
+
+settings = get_settings()
 
 router = APIRouter()
 
+def zone_row_payload(row) -> Dict[str, Any]:
+    return {
+        "pincode": row.pincode,
+        "district": row.district,
+        "state": row.state,
+        "latitude": row.latitude,
+        "longitude": row.longitude,
+        "population": row.population,
+        "risk_score": row.risk_score,
+        "risk_level": row.risk_level,
+        "factors": {
+            "migration": row.migration_velocity,
+            "biometric": row.biometric_risk,
+            "digital": row.digital_exclusion
+        },
+        "anomaly_flag": row.anomaly_flag,
+        "suppressed": row.is_suppressed,
+        "suppression_reason": row.suppression_reason
+    }
+
 @router.get("/stats/national")
-async def get_national_stats(db: Session = Depends(get_db)) -> Dict[str, Any]:
+async def get_national_stats(
+    request: Request,
+    response: Response,
+    version: str = Depends(conditional_get),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    payload = payload_cache.get_or_build(version, ("stats/national",), lambda: compute_national_stats(db))
+    return payload_response(request, payload, response.headers)
+
+def compute_national_stats(db: Session) -> Dict[str, Any]:
     total_pop = db.query(func.sum(RiskZone.population)).scalar() or 0
     total_zones = db.query(func.count(RiskZone.id)).scalar() or 0
     
@@ -46,12 +82,20 @@ async def get_national_stats(db: Session = Depends(get_db)) -> Dict[str, Any]:
 
 @router.get("/risk-zones", response_model=List[RiskZoneResponse])
 async def get_risk_zones(
+    request: Request,
+    response: Response,
     risk_level: Optional[RiskLevelEnum] = Query(None, description="Filter by risk level"),
     state: Optional[str] = Query(None, description="Filter by state"),
     limit: int = Query(100, ge=1, le=500, description="Maximum number of results"),
+    version: str = Depends(conditional_get),
     db: Session = Depends(get_db)
 ):
-    query = db.query(RiskZone)
+    key = ("risk-zones", risk_level, state, limit)
+    payload = payload_cache.get_or_build(version, key, lambda: list_risk_zones(db, risk_level, state, limit))
+    return payload_response(request, payload, response.headers)
+
+def list_risk_zones(db: Session, risk_level: Optional[RiskLevelEnum], state: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    query = db.query(*ZONE_COLUMNS)
 
     if risk_level and risk_level != RiskLevelEnum.ALL:
         query = query.filter(RiskZone.risk_level == risk_level.value)
@@ -60,38 +104,80 @@ async def get_risk_zones(
         query = query.filter(RiskZone.state == state)
 
     query = query.filter(RiskZone.is_suppressed == False)
+    query = privacy_enforcer.filter_query(query, RiskZone.population)
 
     query = query.order_by(RiskZone.risk_score.desc())
 
-    risk_zones = query.limit(limit).all()
-
-    results = []
-    for zone in risk_zones:
-        response_data = {
-            "pincode": zone.pincode,
-            "district": zone.district,
-            "state": zone.state,
-            "latitude": zone.latitude,
-            "longitude": zone.longitude,
-            "population": zone.population,
-            "risk_score": zone.risk_score,
-            "risk_level": zone.risk_level,
-            "factors": RiskFactors(
-                migration=zone.migration_velocity,
-                biometric=zone.biometric_risk,
-                digital=zone.digital_exclusion
-            ),
-            "anomaly_flag": zone.anomaly_flag,
-            "suppressed": zone.is_suppressed,
-            "suppression_reason": zone.suppression_reason
-        }
-
-        if privacy_enforcer.should_suppress(zone.population):
-            continue
-
-        results.append(RiskZoneResponse(**response_data))
-
-    return results
+    return [zone_row_payload(row) for row in query.limit(limit).all()]
+
+@router.get("/risk-zones/bbox", response_model=List[RiskZoneResponse])
+async def get_risk_zones_in_bbox(
+    request: Request,
+    response: Response,
+    min_lat: float = Query(..., ge=-90, le=90, description="Southern edge of the viewport"),
+    min_lon: float = Query(..., ge=-180, le=180, description="Western edge of the viewport"),
+    max_lat: float = Query(..., ge=-90, le=90, description="Northern edge of the viewport"),
+    max_lon: float = Query(..., ge=-180, le=180, description="Eastern edge of the viewport"),
+    limit: int = Query(500, ge=1, le=5000, description="Maximum number of results"),
+    db: Session = Depends(get_db)
+):
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="Bounding box minimums must not exceed maximums")
+
+    if settings.spatial_backend == "database":
+        rows = query_within(db, min_lat, min_lon, max_lat, max_lon, limit)
+    else:
+        rows = risk_zone_index.ensure_current(db).within(min_lat, min_lon, max_lat, max_lon, limit)
+
+    return payload_response(request, encode_payload([zone_row_payload(row) for row in rows]), response.headers)
+
+@router.get("/risk-zones/near", response_model=List[NearbyRiskZoneResponse])
+async def get_nearest_risk_zones(
+    request: Request,
+    response: Response,
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the reference point"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude of the reference point"),
+    k: int = Query(10, ge=1, le=100, description="Number of nearest zones"),
+    db: Session = Depends(get_db)
+):
+    if settings.spatial_backend == "database":
+        matches = query_nearest(db, lat, lon, k)
+    else:
+        matches = risk_zone_index.ensure_current(db).nearest(lat, lon, k)
+
+    content = [{**zone_row_payload(row), "distance_km": round(distance, 3)} for row, distance in matches]
+    return payload_response(request, encode_payload(content), response.headers)
+
+@router.get("/risk-zones/scenario", response_model=RiskScenarioResponse)
+async def get_risk_scenario(
+    request: Request,
+    response: Response,
+    migration: float = Query(RISK_WEIGHTS["migration"], ge=0, le=1, description="Weight of migration velocity"),
+    biometric: float = Query(RISK_WEIGHTS["biometric"], ge=0, le=1, description="Weight of biometric risk"),
+    digital: float = Query(RISK_WEIGHTS["digital"], ge=0, le=1, description="Weight of digital exclusion"),
+    border: float = Query(RISK_WEIGHTS["border"], ge=0, le=1, description="Weight of border proximity"),
+    medium_at: float = Query(RISK_THRESHOLDS["medium"], gt=0, le=1, description="Lowest score rated medium"),
+    high_at: float = Query(RISK_THRESHOLDS["high"], gt=0, le=1, description="Lowest score rated high"),
+    critical_at: float = Query(RISK_THRESHOLDS["critical"], gt=0, le=1, description="Lowest score rated critical"),
+    top: int = Query(20, ge=0, le=500, description="Number of highest-scoring zones to return"),
+    changed_limit: int = Query(100, ge=0, le=1000, description="Maximum number of level changes to return"),
+    version: str = Depends(conditional_get),
+    db: Session = Depends(get_db)
+):
+    total = migration + biometric + digital + border
+    if total <= 0:
+        raise HTTPException(status_code=400, detail="At least one weight must be positive")
+    if not medium_at < high_at < critical_at:
+        raise HTTPException(status_code=400, detail="Thresholds must satisfy medium_at < high_at < critical_at")
+
+    matrix = risk_scenario_matrix.ensure_current(db)
+    if not len(matrix):
+        raise HTTPException(status_code=503, detail="Risk factor matrix is empty; rerun compute_risk_zones.py")
+
+    weights = {"migration": migration / total, "biometric": biometric / total, "digital": digital / total, "border": border / total}
+    thresholds = {"medium": medium_at, "high": high_at, "critical": critical_at}
+    content = matrix.score(weights, thresholds, top, changed_limit)
+    return payload_response(request, encode_payload(content), response.headers)
 
 @router.get("/risk-zones/{pincode}", response_model=RiskZoneResponse)
 async def get_risk_zone_by_pincode(
@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import Optional
+
+from database import get_db
+from models.rollup import RollupCell
+from schemas import RollupResponse, RollupCellResponse, DatasetEnum, AgeBucketEnum, TimeBucketEnum
+from services.privacy_enforcer import privacy_enforcer
+from config import get_settings
+
+settings = get_settings()
+
+router = APIRouter()
+
+BUILT_GRANULARITIES = {g.strip() for g in settings.rollup_granularities.split(",") if g.strip()}
+
+def rollup_query(db: Session, dataset: DatasetEnum, age_bucket: AgeBucketEnum, granularity: TimeBucketEnum,
+                 date_from: Optional[date], date_to: Optional[date]):
+    if granularity.value not in BUILT_GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Granularity '{granularity.value}' is not built; available: {', '.join(sorted(BUILT_GRANULARITIES))}"
+        )
+
+    query = db.query(RollupCell).filter(
+        RollupCell.granularity == granularity.value,
+        RollupCell.dataset == dataset.value,
+        RollupCell.age_bucket == age_bucket.value
+    )
+
+    if date_from:
+        query = query.filter(RollupCell.period >= date_from)
+    if date_to:
+        query = query.filter(RollupCell.period <= date_to)
+
+    return query
+
+def to_response(dataset: DatasetEnum, age_bucket: AgeBucketEnum, granularity: TimeBucketEnum, cells) -> RollupResponse:
+    return RollupResponse(
+        dataset=dataset,
+        age_bucket=age_bucket,
+        granularity=granularity,
+        cells=[
+            RollupCellResponse(
+                level=cell.level,
+                state=cell.state,
+                district=cell.district,
+                period=cell.period,
+                value=cell.value,
+                suppressed=cell.is_suppressed,
+                suppression_reason=f"Data suppressed for privacy (n<{privacy_enforcer.minimum_cell_size})" if cell.is_suppressed else None
+            )
+            for cell in cells
+        ]
+    )
+
+@router.get("/rollup", response_model=RollupResponse)
+async def get_rollup_series(
+    dataset: DatasetEnum = Query(..., description="Source dataset"),
+    age_bucket: AgeBucketEnum = Query(AgeBucketEnum.TOTAL, description="Age bucket"),
+    granularity: TimeBucketEnum = Query(TimeBucketEnum.MONTH, description="Period size"),
+    state: Optional[str] = Query(None, description="State (omit for national totals)"),
+    district: Optional[str] = Query(None, description="District within the state"),
+    date_from: Optional[date] = Query(None, alias="from", description="First period in YYYY-MM-DD format"),
+    date_to: Optional[date] = Query(None, alias="to", description="Last period in YYYY-MM-DD format"),
+    db: Session = Depends(get_db)
+):
+    if district and not state:
+        raise HTTPException(status_code=400, detail="District requires a state")
+
+    query = rollup_query(db, dataset, age_bucket, granularity, date_from, date_to)
+
+    if district:
+        query = query.filter(RollupCell.level == "district", RollupCell.state == state, RollupCell.district == district)
+    elif state:
+        query = query.filter(RollupCell.level == "state", RollupCell.state == state)
+    else:
+        query = query.filter(RollupCell.level == "national")
+
+    cells = query.order_by(RollupCell.period).all()
+
+    if not cells and (state or district):
+        raise HTTPException(status_code=404, detail=f"No rollup data for {district or state}")
+
+    return to_response(dataset, age_bucket, granularity, cells)
+
+@router.get("/rollup/breakdown", response_model=RollupResponse)
+async def get_rollup_breakdown(
+    dataset: DatasetEnum = Query(..., description="Source dataset"),
+    age_bucket: AgeBucketEnum = Query(AgeBucketEnum.TOTAL, description="Age bucket"),
+    granularity: TimeBucketEnum = Query(TimeBucketEnum.MONTH, description="Period size"),
+    state: Optional[str] = Query(None, description="State to drill into (omit to list states)"),
+    date_from: Optional[date] = Query(None, alias="from", description="First period in YYYY-MM-DD format"),
+    date_to: Optional[date] = Query(None, alias="to", description="Last period in YYYY-MM-DD format"),
+    db: Session = Depends(get_db)
+):
+    query = rollup_query(db, dataset, age_bucket, granularity, date_from, date_to)
+
+    if state:
+        query = query.filter(RollupCell.level == "district", RollupCell.state == state)
+        order = (RollupCell.district, RollupCell.period)
+    else:
+        query = query.filter(RollupCell.level == "state")
+        order = (RollupCell.state, RollupCell.period)
+
+    cells = query.order_by(*order).all()
+
+    return to_response(dataset, age_bucket, granularity, cells)
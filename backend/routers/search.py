@@ -1,12 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
-from typing import List
 
 from database import get_db
-from models.pincode_metadata import PincodeMetadata
-from models.risk_zones import RiskZone
 from schemas import SearchResponse, SearchResult
+from services.search_index import search_index
 
 router = APIRouter()
 
@@ -16,37 +13,17 @@ async def search_locations(
     limit: int = Query(10, ge=1, le=50, description="Maximum number of results"),
     db: Session = Depends(get_db)
 ):
-    search_term = f"%{query}%"
+    matches = search_index.ensure_current(db).search(query, limit)
 
-    results = db.query(
-        PincodeMetadata.pincode,
-        PincodeMetadata.district,
-        PincodeMetadata.state
-    ).filter(
-        or_(
-            PincodeMetadata.pincode.like(search_term),
-            PincodeMetadata.district.ilike(search_term),
-            PincodeMetadata.state.ilike(search_term),
-            PincodeMetadata.post_office_name.ilike(search_term)
-        )
-    ).limit(limit).all()
-
-    search_results = []
-    for result in results:
-        score = 1.0 if query.lower() in result.pincode.lower() else 0.7
-        if query.lower() in result.district.lower():
-            score = max(score, 0.8)
-        if query.lower() in result.state.lower():
-            score = max(score, 0.6)
-
-        search_results.append(SearchResult(
-            pincode=result.pincode,
-            district=result.district,
-            state=result.state,
+    search_results = [
+        SearchResult(
+            pincode=pincode,
+            district=district,
+            state=state,
             match_score=score
-        ))
-
-    search_results.sort(key=lambda x: x.match_score, reverse=True)
+        )
+        for pincode, district, state, score in matches
+    ]
 
     return SearchResponse(
         query=query,
@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Header
+from typing import Optional
+
+from services.update_stream import EventStreamResponse, update_stream
+
+router = APIRouter()
+
+@router.get("/stream")
+async def stream_updates(last_event_id: Optional[str] = Header(None)):
+    return EventStreamResponse(update_stream.events(last_event_id))
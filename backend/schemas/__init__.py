@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import date, datetime
 from enum import Enum
 
@@ -30,6 +30,30 @@ class MigrationResponse(BaseModel):
     suppressed: bool = False
     suppression_reason: Optional[str] = None
 
+class TimeBucketEnum(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+class MigrationSeriesPoint(BaseModel):
+    bucket_start: date
+    biometric: Optional[int] = None
+    demographic: Optional[int] = None
+    population: Optional[int] = None
+    velocity: Optional[float] = None
+    net_change: Optional[int] = None
+    direction: Optional[str] = None
+    suppressed: bool = False
+    suppression_reason: Optional[str] = None
+
+class MigrationSeriesResponse(BaseModel):
+    pincode: str
+    bucket: TimeBucketEnum
+    date_from: date
+    date_to: date
+    data_version: str
+    points: List[MigrationSeriesPoint]
+
 class BiometricRiskResponse(BaseModel):
     pincode: str
     district: str
@@ -68,15 +92,69 @@ class RiskZoneResponse(BaseModel):
     suppressed: bool = False
     suppression_reason: Optional[str] = None
 
+class NearbyRiskZoneResponse(RiskZoneResponse):
+    distance_km: float
+
+class ScenarioZone(BaseModel):
+    pincode: str
+    district: str
+    state: str
+    population: int
+    risk_score: float
+    risk_level: str
+    baseline_level: str
+
+class RiskScenarioResponse(BaseModel):
+    version: Optional[str] = None
+    weights: Dict[str, float]
+    thresholds: Dict[str, float]
+    total_zones: int
+    suppressed_zones: int
+    level_counts: Dict[str, int]
+    baseline_counts: Dict[str, int]
+    top: List[ScenarioZone]
+    changed_count: int
+    changed: List[ScenarioZone]
+
 class AnomalyResponse(BaseModel):
     pincode: str
     anomaly_flag: bool
     anomaly_score: Optional[float] = None
     detected_at: Optional[datetime] = None
     type: Optional[str] = None
+    event_date: Optional[date] = None
+    dataset: Optional[str] = None
+    observed: Optional[int] = None
+    expected: Optional[float] = None
+    suppressed: bool = False
+    suppression_reason: Optional[str] = None
+
+class DatasetEnum(str, Enum):
+    BIOMETRIC = "biometric"
+    DEMOGRAPHIC = "demographic"
+    ENROLMENT = "enrolment"
+
+class AgeBucketEnum(str, Enum):
+    AGE_0_5 = "0_5"
+    AGE_5_17 = "5_17"
+    ADULT = "adult"
+    TOTAL = "total"
+
+class RollupCellResponse(BaseModel):
+    level: str
+    state: Optional[str] = None
+    district: Optional[str] = None
+    period: date
+    value: Optional[int] = None
     suppressed: bool = False
     suppression_reason: Optional[str] = None
 
+class RollupResponse(BaseModel):
+    dataset: DatasetEnum
+    age_bucket: AgeBucketEnum
+    granularity: TimeBucketEnum
+    cells: List[RollupCellResponse]
+
 class SearchResult(BaseModel):
     pincode: str
     district: str
@@ -87,3 +165,28 @@ class SearchResponse(BaseModel):
     query: str
     results: List[SearchResult]
     total: int
+
+class JobKindEnum(str, Enum):
+    INGEST = "ingest"
+    ENRICH = "enrich"
+    RECOMPUTE = "recompute"
+
+class JobRequest(BaseModel):
+    kind: JobKindEnum
+
+class JobResponse(BaseModel):
+    id: str
+    kind: JobKindEnum
+    status: str
+    trigger: str
+    stage: Optional[str] = None
+    rows_done: int = 0
+    rows_total: Optional[int] = None
+    percent: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    elapsed_seconds: Optional[float] = None
+    submitted_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(main.app)
+client.__enter__()
+started = time.perf_counter()
+timings = {"import_ms": (imported - start) * 1000, "startup_ms": (started - imported) * 1000}
+for label, path in (("first_request_ms", sys.argv[1]), ("second_request_ms", sys.argv[1]), ("ready_ms", "/ready")):
+    t = time.perf_counter()
+    status = client.get(path).status_code
+    timings[label] = (time.perf_counter() - t) * 1000
+    timings[label.replace("_ms", "_status")] = status
+client.__exit__(None, None, None)
+print(json.dumps(timings))
+"""
+
+def run_once(mode: str, path: str, warmup: bool) -> dict:
+    env = {
+        **os.environ,
+        "STARTUP_MODE": mode,
+        "WARMUP_ON_STARTUP": "true" if warmup else "false",
+        "ENABLE_RATE_LIMIT": "false",
+        "ENABLE_AUDIT_LOG": "false",
+        "DB_ECHO": "false",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, path],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API import time and first-request latency per startup mode")
+    parser.add_argument("--path", default="/api/stats/national")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", action="store_true", help="Also enable background warmup")
+    args = parser.parse_args()
+
+    print(f"Cold start: {args.runs} fresh processes per mode, first request to {args.path}")
+    for mode in ("standard", "serverless"):
+        runs = [run_once(mode, args.path, args.warmup) for _ in range(args.runs)]
+        metrics = ("import_ms", "startup_ms", "first_request_ms", "second_request_ms", "ready_ms")
+        medians = {metric: statistics.median(run[metric] for run in runs) for metric in metrics}
+        total = medians["import_ms"] + medians["startup_ms"] + medians["first_request_ms"]
+        print(f"  {mode:<11} " + "  ".join(f"{metric}={value:7.1f}" for metric, value in medians.items())
+              + f"  total_to_first_response={total:7.1f}  status={runs[-1]['first_request_status']}")
+
+if __name__ == "__main__":
+    main()
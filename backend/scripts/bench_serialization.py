@@ -0,0 +1,117 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import json
+import random
+import time
+from collections import namedtuple
+
+import orjson
+
+from fastapi.encoders import jsonable_encoder
+from fastapi._compat import ModelField
+from pydantic.fields import FieldInfo
+from typing import List
+
+from models.risk_zones import RiskLevel
+from schemas import RiskZoneResponse, RiskFactors
+from services.payloads import encode_payload, PayloadCache
+from routers.risk_zones import zone_row_payload
+
+ZoneRow = namedtuple("ZoneRow", [
+    "pincode", "district", "state", "latitude", "longitude", "population", "risk_score", "risk_level",
+    "migration_velocity", "biometric_risk", "digital_exclusion", "anomaly_flag", "is_suppressed", "suppression_reason",
+])
+
+def synthetic_rows(count: int):
+    random.seed(42)
+    return [
+        ZoneRow(
+            pincode=f"{110001 + i}",
+            district=f"District {i % 700}",
+            state=f"State {i % 36}",
+            latitude=random.uniform(8, 37),
+            longitude=random.uniform(68, 97),
+            population=random.randint(10, 50000),
+            risk_score=random.random(),
+            risk_level=random.choice(list(RiskLevel)),
+            migration_velocity=random.random(),
+            biometric_risk=random.random(),
+            digital_exclusion=random.random(),
+            anomaly_flag=random.random() < 0.05,
+            is_suppressed=False,
+            suppression_reason=None,
+        )
+        for i in range(count)
+    ]
+
+def legacy_path(rows, field):
+    results = []
+    for zone in rows:
+        results.append(RiskZoneResponse(
+            pincode=zone.pincode,
+            district=zone.district,
+            state=zone.state,
+            latitude=zone.latitude,
+            longitude=zone.longitude,
+            population=zone.population,
+            risk_score=zone.risk_score,
+            risk_level=zone.risk_level,
+            factors=RiskFactors(
+                migration=zone.migration_velocity,
+                biometric=zone.biometric_risk,
+                digital=zone.digital_exclusion
+            ),
+            anomaly_flag=zone.anomaly_flag,
+            suppressed=zone.is_suppressed,
+            suppression_reason=zone.suppression_reason
+        ))
+    value, errors = field.validate(results, {}, loc=("response",))
+    return json.dumps(jsonable_encoder(value), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+def fast_path(rows):
+    return orjson.dumps([zone_row_payload(row) for row in rows])
+
+def fast_path_compressed(rows):
+    return encode_payload([zone_row_payload(row) for row in rows])
+
+def time_per_call(fn, iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare risk-zone list serialization paths")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    field = ModelField(
+        name="Response_get_risk_zones",
+        field_info=FieldInfo(annotation=List[RiskZoneResponse]),
+        mode="validation",
+    )
+
+    cache = PayloadCache("bench", max_entries=4)
+    cache.get_or_build("v1", "risk-zones", lambda: [zone_row_payload(row) for row in rows])
+
+    results = {
+        "legacy (pydantic models + response_model + json)": time_per_call(lambda: legacy_path(rows, field), args.iterations),
+        "fast (column tuples + orjson)": time_per_call(lambda: fast_path(rows), args.iterations),
+        "fast + pre-compressed variants (cache miss)": time_per_call(lambda: fast_path_compressed(rows), args.iterations),
+        "cached (payload per data version)": time_per_call(lambda: cache.get("v1", "risk-zones"), args.iterations),
+    }
+
+    baseline = next(iter(results.values()))
+    print(f"Serializing {args.rows} risk zones, {args.iterations} iterations")
+    for label, micros in results.items():
+        print(f"  {label:<52} {micros:>10.1f} us/request  ({baseline / micros:>7.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+import sys
+import os
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("ENABLE_RATE_LIMIT", "false")
+os.environ.setdefault("ENABLE_AUDIT_LOG", "false")
+
+import argparse
+import json
+import re
+from datetime import date, timedelta
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+import logging
+
+from config import get_settings
+
+settings = get_settings()
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BASELINE_PATH = Path(__file__).parent / "query_plan_baselines.json"
+DATASET_START = date(2025, 1, 1)
+STATE_COUNT = 36
+
+FACT_COLUMNS = {
+    "biometric_data": (("bio_age_0_5", "bio_age_5_17", "bio_age_17_plus"), "total_biometric"),
+    "demographic_data": (("demo_age_0_5", "demo_age_5_17", "demo_age_17_plus"), "total_demographic"),
+    "enrolment_data": (("age_0_5", "age_5_17", "age_18_greater"), "total_enrolment"),
+}
+
+PARTITION_SUFFIX = re.compile(r"_(y\d{4}m\d{2}|default)(?=_|$)")
+
+def load_dataset(pincodes: int, districts: int, days: int, density: float):
+    from database import Base, SessionLocal, get_write_engine, init_db
+    from services.partitions import PARTITIONED, ensure_partitions
+    from scripts.compute_risk_zones import compute_risk_zones
+    from scripts.compute_rollups import build_rollup_cube
+    from services.data_version import data_version
+
+    engine = get_write_engine()
+    logger.info(f"Loading synthetic dataset: {pincodes} pincodes, {districts} districts, {days} days at density {density}")
+
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+
+    months = {DATASET_START + timedelta(days=offset) for offset in range(days)}
+    with engine.begin() as connection:
+        connection.execute(text("SELECT setseed(0.42)"))
+        connection.execute(text(
+            "INSERT INTO states (id, name) SELECT s, 'State ' || s FROM generate_series(1, :states) s"
+        ), {"states": STATE_COUNT})
+        connection.execute(text(
+            "INSERT INTO districts (id, state_id, name) "
+            "SELECT d, (d - 1) % :states + 1, 'District ' || d FROM generate_series(1, :districts) d"
+        ), {"states": STATE_COUNT, "districts": districts})
+        connection.execute(text(
+            "INSERT INTO pincode_metadata (pincode, post_office_name, district, state, latitude, longitude) "
+            "SELECT (100000 + p)::text, 'Post Office ' || p, 'District ' || ((p - 1) % :districts + 1), "
+            "'State ' || (((p - 1) % :districts) % :states + 1), 8 + random() * 29, 68 + random() * 29 "
+            "FROM generate_series(1, :pincodes) p"
+        ), {"states": STATE_COUNT, "districts": districts, "pincodes": pincodes})
+
+        for table, (age_columns, total_column) in FACT_COLUMNS.items():
+            if PARTITIONED:
+                ensure_partitions(connection, table, months)
+            columns = ", ".join(age_columns)
+            connection.execute(text(
+                f"INSERT INTO {table} (date, state_id, district_id, pincode, {columns}, {total_column}) "
+                f"SELECT day, state_id, district_id, pincode, {columns}, {' + '.join(age_columns)} FROM ("
+                f"  SELECT day::date AS day, ((p - 1) % :districts) % :states + 1 AS state_id, "
+                f"  (p - 1) % :districts + 1 AS district_id, 100000 + p AS pincode, "
+                + ", ".join(f"floor(random() * 25)::int AS {column}" for column in age_columns) +
+                f"  FROM generate_series(1, :pincodes) p "
+                f"  CROSS JOIN generate_series(CAST(:start AS date), CAST(:start AS date) + :days - 1, interval '1 day') day "
+                f"  WHERE random() < :density"
+                f") generated"
+            ), {
+                "states": STATE_COUNT, "districts": districts, "pincodes": pincodes,
+                "start": DATASET_START, "days": days, "density": density
+            })
+            logger.info(f"{table}: loaded")
+
+    db = SessionLocal()
+    try:
+        compute_risk_zones(db)
+        build_rollup_cube(db)
+        data_version.publish(db)
+    finally:
+        db.close()
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("ANALYZE"))
+
+class StatementRecorder:
+
+    def __init__(self):
+        self.statements = []
+        self.active = False
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active and not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            self.statements.append((statement, parameters))
+
+def sample_values(db) -> dict:
+    from models.risk_zones import RiskZone
+    from models.biometric import BiometricData
+    from services.dimensions import pincode_key
+    from sqlalchemy import func
+
+    count = db.query(func.count(RiskZone.id)).scalar()
+    zone = db.query(RiskZone).order_by(RiskZone.pincode).offset(count // 2).first()
+    latest = db.query(func.max(BiometricData.date)).filter(BiometricData.pincode == pincode_key(zone.pincode)).scalar()
+    return {
+        "pincode": zone.pincode,
+        "state": zone.state,
+        "district": zone.district,
+        "lat": round(zone.latitude, 3),
+        "lon": round(zone.longitude, 3),
+        "date": latest.isoformat(),
+        "from": (latest - timedelta(days=60)).isoformat(),
+    }
+
+def api_scenarios(values: dict) -> dict:
+    pincode, state, district = values["pincode"], values["state"], values["district"]
+    lat, lon = values["lat"], values["lon"]
+    return {
+        "stats_national": "/api/stats/national",
+        "risk_zones": "/api/risk-zones?limit=100",
+        "risk_zones_by_state": f"/api/risk-zones?state={state}&limit=100",
+        "risk_zones_by_level": "/api/risk-zones?risk_level=high&limit=100",
+        "risk_zones_bbox": f"/api/risk-zones/bbox?min_lat={lat - 1}&min_lon={lon - 1}&max_lat={lat + 1}&max_lon={lon + 1}",
+        "risk_zones_near": f"/api/risk-zones/near?lat={lat}&lon={lon}&k=10",
+        "risk_zone_detail": f"/api/risk-zones/{pincode}",
+        "risk_scenario": "/api/risk-zones/scenario?migration=0.5&border=0.1",
+        "anomalies": "/api/anomalies?limit=50",
+        "anomaly_events": "/api/anomalies/events?dataset=biometric&limit=50",
+        "anomaly_detail": f"/api/anomalies/{pincode}",
+        "biometric_risk": f"/api/biometric-risk?pincode={pincode}",
+        "census_calibrated": f"/api/census/calibrated?pincode={pincode}",
+        "migration": f"/api/migration?pincode={pincode}&date={values['date']}",
+        "migration_series_day": f"/api/migration/series?pincode={pincode}&from={values['from']}&to={values['date']}",
+        "migration_series_month": f"/api/migration/series?pincode={pincode}&bucket=month",
+        "search": "/api/search?query=District 1",
+        "rollup_national": "/api/rollup?dataset=biometric",
+        "rollup_state": f"/api/rollup?dataset=biometric&state={state}",
+        "rollup_district": f"/api/rollup?dataset=demographic&state={state}&district={district}",
+        "rollup_breakdown": "/api/rollup/breakdown?dataset=enrolment",
+        "rollup_breakdown_state": f"/api/rollup/breakdown?dataset=enrolment&state={state}",
+    }
+
+def script_scenarios(values: dict) -> dict:
+    from scripts.compute_risk_zones import load_pincode_totals
+    from scripts.compute_rollups import DATASETS, load_daily_district_totals
+
+    scenarios = {"compute_risk_zones.pincode_totals": lambda db: load_pincode_totals(db, values["pincode"])}
+    for dataset, (model, age_columns) in DATASETS.items():
+        scenarios[f"compute_rollups.daily_totals.{dataset}"] = (
+            lambda db, model=model, age_columns=age_columns: load_daily_district_totals(db, model, age_columns)
+        )
+    return scenarios
+
+def reset_caches():
+    from services.cache import CACHES
+    from services.data_version import data_version
+
+    for cache in CACHES.values():
+        cache.clear()
+    data_version.invalidate()
+
+def capture_statements(values: dict) -> dict:
+    from fastapi.testclient import TestClient
+    from database import SessionLocal
+    from main import app
+
+    recorder = StatementRecorder()
+    event.listen(Engine, "before_cursor_execute", recorder)
+    client = TestClient(app)
+    captured = {}
+    seen = set()
+
+    def collect(name: str, run):
+        reset_caches()
+        recorder.statements = []
+        recorder.active = True
+        try:
+            run()
+        finally:
+            recorder.active = False
+
+        ordinal = 0
+        for statement, parameters in recorder.statements:
+            normalized = " ".join(statement.split())
+            if normalized in seen:
+                continue
+            seen.add(normalized)
+            ordinal += 1
+            captured[f"{name}#{ordinal}"] = (statement, parameters)
+
+    for name, path in api_scenarios(values).items():
+        def request(path=path):
+            response = client.get(path)
+            if response.status_code >= 400:
+                logger.warning(f"{name}: {path} returned {response.status_code}")
+        collect(name, request)
+
+    db = SessionLocal()
+    try:
+        for name, run in script_scenarios(values).items():
+            collect(name, lambda run=run: run(db))
+    finally:
+        db.close()
+
+    event.remove(Engine, "before_cursor_execute", recorder)
+    return captured
+
+def normalize_name(name: str) -> str:
+    return PARTITION_SUFFIX.sub("", name)
+
+def walk(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+def node_label(node) -> str:
+    label = node["Node Type"]
+    if "Relation Name" in node:
+        label += f" on {normalize_name(node['Relation Name'])}"
+    if "Index Name" in node:
+        label += f" using {normalize_name(node['Index Name'])}"
+    return label
+
+def explain(connection, statement: str, parameters) -> dict:
+    cursor = connection.cursor()
+    try:
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters)
+        result = cursor.fetchone()[0][0]
+    finally:
+        cursor.close()
+    connection.rollback()
+
+    root = result["Plan"]
+    return {
+        "sql": " ".join(statement.split())[:300],
+        "shape": sorted({node_label(node) for node in walk(root)}),
+        "buffers": root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0),
+        "ms": round(result["Execution Time"], 3),
+    }
+
+def compare(name: str, baseline: dict, current: dict, tolerance: float, min_buffers: int) -> list:
+    problems = []
+
+    baseline_shape = set(baseline["shape"])
+    current_shape = set(current["shape"])
+    lost_indexes = sorted(label for label in baseline_shape - current_shape if " using " in label)
+    new_seq_scans = sorted(label for label in current_shape - baseline_shape if label.startswith("Seq Scan"))
+
+    if lost_indexes:
+        problems.append(f"no longer uses {', '.join(lost_indexes)}")
+    if new_seq_scans:
+        problems.append(f"now runs {', '.join(new_seq_scans)}")
+
+    limit = max(baseline["buffers"] * tolerance, baseline["buffers"] + min_buffers)
+    if current["buffers"] > limit:
+        problems.append(f"touches {current['buffers']} buffers (baseline {baseline['buffers']})")
+
+    return [f"{name}: {problem}" for problem in problems]
+
+def check_query_plans(baseline_path: Path, update: bool, tolerance: float, min_buffers: int) -> bool:
+    from database import SessionLocal, get_write_engine
+
+    db = SessionLocal()
+    try:
+        values = sample_values(db)
+    finally:
+        db.close()
+
+    captured = capture_statements(values)
+    logger.info(f"Captured {len(captured)} distinct SELECT statements")
+
+    raw = get_write_engine().raw_connection()
+    try:
+        plans = {name: explain(raw, statement, parameters) for name, (statement, parameters) in captured.items()}
+    finally:
+        raw.close()
+
+    if update:
+        baseline_path.write_text(json.dumps({"samples": values, "plans": plans}, indent=2, sort_keys=True) + "\n")
+        logger.info(f"Wrote {len(plans)} baselines to {baseline_path}")
+        return True
+
+    if not baseline_path.exists():
+        logger.error(f"No baselines at {baseline_path}; run with --update-baselines first")
+        return False
+
+    baselines = json.loads(baseline_path.read_text())["plans"]
+    failures = []
+
+    for name, current in plans.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            logger.warning(f"{name}: no baseline (new query?): {current['sql'][:120]}")
+            continue
+        if baseline["sql"] != current["sql"]:
+            logger.warning(f"{name}: SQL text changed since the baseline was recorded")
+
+        problems = compare(name, baseline, current, tolerance, min_buffers)
+        failures.extend(problems)
+        status = "FAIL" if problems else "ok"
+        logger.info(f"{status:4} {name:45} buffers {baseline['buffers']:>7} -> {current['buffers']:<7} {current['ms']:>9.2f} ms")
+
+    for name in sorted(set(baselines) - set(plans)):
+        logger.warning(f"{name}: baseline query was not issued")
+
+    for failure in failures:
+        logger.error(failure)
+
+    if failures:
+        logger.error(f"{len(failures)} query plan regressions")
+        return False
+
+    logger.info("All query plans match their baselines")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare EXPLAIN (ANALYZE, BUFFERS) plans of every router and script query against baselines")
+    parser.add_argument("--load", action="store_true", help="Drop all tables and load a synthetic national-scale dataset first")
+    parser.add_argument("--pincodes", type=int, default=19000)
+    parser.add_argument("--districts", type=int, default=750)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--density", type=float, default=0.35, help="Share of pincode-days that have a row")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("--buffer-tolerance", type=float, default=2.0, help="Fail when a query touches this many times its baseline buffers")
+    parser.add_argument("--min-buffer-increase", type=int, default=64, help="Ignore buffer increases smaller than this")
+    args = parser.parse_args()
+
+    if not settings.database_url.startswith("postgres"):
+        logger.error("Query plan checks need PostgreSQL; set DATABASE_URL to a local scratch database")
+        return False
+
+    if args.load:
+        load_dataset(args.pincodes, args.districts, args.days, args.density)
+
+    return check_query_plans(args.baseline, args.update_baselines, args.buffer_tolerance, args.min_buffer_increase)
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
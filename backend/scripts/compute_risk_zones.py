@@ -4,8 +4,10 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import argparse
 import numpy as np
 import random
+from typing import Any, Dict
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from tqdm import tqdm
@@ -16,8 +18,16 @@ from models.biometric import BiometricData
 from models.demographic import DemographicData
 from models.enrolment import EnrolmentData
 from models.risk_zones import RiskZone, RiskLevel
+from models.risk_factor import RiskFactor
 from models.pincode_metadata import PincodeMetadata
 from services.privacy_enforcer import privacy_enforcer
+from services.data_version import data_version
+from services.dimensions import pincode_key
+from scripts.compute_rollups import build_rollup_cube
+from services.anomaly_engine import detect_anomalies
+from services.risk_scenario import RISK_WEIGHTS, RISK_THRESHOLDS
+from services.pipeline_profiler import profiler
+from services.serving_bundle import export_bundle
 from config import get_settings
 
 settings = get_settings()
@@ -88,11 +98,11 @@ def modified_zscore(values):
     return 0.6745 * (values - median) / mad
 
 def calculate_risk_level(score):
-    if score >= 0.75:
+    if score >= RISK_THRESHOLDS['critical']:
         return RiskLevel.CRITICAL
-    elif score >= 0.55:
+    elif score >= RISK_THRESHOLDS['high']:
         return RiskLevel.HIGH
-    elif score >= 0.35:
+    elif score >= RISK_THRESHOLDS['medium']:
         return RiskLevel.MEDIUM
     else:
         return RiskLevel.LOW
@@ -117,69 +127,76 @@ def calculate_digital_darkness(biometric_risk):
     random_factor = random.uniform(0.8, 1.2)
     return min(1.0, max(0.0, biometric_risk * random_factor + 0.1))
 
-def compute_risk_zones(db: Session):
-    logger.info("Computing risk zones with enhanced model...")
+def load_pincode_totals(db: Session, pincode: str):
+    key = pincode_key(pincode)
 
-    pincodes = db.query(PincodeMetadata).all()
-    logger.info(f"Processing {len(pincodes)} pincodes...")
+    bio_agg = db.query(
+        func.sum(BiometricData.total_biometric).label('total_bio')
+    ).filter(BiometricData.pincode == key).first()
 
-    risk_data = []
+    demo_agg = db.query(
+        func.sum(DemographicData.total_demographic).label('total_demo')
+    ).filter(DemographicData.pincode == key).first()
 
-    for pincode_meta in tqdm(pincodes, desc="Calculating risk scores"):
-        pincode = pincode_meta.pincode
+    enrol_agg = db.query(
+        func.sum(EnrolmentData.total_enrolment).label('total_enrol')
+    ).filter(EnrolmentData.pincode == key).first()
 
-        bio_agg = db.query(
-            func.sum(BiometricData.total_biometric).label('total_bio')
-        ).filter(BiometricData.pincode == pincode).first()
+    return bio_agg.total_bio or 0, demo_agg.total_demo or 0, enrol_agg.total_enrol or 0
 
-        demo_agg = db.query(
-            func.sum(DemographicData.total_demographic).label('total_demo')
-        ).filter(DemographicData.pincode == pincode).first()
+def compute_risk_zones(db: Session, progress=None):
+    logger.info("Computing risk zones with enhanced model...")
+
+    pincodes = db.query(PincodeMetadata).all()
+    logger.info(f"Processing {len(pincodes)} pincodes...")
+    if progress:
+        progress.stage("risk_zones", len(pincodes))
 
-        enrol_agg = db.query(
-            func.sum(EnrolmentData.total_enrolment).label('total_enrol')
-        ).filter(EnrolmentData.pincode == pincode).first()
+    risk_data = []
 
-        total_bio = bio_agg.total_bio or 0
-        total_demo = demo_agg.total_demo or 0
-        total_enrol = enrol_agg.total_enrol or 0
+    with profiler.stage("aggregate", rows=len(pincodes)):
+        for pincode_meta in tqdm(pincodes, desc="Calculating risk scores"):
+            if progress:
+                progress.advance()
+            pincode = pincode_meta.pincode
+            total_bio, total_demo, total_enrol = load_pincode_totals(db, pincode)
 
-        population = max(total_bio, total_demo, total_enrol)
+            population = max(total_bio, total_demo, total_enrol)
 
-        if population == 0:
-            continue
+            if population == 0:
+                continue
 
-        migration_velocity = abs(total_bio - total_demo) / population if population > 0 else 0.0
+            migration_velocity = abs(total_bio - total_demo) / population if population > 0 else 0.0
 
-        expected_bio = total_demo * 0.95
-        biometric_risk = max(0, (expected_bio - total_bio) / expected_bio) if expected_bio > 0 else 0.0
+            expected_bio = total_demo * 0.95
+            biometric_risk = max(0, (expected_bio - total_bio) / expected_bio) if expected_bio > 0 else 0.0
 
-        digital_exclusion = calculate_digital_darkness(biometric_risk)
+            digital_exclusion = calculate_digital_darkness(biometric_risk)
         
-        adults_estimate = int(population * 0.65)
-        electoral_ratio, ghost_risk = calculate_electoral_integrity(population, adults_estimate)
-
-        border_factor = get_border_proximity_factor(pincode_meta.state)
-
-        lat = pincode_meta.latitude
-        lon = pincode_meta.longitude
-        if lat is None or lon is None or (lat == 0 and lon == 0):
-            lat, lon = get_state_coordinates(pincode_meta.state)
-
-        risk_data.append({
-            'pincode': pincode,
-            'district': pincode_meta.district,
-            'state': pincode_meta.state,
-            'latitude': lat,
-            'longitude': lon,
-            'population': population,
-            'migration_velocity': migration_velocity,
-            'biometric_risk': biometric_risk,
-            'digital_exclusion': digital_exclusion,
-            'border_factor': border_factor,
-            'electoral_integrity_ratio': electoral_ratio,
-            'ghost_voter_risk': ghost_risk
-        })
+            adults_estimate = int(population * 0.65)
+            electoral_ratio, ghost_risk = calculate_electoral_integrity(population, adults_estimate)
+
+            border_factor = get_border_proximity_factor(pincode_meta.state)
+
+            lat = pincode_meta.latitude
+            lon = pincode_meta.longitude
+            if lat is None or lon is None or (lat == 0 and lon == 0):
+                lat, lon = get_state_coordinates(pincode_meta.state)
+
+            risk_data.append({
+                'pincode': pincode,
+                'district': pincode_meta.district,
+                'state': pincode_meta.state,
+                'latitude': lat,
+                'longitude': lon,
+                'population': population,
+                'migration_velocity': migration_velocity,
+                'biometric_risk': biometric_risk,
+                'digital_exclusion': digital_exclusion,
+                'border_factor': border_factor,
+                'electoral_integrity_ratio': electoral_ratio,
+                'ghost_voter_risk': ghost_risk
+            })
 
     if not risk_data:
         logger.warning("No risk data to process")
@@ -187,72 +204,82 @@ def compute_risk_zones(db: Session):
 
     logger.info("Normalizing risk metrics with min-max scaling...")
 
-    migration_values = [d['migration_velocity'] for d in risk_data]
-    biometric_values = [d['biometric_risk'] for d in risk_data]
-    digital_values = [d['digital_exclusion'] for d in risk_data]
-    border_values = [d['border_factor'] for d in risk_data]
-
-    migration_norm = normalize_minmax(migration_values)
-    biometric_norm = normalize_minmax(biometric_values)
-    digital_norm = normalize_minmax(digital_values)
-    border_norm = np.array(border_values)
-
-    weights = {
-        'migration': 0.30,
-        'biometric': 0.25,
-        'digital': 0.20,
-        'border': 0.25
-    }
+    with profiler.stage("normalize", rows=len(risk_data)):
+        migration_values = [d['migration_velocity'] for d in risk_data]
+        biometric_values = [d['biometric_risk'] for d in risk_data]
+        digital_values = [d['digital_exclusion'] for d in risk_data]
+        border_values = [d['border_factor'] for d in risk_data]
+
+        migration_norm = normalize_minmax(migration_values)
+        biometric_norm = normalize_minmax(biometric_values)
+        digital_norm = normalize_minmax(digital_values)
+        border_norm = np.array(border_values)
+
+    weights = RISK_WEIGHTS
 
     logger.info("Computing composite risk scores with border proximity...")
 
-    mig_zscores = modified_zscore(migration_values)
-    bio_zscores = modified_zscore(biometric_values)
+    with profiler.stage("score", rows=len(risk_data)):
+        mig_zscores = modified_zscore(migration_values)
+        bio_zscores = modified_zscore(biometric_values)
 
-    for i, data in enumerate(risk_data):
-        composite = (
-            weights['migration'] * migration_norm[i] +
-            weights['biometric'] * biometric_norm[i] +
-            weights['digital'] * digital_norm[i] +
-            weights['border'] * border_norm[i]
-        )
+        for i, data in enumerate(risk_data):
+            composite = (
+                weights['migration'] * migration_norm[i] +
+                weights['biometric'] * biometric_norm[i] +
+                weights['digital'] * digital_norm[i] +
+                weights['border'] * border_norm[i]
+            )
 
-        risk_score = max(0.0, min(1.0, composite))
+            risk_score = max(0.0, min(1.0, composite))
 
-        data['risk_score'] = risk_score
-        data['risk_level'] = calculate_risk_level(risk_score)
+            data['risk_score'] = risk_score
+            data['risk_level'] = calculate_risk_level(risk_score)
 
-        is_anomaly = (
-            abs(mig_zscores[i]) > 3.5 or
-            abs(bio_zscores[i]) > 3.5 or
-            data['migration_velocity'] > 0.10
-        )
-        data['anomaly_flag'] = is_anomaly
-        data['anomaly_score'] = float(max(abs(mig_zscores[i]), abs(bio_zscores[i]))) if is_anomaly else 0.0
+            is_anomaly = (
+                abs(mig_zscores[i]) > 3.5 or
+                abs(bio_zscores[i]) > 3.5 or
+                data['migration_velocity'] > 0.10
+            )
+            data['anomaly_flag'] = is_anomaly
+            data['anomaly_score'] = float(max(abs(mig_zscores[i]), abs(bio_zscores[i]))) if is_anomaly else 0.0
 
-        data['calibrated_population'] = int(data['population'] * 0.98)
-        data['lower_ci'] = int(data['calibrated_population'] * 0.95)
-        data['upper_ci'] = int(data['calibrated_population'] * 1.05)
+            data['calibrated_population'] = int(data['population'] * 0.98)
+            data['lower_ci'] = int(data['calibrated_population'] * 0.95)
+            data['upper_ci'] = int(data['calibrated_population'] * 1.05)
 
-        if privacy_enforcer.should_suppress(data['population']):
-            data['is_suppressed'] = True
-            data['suppression_reason'] = f"Population below minimum threshold (n={data['population']})"
-        else:
-            data['is_suppressed'] = False
-            data['suppression_reason'] = None
+            if privacy_enforcer.should_suppress(data['population']):
+                data['is_suppressed'] = True
+                data['suppression_reason'] = f"Population below minimum threshold (n={data['population']})"
+            else:
+                data['is_suppressed'] = False
+                data['suppression_reason'] = None
 
-        del data['border_factor']
+            del data['border_factor']
 
     logger.info("Inserting risk zones into database...")
 
-    db.query(RiskZone).delete()
-    db.commit()
+    with profiler.stage("write", rows=len(risk_data)):
+        db.query(RiskZone).delete()
+        db.query(RiskFactor).delete()
+        db.commit()
 
-    for data in tqdm(risk_data, desc="Inserting records"):
-        risk_zone = RiskZone(**data)
-        db.add(risk_zone)
+        db.bulk_insert_mappings(RiskFactor, [
+            {
+                'pincode': data['pincode'],
+                'migration': float(migration_norm[i]),
+                'biometric': float(biometric_norm[i]),
+                'digital': float(digital_norm[i]),
+                'border': float(border_norm[i])
+            }
+            for i, data in enumerate(risk_data)
+        ])
 
-    db.commit()
+        for data in tqdm(risk_data, desc="Inserting records"):
+            risk_zone = RiskZone(**data)
+            db.add(risk_zone)
+
+        db.commit()
 
     critical_count = sum(1 for d in risk_data if d['risk_level'] == RiskLevel.CRITICAL)
     high_count = sum(1 for d in risk_data if d['risk_level'] == RiskLevel.HIGH)
@@ -263,25 +290,74 @@ def compute_risk_zones(db: Session):
     
     return len(risk_data)
 
+def recompute(db: Session, progress=None) -> Dict[str, Any]:
+    count = compute_risk_zones(db, progress)
+    if progress:
+        progress.stage("rollups")
+    with profiler.stage("rollups") as stats:
+        cell_count = build_rollup_cube(db)
+        stats.rows += cell_count
+    if progress:
+        progress.stage("anomalies")
+    with profiler.stage("anomalies") as stats:
+        anomaly_count = detect_anomalies(db)
+        stats.rows += anomaly_count
+    if progress:
+        progress.stage("publish")
+    with profiler.stage("publish"):
+        version = data_version.publish(db)
+
+    result = {
+        "risk_zones": count,
+        "rollup_cells": cell_count,
+        "anomaly_events": anomaly_count,
+        "version": version,
+    }
+    if settings.bundle_dir:
+        if progress:
+            progress.stage("bundle")
+        with profiler.stage("bundle") as stats:
+            manifest = export_bundle(db)
+            stats.rows += sum(manifest["tables"].values())
+        result["bundle"] = manifest["file"]
+    return result
+
 def main():
+    parser = argparse.ArgumentParser(description="Recompute risk zones, rollups and anomaly events")
+    parser.add_argument("--profile", action="store_true", help="Also capture cProfile stats and collapsed stacks for the run")
+    parser.add_argument("--report", type=Path, help="Run report path (default PIPELINE_REPORT_DIR/recompute-<timestamp>.json)")
+    args = parser.parse_args()
+
     logger.info("Starting enhanced risk zone computation...")
 
+    profiler.start("recompute", profile=args.profile)
     init_db()
     db = SessionLocal()
+    status, result, error = "failed", None, None
 
     try:
-        count = compute_risk_zones(db)
+        result = recompute(db)
+        status = "succeeded"
 
         logger.info("=" * 60)
         logger.info("Risk zone computation complete!")
-        logger.info(f"Total risk zones: {count}")
+        logger.info(f"Total risk zones: {result['risk_zones']}")
+        logger.info(f"Rollup cells: {result['rollup_cells']}")
+        logger.info(f"Anomaly events: {result['anomaly_events']}")
+        logger.info(f"Published data version: {result['version']}")
+        if "bundle" in result:
+            logger.info(f"Serving bundle: {result['bundle']}")
         logger.info("=" * 60)
 
     except Exception as e:
+        error = str(e)
         logger.error(f"Error during computation: {e}", exc_info=True)
         db.rollback()
     finally:
         db.close()
+        report = profiler.finish(status, result, error)
+        profiler.write(report, args.report)
+        logger.info("Stage timings:\n" + profiler.summary(report))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,159 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+import logging
+
+from database import SessionLocal, init_db
+from models.biometric import BiometricData
+from models.demographic import DemographicData
+from models.enrolment import EnrolmentData
+from models.rollup import RollupCell
+from services.privacy_enforcer import privacy_enforcer
+from services.dimensions import dimensions
+from config import get_settings
+
+settings = get_settings()
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+AGE_BUCKETS = ["0_5", "5_17", "adult"]
+MAX_SUPPRESSION_PASSES = 5
+
+DATASETS = {
+    "biometric": (BiometricData, [BiometricData.bio_age_0_5, BiometricData.bio_age_5_17, BiometricData.bio_age_17_plus]),
+    "demographic": (DemographicData, [DemographicData.demo_age_0_5, DemographicData.demo_age_5_17, DemographicData.demo_age_17_plus]),
+    "enrolment": (EnrolmentData, [EnrolmentData.age_0_5, EnrolmentData.age_5_17, EnrolmentData.age_18_greater]),
+}
+
+LEVELS = {
+    "national": [],
+    "state": ["state"],
+    "district": ["state", "district"],
+}
+
+def load_daily_district_totals(db: Session, model, age_columns) -> pd.DataFrame:
+    rows = db.query(
+        model.district_id,
+        model.date,
+        *[func.sum(column).label(bucket) for bucket, column in zip(AGE_BUCKETS, age_columns)]
+    ).group_by(model.district_id, model.date).all()
+
+    dimensions.load(db)
+    frame = pd.DataFrame(rows, columns=["district_id", "date", *AGE_BUCKETS])
+    frame.insert(0, "state", frame["district_id"].map(dimensions.district_state_names()))
+    frame.insert(1, "district", frame.pop("district_id").map(dimensions.district_names))
+    frame["date"] = pd.to_datetime(frame["date"])
+    frame[AGE_BUCKETS] = frame[AGE_BUCKETS].fillna(0).astype("int64")
+    frame["total"] = frame[AGE_BUCKETS].sum(axis=1)
+    return frame
+
+def assign_period(frame: pd.DataFrame, granularity: str) -> pd.Series:
+    if granularity == "day":
+        return frame["date"]
+    if granularity == "week":
+        return frame["date"] - pd.to_timedelta(frame["date"].dt.weekday, unit="D")
+    if granularity == "month":
+        return frame["date"].dt.to_period("M").dt.start_time
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+def build_cells(daily: pd.DataFrame, dataset: str, granularity: str) -> pd.DataFrame:
+    daily = daily.assign(period=assign_period(daily, granularity))
+    value_columns = AGE_BUCKETS + ["total"]
+    levels = []
+
+    for level, keys in LEVELS.items():
+        grouped = daily.groupby(keys + ["period"], as_index=False)[value_columns].sum()
+        cells = grouped.melt(id_vars=keys + ["period"], value_vars=value_columns, var_name="age_bucket", value_name="value")
+        for key in ("state", "district"):
+            if key not in cells:
+                cells[key] = None
+        cells["level"] = level
+        levels.append(cells)
+
+    cells = pd.concat(levels, ignore_index=True)
+    cells["granularity"] = granularity
+    cells["dataset"] = dataset
+    cells["period"] = cells["period"].dt.date
+    cells["is_suppressed"] = complementary_suppression(cells)
+    cells["value"] = cells["value"].astype(object).where(~cells["is_suppressed"], None)
+    return cells
+
+def complementary_suppression(cells: pd.DataFrame) -> np.ndarray:
+    values = cells["value"].to_numpy(dtype=float)
+    suppressed = privacy_enforcer.suppression_mask(values)
+
+    partitions = [
+        ((cells["level"] == "district").to_numpy(), ["period", "age_bucket", "state"]),
+        ((cells["level"] == "state").to_numpy(), ["period", "age_bucket"]),
+        ((cells["age_bucket"] != "total").to_numpy(), ["level", "state", "district", "period"]),
+    ]
+
+    for _ in range(MAX_SUPPRESSION_PASSES):
+        before = suppressed.copy()
+        for rows, keys in partitions:
+            groups = cells.loc[rows].groupby(keys, dropna=False, sort=False).ngroup().to_numpy()
+            suppressed[rows] = privacy_enforcer.complementary_suppression(values[rows], groups, suppressed[rows])
+        if np.array_equal(suppressed, before):
+            break
+
+    return suppressed
+
+def build_rollup_cube(db: Session, granularities=None) -> int:
+    granularities = granularities or [g.strip() for g in settings.rollup_granularities.split(",") if g.strip()]
+    logger.info(f"Building rollup cube ({', '.join(granularities)})...")
+
+    records = []
+    columns = ["granularity", "level", "period", "dataset", "age_bucket", "state", "district", "value", "is_suppressed"]
+
+    for dataset, (model, age_columns) in DATASETS.items():
+        daily = load_daily_district_totals(db, model, age_columns)
+        if daily.empty:
+            continue
+
+        for granularity in granularities:
+            cells = build_cells(daily, dataset, granularity)
+            records.extend(cells[columns].to_dict("records"))
+
+            suppressed = int(cells["is_suppressed"].sum())
+            logger.info(f"  {dataset}/{granularity}: {len(cells)} cells ({suppressed} suppressed)")
+
+    try:
+        db.query(RollupCell).delete()
+        for start in range(0, len(records), 10000):
+            db.bulk_insert_mappings(RollupCell, records[start:start + 10000])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    logger.info(f"Built {len(records)} rollup cells")
+    return len(records)
+
+def main():
+    logger.info("Starting rollup cube build...")
+
+    init_db()
+    db = SessionLocal()
+
+    try:
+        count = build_rollup_cube(db)
+
+        logger.info("=" * 60)
+        logger.info("Rollup cube build complete!")
+        logger.info(f"Total cells: {count}")
+        logger.info("=" * 60)
+
+    except Exception as e:
+        logger.error(f"Error during rollup build: {e}", exc_info=True)
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
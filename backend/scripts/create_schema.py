@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import logging
+import time
+
+from sqlalchemy import inspect
+
+import models
+from database import Base, get_write_engine, init_db
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    engine = get_write_engine()
+    existing = set(inspect(engine).get_table_names())
+    missing = sorted(set(Base.metadata.tables) - existing)
+
+    start = time.perf_counter()
+    init_db()
+
+    if missing:
+        logger.info(f"Created tables: {', '.join(missing)}")
+    logger.info(f"Schema verified ({len(Base.metadata.tables)} tables) in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
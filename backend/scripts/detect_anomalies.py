@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import logging
+
+from database import SessionLocal, init_db
+from services.anomaly_engine import detect_anomalies
+from services.data_version import data_version
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild per-pincode time-series anomaly events without recomputing risk zones")
+    parser.add_argument("--lookback-days", type=int, help="Days of history to scan (default ANOMALY_LOOKBACK_DAYS)")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+
+    try:
+        count = detect_anomalies(db, args.lookback_days)
+        version = data_version.publish(db)
+        logger.info(f"Wrote {count} anomaly events; published data version {version}")
+    except Exception as e:
+        logger.error(f"Error during anomaly detection: {e}", exc_info=True)
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
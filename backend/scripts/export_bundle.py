@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import logging
+
+from database import SessionLocal, init_db
+from services.serving_bundle import export_bundle
+from config import get_settings
+
+settings = get_settings()
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the served tables into a read-only SQLite bundle without recomputing")
+    parser.add_argument("--output", help="Bundle directory (default BUNDLE_DIR)")
+    parser.add_argument("--history-days", type=int, help="Days of biometric/demographic history to include (default BUNDLE_HISTORY_DAYS)")
+    args = parser.parse_args()
+
+    if not (args.output or settings.bundle_dir):
+        parser.error("set BUNDLE_DIR or pass --output")
+
+    init_db()
+    db = SessionLocal()
+
+    try:
+        manifest = export_bundle(db, args.output, args.history_days)
+        logger.info(f"Bundle {manifest['file']} for data version {manifest['data_version']}: {manifest['tables']}")
+    except Exception as e:
+        logger.error(f"Error during bundle export: {e}", exc_info=True)
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,11 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from typing import Any, Dict, List
 from sqlalchemy.orm import Session
 from tqdm import tqdm
 import logging
@@ -17,6 +19,11 @@ from models.demographic import DemographicData
 from models.enrolment import EnrolmentData
 from models.pincode_metadata import PincodeMetadata
 from services.pincode_service import pincode_service
+from services.partitions import PARTITIONED, ensure_partitions
+from services.dimensions import dimensions, format_pincode
+from services.pipeline_profiler import profiler
+from services.data_version import data_version
+from services.csv_sources import CsvSource, estimate_rows, find_sources, stream_chunks
 from config import get_settings
 
 settings = get_settings()
@@ -33,133 +40,90 @@ def parse_date(date_str: str):
             logger.warning(f"Could not parse date: {date_str}")
             return None
 
-def ingest_biometric_data(db: Session, data_path: Path):
-    logger.info("Ingesting biometric data...")
+BIOMETRIC_COLUMNS = {"bio_age_0_5": "bio_age_0_5", "bio_age_5_17": "bio_age_5_17", "bio_age_17_plus": "bio_age_17_"}
+DEMOGRAPHIC_COLUMNS = {"demo_age_0_5": "demo_age_0_5", "demo_age_5_17": "demo_age_5_17", "demo_age_17_plus": "demo_age_17_"}
+ENROLMENT_COLUMNS = {"age_0_5": "age_0_5", "age_5_17": "age_5_17", "age_18_greater": "age_18_greater"}
 
-    bio_dir = data_path / "biometric" / "api_data_aadhar_biometric"
-    csv_files = list(bio_dir.glob("*.csv"))
+def prepare_chunk(db: Session, chunk: pd.DataFrame, columns: Dict[str, str], total_field: str) -> pd.DataFrame:
+    with profiler.stage("parse", rows=len(chunk)):
+        raw_dates = chunk['date'].astype(str)
+        unique_dates = raw_dates.unique()
+        dates = raw_dates.map(dict(zip(unique_dates, map(parse_date, unique_dates))))
+        pincodes = pd.to_numeric(chunk['pincode'], errors='coerce')
 
-    total_records = 0
+        valid = (dates.notna() & pincodes.notna()).to_numpy()
+        chunk = chunk[valid]
 
-    for csv_file in csv_files:
-        logger.info(f"Processing {csv_file.name}...")
-
-        for chunk in pd.read_csv(csv_file, chunksize=10000):
-            records = []
-
-            for _, row in chunk.iterrows():
-                date_val = parse_date(str(row['date']))
-                if not date_val:
-                    continue
-
-                bio_0_5 = int(row.get('bio_age_0_5', 0))
-                bio_5_17 = int(row.get('bio_age_5_17', 0))
-                bio_17_plus = int(row.get('bio_age_17_', 0))
-
-                record = BiometricData(
-                    date=date_val,
-                    state=str(row['state']),
-                    district=str(row['district']),
-                    pincode=str(row['pincode']).zfill(6),
-                    bio_age_0_5=bio_0_5,
-                    bio_age_5_17=bio_5_17,
-                    bio_age_17_plus=bio_17_plus,
-                    total_biometric=bio_0_5 + bio_5_17 + bio_17_plus
-                )
-                records.append(record)
-
-            db.bulk_save_objects(records)
-            db.commit()
-            total_records += len(records)
+    with profiler.stage("transform", rows=len(chunk)):
+        state_ids, district_ids = dimensions.encode(db, chunk['state'].astype(str), chunk['district'].astype(str))
 
-    logger.info(f"Ingested {total_records} biometric records")
-    return total_records
+        frame = pd.DataFrame({
+            'date': dates[valid],
+            'state_id': state_ids,
+            'district_id': district_ids,
+            'pincode': pincodes[valid].astype('int64'),
+        }, index=chunk.index)
 
-def ingest_demographic_data(db: Session, data_path: Path):
-    logger.info("Ingesting demographic data...")
+        for field, source in columns.items():
+            frame[field] = pd.to_numeric(chunk[source], errors='coerce').fillna(0).astype('int64') if source in chunk else 0
+        frame[total_field] = frame[list(columns)].sum(axis=1)
 
-    demo_dir = data_path / "demographic" / "api_data_aadhar_demographic"
-    csv_files = list(demo_dir.glob("*.csv"))
+    return frame
 
+def ingest_chunks(db: Session, sources: List[CsvSource], model, columns: Dict[str, str], total_field: str, progress=None) -> int:
     total_records = 0
 
-    for csv_file in csv_files:
-        logger.info(f"Processing {csv_file.name}...")
-
-        for chunk in pd.read_csv(csv_file, chunksize=10000):
-            records = []
-
-            for _, row in chunk.iterrows():
-                date_val = parse_date(str(row['date']))
-                if not date_val:
-                    continue
-
-                demo_0_5 = int(row.get('demo_age_0_5', 0))
-                demo_5_17 = int(row.get('demo_age_5_17', 0))
-                demo_17_plus = int(row.get('demo_age_17_', 0))
-
-                record = DemographicData(
-                    date=date_val,
-                    state=str(row['state']),
-                    district=str(row['district']),
-                    pincode=str(row['pincode']).zfill(6),
-                    demo_age_0_5=demo_0_5,
-                    demo_age_5_17=demo_5_17,
-                    demo_age_17_plus=demo_17_plus,
-                    total_demographic=demo_0_5 + demo_5_17 + demo_17_plus
-                )
-                records.append(record)
-
-            db.bulk_save_objects(records)
-            db.commit()
-            total_records += len(records)
+    try:
+        db.query(model).delete(synchronize_session=False)
+        for chunk in profiler.timed("read", stream_chunks(sources)):
+            frame = prepare_chunk(db, chunk, columns, total_field)
+
+            with profiler.stage("insert", rows=len(frame)):
+                if PARTITIONED and len(frame):
+                    ensure_partitions(db.connection(), model.__tablename__, set(frame['date']))
+                db.bulk_insert_mappings(model, frame.to_dict('records'))
+            total_records += len(frame)
+            if progress:
+                progress.advance(len(chunk))
+        db.commit()
+    except Exception:
+        db.rollback()
+        dimensions.invalidate()
+        raise
 
-    logger.info(f"Ingested {total_records} demographic records")
     return total_records
 
-def ingest_enrolment_data(db: Session, data_path: Path):
-    logger.info("Ingesting enrolment data...")
+def ingest_biometric_data(db: Session, sources: List[CsvSource], progress=None):
+    logger.info(f"Ingesting biometric data from {len(sources)} files...")
 
-    enrol_dir = data_path / "enrolment" / "api_data_aadhar_enrolment"
-    csv_files = list(enrol_dir.glob("*.csv"))
+    if progress:
+        progress.stage("biometric", estimate_rows(sources))
+    total_records = ingest_chunks(db, sources, BiometricData, BIOMETRIC_COLUMNS, "total_biometric", progress)
 
-    total_records = 0
+    logger.info(f"Ingested {total_records} biometric records")
+    return total_records
 
-    for csv_file in csv_files:
-        logger.info(f"Processing {csv_file.name}...")
-
-        for chunk in pd.read_csv(csv_file, chunksize=10000):
-            records = []
-
-            for _, row in chunk.iterrows():
-                date_val = parse_date(str(row['date']))
-                if not date_val:
-                    continue
-
-                age_0_5 = int(row.get('age_0_5', 0))
-                age_5_17 = int(row.get('age_5_17', 0))
-                age_18_plus = int(row.get('age_18_greater', 0))
-
-                record = EnrolmentData(
-                    date=date_val,
-                    state=str(row['state']),
-                    district=str(row['district']),
-                    pincode=str(row['pincode']).zfill(6),
-                    age_0_5=age_0_5,
-                    age_5_17=age_5_17,
-                    age_18_greater=age_18_plus,
-                    total_enrolment=age_0_5 + age_5_17 + age_18_plus
-                )
-                records.append(record)
-
-            db.bulk_save_objects(records)
-            db.commit()
-            total_records += len(records)
+def ingest_demographic_data(db: Session, sources: List[CsvSource], progress=None):
+    logger.info(f"Ingesting demographic data from {len(sources)} files...")
+
+    if progress:
+        progress.stage("demographic", estimate_rows(sources))
+    total_records = ingest_chunks(db, sources, DemographicData, DEMOGRAPHIC_COLUMNS, "total_demographic", progress)
+
+    logger.info(f"Ingested {total_records} demographic records")
+    return total_records
+
+def ingest_enrolment_data(db: Session, sources: List[CsvSource], progress=None):
+    logger.info(f"Ingesting enrolment data from {len(sources)} files...")
+
+    if progress:
+        progress.stage("enrolment", estimate_rows(sources))
+    total_records = ingest_chunks(db, sources, EnrolmentData, ENROLMENT_COLUMNS, "total_enrolment", progress)
 
     logger.info(f"Ingested {total_records} enrolment records")
     return total_records
 
-def enrich_pincodes(db: Session):
+def enrich_pincodes(db: Session, progress=None):
     logger.info("Enriching pincodes with location data...")
 
     from sqlalchemy import select, union_all
@@ -172,62 +136,90 @@ def enrich_pincodes(db: Session):
     unique_pincodes = db.execute(select(all_pincodes_query.c.pincode).distinct()).scalars().all()
 
     logger.info(f"Found {len(unique_pincodes)} unique pincodes")
+    if progress:
+        progress.stage("enrich", len(unique_pincodes))
 
     enriched_count = 0
 
-    for pincode in tqdm(unique_pincodes, desc="Enriching pincodes"):
-        existing = db.query(PincodeMetadata).filter(PincodeMetadata.pincode == pincode).first()
-        if existing:
-            continue
+    with profiler.stage("enrich", rows=len(unique_pincodes)):
+        for pincode in tqdm(map(format_pincode, unique_pincodes), total=len(unique_pincodes), desc="Enriching pincodes"):
+            if progress:
+                progress.advance()
+            existing = db.query(PincodeMetadata).filter(PincodeMetadata.pincode == pincode).first()
+            if existing:
+                continue
 
-        pincode_info = pincode_service.get_pincode_info_sync(pincode)
+            pincode_info = pincode_service.get_pincode_info_sync(pincode)
 
-        if pincode_info:
-            metadata = PincodeMetadata(**pincode_info)
-            db.add(metadata)
-            enriched_count += 1
+            if pincode_info:
+                metadata = PincodeMetadata(**pincode_info)
+                db.add(metadata)
+                enriched_count += 1
 
-            if enriched_count % 100 == 0:
-                db.commit()
+                if enriched_count % 100 == 0:
+                    db.commit()
 
-    db.commit()
+        db.commit()
     logger.info(f"Enriched {enriched_count} pincodes")
+    if enriched_count:
+        logger.info(f"Published data version: {data_version.publish(db)}")
     return enriched_count
 
+def ingest_all(db: Session, data_path: Path, progress=None) -> Dict[str, Any]:
+    sources = find_sources(data_path)
+    counts = {
+        "biometric": ingest_biometric_data(db, sources["biometric"], progress),
+        "demographic": ingest_demographic_data(db, sources["demographic"], progress),
+        "enrolment": ingest_enrolment_data(db, sources["enrolment"], progress),
+    }
+    counts["version"] = data_version.publish(db)
+    return counts
+
 def main():
+    parser = argparse.ArgumentParser(description="Load the Aadhaar CSV extracts and enrich their pincodes")
+    parser.add_argument("--profile", action="store_true", help="Also capture cProfile stats and collapsed stacks for the run")
+    parser.add_argument("--report", type=Path, help="Run report path (default PIPELINE_REPORT_DIR/ingest-<timestamp>.json)")
+    args = parser.parse_args()
+
     logger.info("Starting data ingestion...")
     logger.info(f"Data path: {settings.data_path}")
 
+    profiler.start("ingest", profile=args.profile)
     init_db()
 
     db = SessionLocal()
+    status, result, error = "failed", None, None
 
     try:
         data_path = Path(settings.data_path)
 
         if not data_path.exists():
-            logger.error(f"Data path does not exist: {data_path}")
+            error = f"Data path does not exist: {data_path}"
+            logger.error(error)
             return
 
-        bio_count = ingest_biometric_data(db, data_path)
-        demo_count = ingest_demographic_data(db, data_path)
-        enrol_count = ingest_enrolment_data(db, data_path)
+        counts = ingest_all(db, data_path)
 
         pincode_count = enrich_pincodes(db)
+        status, result = "succeeded", {**counts, "enriched": pincode_count}
 
         logger.info("=" * 60)
         logger.info("Data ingestion complete!")
-        logger.info(f"Biometric records: {bio_count}")
-        logger.info(f"Demographic records: {demo_count}")
-        logger.info(f"Enrolment records: {enrol_count}")
+        logger.info(f"Biometric records: {counts['biometric']}")
+        logger.info(f"Demographic records: {counts['demographic']}")
+        logger.info(f"Enrolment records: {counts['enrolment']}")
         logger.info(f"Pincodes enriched: {pincode_count}")
         logger.info("=" * 60)
 
     except Exception as e:
+        error = str(e)
         logger.error(f"Error during ingestion: {e}", exc_info=True)
         db.rollback()
     finally:
         db.close()
+        report = profiler.finish(status, result, error)
+        profiler.write(report, args.report)
+        logger.info("Stage timings:\n" + profiler.summary(report))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,319 @@
+import sys
+import os
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import json
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+DEFAULT_MIX = "stats=10,risk_zones=15,pincode=35,search=25,migration=15"
+PINCODE_PATHS = ("/api/risk-zones/{pincode}", "/api/biometric-risk?pincode={pincode}",
+                 "/api/census/calibrated?pincode={pincode}", "/api/anomalies/{pincode}")
+RISK_ZONE_PATHS = ("/api/risk-zones?limit=100", "/api/risk-zones?risk_level=critical&limit=100",
+                   "/api/risk-zones?state={state}&limit=100", "/api/anomalies?limit=50")
+SERVER_METRICS = {
+    "requests": "pravah_request_duration_seconds_count",
+    "request_seconds": "pravah_request_duration_seconds_sum",
+    "db_statements": "pravah_db_statements_total",
+    "db_seconds": "pravah_db_seconds_total",
+    "slow_queries": "pravah_db_slow_queries_total",
+    "pool_timeouts": "pravah_db_pool_timeouts_total",
+    "rate_limited": "pravah_rate_limited_requests",
+}
+METRIC_LINE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(\S+)$")
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name and weight:
+            mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"Unknown traffic classes: {', '.join(sorted(unknown))}")
+    return mix
+
+def load_locations(limit: int) -> list:
+    from database import SessionLocal
+    from models.risk_zones import RiskZone
+
+    db = SessionLocal()
+    try:
+        return db.query(RiskZone.pincode, RiskZone.district, RiskZone.state).order_by(
+            RiskZone.population.desc(), RiskZone.pincode
+        ).limit(limit).all()
+    finally:
+        db.close()
+
+def cumulative_weights(weights) -> np.ndarray:
+    cdf = np.cumsum(np.asarray(weights, dtype=float))
+    return cdf / cdf[-1]
+
+class TrafficGenerator:
+
+    def __init__(self, locations: list, mix: dict, zipf_exponent: float, seed: int):
+        self.locations = locations
+        self.rng = np.random.default_rng(seed)
+        ranks = np.arange(1, len(locations) + 1, dtype=float)
+        self.location_cdf = cumulative_weights(ranks ** -zipf_exponent)
+        self.classes = list(mix)
+        self.class_cdf = cumulative_weights([mix[name] for name in self.classes])
+
+    def location(self):
+        return self.locations[self.draw(self.location_cdf)]
+
+    def draw(self, cdf: np.ndarray) -> int:
+        return min(int(np.searchsorted(cdf, self.rng.random(), side="right")), len(cdf) - 1)
+
+    def pick(self, choices):
+        return choices[self.rng.integers(len(choices))]
+
+    def next_request(self):
+        name = self.classes[self.draw(self.class_cdf)]
+        return name, SCENARIOS[name](self)
+
+def stats_request(traffic: TrafficGenerator) -> str:
+    return "/api/stats/national"
+
+def risk_zones_request(traffic: TrafficGenerator) -> str:
+    return traffic.pick(RISK_ZONE_PATHS).format(state=traffic.location().state)
+
+def pincode_request(traffic: TrafficGenerator) -> str:
+    return traffic.pick(PINCODE_PATHS).format(pincode=traffic.location().pincode)
+
+def search_request(traffic: TrafficGenerator) -> str:
+    location = traffic.location()
+    term = traffic.pick((location.pincode, location.district, location.state))
+    typed = term[:traffic.rng.integers(2, len(term) + 1)] if len(term) > 2 else term
+    return f"/api/search?query={typed}&limit=10"
+
+def migration_request(traffic: TrafficGenerator) -> str:
+    pincode = traffic.location().pincode
+    bucket = traffic.pick(("day", "week", "month"))
+    return f"/api/migration/series?pincode={pincode}&bucket={bucket}"
+
+SCENARIOS = {
+    "stats": stats_request,
+    "risk_zones": risk_zones_request,
+    "pincode": pincode_request,
+    "search": search_request,
+    "migration": migration_request,
+}
+
+def parse_metrics(text: str) -> dict:
+    totals = defaultdict(float)
+    names = {metric: key for key, metric in SERVER_METRICS.items()}
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match and match.group(1) in names:
+            totals[names[match.group(1)]] += float(match.group(3))
+        elif match and match.group(1) == "pravah_cache" and 'stat="hit_ratio"' in (match.group(2) or ""):
+            cache = re.search(r'cache="([^"]*)"', match.group(2)).group(1)
+            totals[f"cache_hit_ratio.{cache}"] = float(match.group(3))
+    return dict(totals)
+
+async def scrape_metrics(client: httpx.AsyncClient) -> dict:
+    try:
+        response = await client.get("/metrics")
+        return parse_metrics(response.text) if response.status_code == 200 else {}
+    except httpx.HTTPError:
+        return {}
+
+def percentiles(latencies) -> dict:
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "p99_ms": round(p99, 2), "max_ms": round(values.max(), 2)}
+
+def summarize(results: list, elapsed: float) -> dict:
+    groups = defaultdict(list)
+    for result in results:
+        groups[result[0]].append(result)
+        groups["all"].append(result)
+
+    summary = {}
+    for name, rows in sorted(groups.items()):
+        latencies = [latency for _, _, latency in rows]
+        statuses = [status for _, status, _ in rows]
+        errors = sum(1 for status in statuses if status == 0 or status >= 400)
+        summary[name] = {
+            "requests": len(rows),
+            "rps": round(len(rows) / elapsed, 2),
+            "errors": errors,
+            "error_rate": round(errors / len(rows), 4),
+            "rate_limited": statuses.count(429),
+            **percentiles(latencies),
+        }
+    return summary
+
+async def run_load(client: httpx.AsyncClient, traffic: TrafficGenerator, rps: float, duration: float,
+                   warmup: float, max_in_flight: int) -> dict:
+    results = []
+    late_starts = 0
+    in_flight = asyncio.Semaphore(max_in_flight)
+    loop = asyncio.get_running_loop()
+
+    async def issue(name: str, path: str, scheduled: float, record: bool):
+        async with in_flight:
+            try:
+                status = (await client.get(path)).status_code
+            except httpx.HTTPError:
+                status = 0
+        if record:
+            results.append((name, status, loop.time() - scheduled))
+
+    tasks = set()
+    start = loop.time()
+    measure_from = start + warmup
+    total = int((warmup + duration) * rps)
+    before = None
+
+    for i in range(total):
+        scheduled = start + i / rps
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        elif delay < -0.05:
+            late_starts += 1
+
+        if before is None and scheduled >= measure_from:
+            before = await scrape_metrics(client)
+
+        name, path = traffic.next_request()
+        task = asyncio.create_task(issue(name, path, scheduled, scheduled >= measure_from))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - measure_from
+    after = await scrape_metrics(client)
+
+    server = {}
+    for key, value in after.items():
+        server[key] = round(value if key.startswith("cache_hit_ratio") else value - (before or {}).get(key, 0.0), 4)
+    if server.get("requests"):
+        server["db_statements_per_request"] = round(server.get("db_statements", 0) / server["requests"], 2)
+        server["mean_server_ms"] = round(server.get("request_seconds", 0) * 1000 / server["requests"], 2)
+
+    return {
+        "endpoints": summarize(results, elapsed),
+        "server": server,
+        "late_starts": late_starts,
+        "elapsed_seconds": round(elapsed, 2),
+    }
+
+def compare_reports(baseline: dict, current: dict, threshold: float, min_delta_ms: float) -> list:
+    regressions = []
+    print(f"\n{'class':12} {'metric':11} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, now in current["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if not before:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "error_rate"):
+            old, new = before.get(metric), now.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new / old) if old else (float("inf") if new else 1.0)
+            print(f"{name:12} {metric:11} {old:>10} {new:>10} {change:>7.2f}x")
+            if metric == "error_rate":
+                if new > old + 0.01:
+                    regressions.append(f"{name} error rate {old:.2%} -> {new:.2%}")
+            elif change > threshold and new - old > min_delta_ms:
+                regressions.append(f"{name} {metric} {old} -> {new} ms ({change:.2f}x)")
+    return regressions
+
+def print_report(report: dict):
+    config = report["config"]
+    print(f"\n{config['target']}: {config['rps']} rps for {config['duration']}s, mix {config['mix']}")
+    print(f"{'class':12} {'requests':>8} {'rps':>8} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, row in report["endpoints"].items():
+        print(
+            f"{name:12} {row['requests']:>8} {row['rps']:>8} {row['error_rate']:>7.2%} "
+            f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8} {row['max_ms']:>8}"
+        )
+    if report["late_starts"]:
+        print(f"{report['late_starts']} requests started more than 50 ms late; the client could not sustain the target rate")
+    if report["server"]:
+        print("\nserver:", json.dumps(report["server"], indent=2))
+
+async def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    traffic = TrafficGenerator(load_locations(args.pincodes), mix, args.zipf, args.seed)
+    if not traffic.locations:
+        raise SystemExit("No risk zones found; run scripts/compute_risk_zones.py first")
+
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    timeout = httpx.Timeout(args.timeout)
+
+    if args.in_process:
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", limits=limits, timeout=timeout) as client:
+                report = await run_load(client, traffic, args.rps, args.duration, args.warmup, args.max_in_flight)
+    else:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout) as client:
+            report = await run_load(client, traffic, args.rps, args.duration, args.warmup, args.max_in_flight)
+
+    report["config"] = {
+        "target": "in-process" if args.in_process else args.url,
+        "rps": args.rps,
+        "duration": args.duration,
+        "mix": mix,
+        "zipf": args.zipf,
+        "pincodes": len(traffic.locations),
+        "seed": args.seed,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+    }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a realistic traffic mix against the API at a target request rate")
+    parser.add_argument("--url", default="http://localhost:8000", help="Base URL of a running API")
+    parser.add_argument("--in-process", action="store_true", help="Serve the app in this process instead of calling --url")
+    parser.add_argument("--rps", type=float, default=50.0, help="Target requests per second (open loop)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of traffic excluded from the report")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Traffic weights per class: " + ", ".join(SCENARIOS))
+    parser.add_argument("--pincodes", type=int, default=20000, help="Most populous pincodes to draw lookups from")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of pincode popularity")
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    parser.add_argument("--compare", type=Path, help="Baseline report to compare against")
+    parser.add_argument("--fail-threshold", type=float, default=1.25, help="Fail when a percentile grows by this factor")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Ignore percentile increases smaller than this")
+    args = parser.parse_args()
+
+    if args.in_process:
+        os.environ.setdefault("ENABLE_RATE_LIMIT", "false")
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nReport written to {args.output}")
+
+    if args.compare:
+        regressions = compare_reports(json.loads(args.compare.read_text()), report, args.fail_threshold, args.min_delta_ms)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        return not regressions
+
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import logging
+from datetime import date
+
+from database import SessionLocal, init_db
+from services.data_version import data_version
+from services.partitions import FACT_TABLES, detach_partition, ensure_partitions, is_partitioned, list_partitions, next_month
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def parse_month(value: str) -> date:
+    return date.fromisoformat(f"{value}-01")
+
+def months_between(first: date, last: date):
+    month = first
+    while month <= last:
+        yield month
+        month = next_month(month)
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage monthly partitions of the fact tables (PostgreSQL)")
+    parser.add_argument("--table", dest="tables", action="append", choices=FACT_TABLES, help="Repeat to select tables (default: all)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="Show partitions and estimated row counts")
+
+    create = commands.add_parser("create", help="Create partitions for a month range ahead of ingest")
+    create.add_argument("first", help="YYYY-MM")
+    create.add_argument("last", help="YYYY-MM")
+
+    detach = commands.add_parser("detach", help="Detach a month (metadata only), then optionally drop or archive it")
+    detach.add_argument("month", help="YYYY-MM")
+    action = detach.add_mutually_exclusive_group()
+    action.add_argument("--drop", action="store_true", help="Drop the detached partition")
+    action.add_argument("--archive-schema", help="Move the detached partition into this schema")
+
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+
+    try:
+        connection = db.connection()
+        tables = [table for table in args.tables or FACT_TABLES if is_partitioned(connection, table)]
+        if not tables:
+            logger.error("No partitioned fact tables found; set PARTITION_FACT_TABLES=true on a fresh PostgreSQL schema")
+            return
+
+        for table in tables:
+            if args.command == "list":
+                for name, bound, rows in list_partitions(connection, table):
+                    logger.info(f"{name:<36} {bound:<64} ~{max(rows, 0)} rows")
+            elif args.command == "create":
+                months = list(months_between(parse_month(args.first), parse_month(args.last)))
+                logger.info(f"{table}: ensured {len(ensure_partitions(connection, table, months))} partitions")
+            elif args.command == "detach":
+                name = detach_partition(connection, table, parse_month(args.month), args.drop, args.archive_schema)
+                outcome = "dropped" if args.drop else f"moved to {args.archive_schema}" if args.archive_schema else "kept as a standalone table"
+                logger.info(f"{table}: detached {name} ({outcome})")
+
+        db.commit()
+
+        if args.command == "detach":
+            logger.info(f"Published data version: {data_version.publish(db)}")
+
+    except Exception as e:
+        logger.error(f"Partition command failed: {e}", exc_info=True)
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
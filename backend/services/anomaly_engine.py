@@ -0,0 +1,183 @@
+import logging
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from models.anomaly_event import AnomalyEvent
+from models.biometric import BiometricData
+from models.demographic import DemographicData
+from models.enrolment import EnrolmentData
+from services.dimensions import format_pincode
+from services.privacy_enforcer import privacy_enforcer
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+MAD_SCALE = 1.4826
+WEEKDAY_PRIOR_DAYS = 7.0
+CHUNK_ROWS = 2048
+
+DATASET_TOTALS = {
+    "biometric": BiometricData.total_biometric,
+    "demographic": DemographicData.total_demographic,
+    "enrolment": EnrolmentData.total_enrolment,
+}
+
+def daily_matrix(db: Session, total_column, start: date, end: date) -> Tuple[np.ndarray, np.ndarray]:
+    table = total_column.table
+    result = db.execute(
+        select(table.c.pincode, table.c.date, func.sum(total_column))
+        .where(table.c.date.between(start, end))
+        .group_by(table.c.pincode, table.c.date)
+    )
+
+    pincodes, days, values = [], [], []
+    for rows in result.partitions(100000):
+        pincode_column, day_column, value_column = zip(*rows)
+        pincodes.append(np.fromiter(pincode_column, dtype=np.int64, count=len(rows)))
+        days.append(np.array(day_column, dtype="datetime64[D]"))
+        values.append(np.array(value_column, dtype=np.float64))
+
+    width = (end - start).days + 1
+    if not pincodes:
+        return np.empty(0, dtype=np.int64), np.full((0, width), np.nan)
+
+    keys, rows = np.unique(np.concatenate(pincodes), return_inverse=True)
+    columns = (np.concatenate(days) - np.datetime64(start, "D")).astype(np.int64)
+    matrix = np.full((len(keys), width), np.nan)
+    matrix[rows, columns] = np.concatenate(values)
+    return keys, matrix
+
+def weekday_factors(matrix: np.ndarray, first_day: date) -> np.ndarray:
+    weekdays = (first_day.weekday() + np.arange(matrix.shape[1])) % 7
+    present = ~np.isnan(matrix)
+    filled = np.where(present, matrix, 0.0)
+    overall = filled.sum(axis=1) / np.maximum(present.sum(axis=1), 1)
+
+    factors = np.ones((len(matrix), 7))
+    for weekday in range(7):
+        columns = weekdays == weekday
+        shrunk = (filled[:, columns].sum(axis=1) + WEEKDAY_PRIOR_DAYS * overall) / (present[:, columns].sum(axis=1) + WEEKDAY_PRIOR_DAYS)
+        np.divide(shrunk, overall, out=factors[:, weekday], where=overall > 0)
+
+    return factors[:, weekdays]
+
+def sorted_nanmedian(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    low = np.maximum((counts - 1) // 2, 0)[..., None]
+    high = np.maximum(counts // 2, 0)[..., None]
+    median = (np.take_along_axis(values, low, axis=-1) + np.take_along_axis(values, high, axis=-1))[..., 0] / 2
+    return np.where(counts > 0, median, np.nan)
+
+def rolling_median_mad(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rows, days = values.shape
+    median = np.full((rows, days), np.nan)
+    mad = np.full((rows, days), np.nan)
+    counts = np.zeros((rows, days), dtype=np.int64)
+    if days <= window:
+        return median, mad, counts
+
+    values = values.astype(np.float32)
+    for start in range(0, rows, CHUNK_ROWS):
+        block = slice(start, start + CHUNK_ROWS)
+        windows = np.ascontiguousarray(sliding_window_view(values[block, :-1], window, axis=1))
+        windows.sort(axis=2)
+        observed = np.count_nonzero(~np.isnan(windows), axis=2)
+        center = sorted_nanmedian(windows, observed)
+        deviations = np.abs(windows - center[..., None])
+        deviations.sort(axis=2)
+
+        median[block, window:] = center
+        mad[block, window:] = sorted_nanmedian(deviations, observed)
+        counts[block, window:] = observed
+
+    return median, mad, counts
+
+def ewma_scores(values: np.ndarray, alpha: float) -> np.ndarray:
+    rows, days = values.shape
+    scores = np.full((rows, days), np.nan)
+    mean = np.full(rows, np.nan)
+    variance = np.zeros(rows)
+
+    for day in range(days):
+        current = values[:, day]
+        present = ~np.isnan(current)
+        seen = present & ~np.isnan(mean)
+        residual = np.where(seen, current - np.nan_to_num(mean), 0.0)
+
+        scores[seen, day] = residual[seen] / np.sqrt(variance[seen] + np.abs(mean[seen]) + 1.0)
+        mean = np.where(present & ~seen, current, mean + alpha * residual)
+        variance = np.where(seen, (1 - alpha) * (variance + alpha * residual ** 2), variance)
+
+    return scores
+
+def detect_events(dataset: str, keys: np.ndarray, matrix: np.ndarray, first_day: date, window: int) -> List[Dict[str, Any]]:
+    seasonal = weekday_factors(matrix, first_day)
+    adjusted = matrix / seasonal
+
+    median, mad, counts = rolling_median_mad(adjusted, window)
+    ewma = ewma_scores(adjusted, settings.anomaly_ewma_alpha)
+    expected = median * seasonal
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scale = np.maximum(MAD_SCALE * mad, np.sqrt(np.maximum(median, 0)) + 1.0)
+        robust = (adjusted - median) / scale
+        flagged = (
+            (np.abs(robust) >= settings.anomaly_threshold)
+            & (np.abs(ewma) >= settings.anomaly_ewma_threshold)
+            & (np.sign(robust) == np.sign(ewma))
+            & (counts >= settings.anomaly_min_observations)
+            & (expected >= privacy_enforcer.minimum_cell_size)
+        )
+    flagged[:, :window] = False
+
+    rows, columns = np.nonzero(flagged)
+    return [
+        {
+            "pincode": format_pincode(keys[row]),
+            "date": first_day + timedelta(days=int(column)),
+            "dataset": dataset,
+            "anomaly_type": f"{dataset}_{'spike' if robust[row, column] > 0 else 'drop'}",
+            "observed": int(matrix[row, column]),
+            "expected": round(float(expected[row, column]), 2),
+            "score": round(float(abs(robust[row, column])), 3),
+            "ewma_score": round(float(abs(ewma[row, column])), 3),
+        }
+        for row, column in zip(rows.tolist(), columns.tolist())
+    ]
+
+def detect_anomalies(db: Session, lookback_days: int = None) -> int:
+    lookback_days = lookback_days or settings.anomaly_lookback_days
+    window = settings.anomaly_window_days
+    events = []
+
+    for dataset, total_column in DATASET_TOTALS.items():
+        end = db.query(func.max(total_column.table.c.date)).scalar()
+        if end is None:
+            continue
+
+        started = time.perf_counter()
+        first_day = end - timedelta(days=lookback_days + window - 1)
+        keys, matrix = daily_matrix(db, total_column, first_day, end)
+        loaded = time.perf_counter()
+        found = detect_events(dataset, keys, matrix, first_day, window)
+        events.extend(found)
+
+        logger.info(
+            f"{dataset}: {len(found)} anomalies in {matrix.shape[0]} pincodes x {matrix.shape[1]} days "
+            f"(load {loaded - started:.2f}s, detect {time.perf_counter() - loaded:.2f}s)"
+        )
+
+    try:
+        db.query(AnomalyEvent).delete()
+        db.bulk_insert_mappings(AnomalyEvent, events)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(events)
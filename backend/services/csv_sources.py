@@ -0,0 +1,181 @@
+import gzip
+import logging
+import queue
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from config import get_settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+DATASETS = ("biometric", "demographic", "enrolment")
+DATASET_PATTERN = re.compile(r"(biometric|demographic|enrolment)", re.IGNORECASE)
+ARCHIVE_SUFFIXES = (".zip", ".gz", ".zst")
+CHUNK_ROWS = 10000
+SAMPLE_BYTES = 1 << 20
+
+@dataclass(frozen=True)
+class CsvSource:
+    dataset: str
+    name: str
+    path: Path
+    member: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.path.name}:{self.member}" if self.member else self.path.name
+
+    @contextmanager
+    def open(self) -> Iterator[BinaryIO]:
+        suffix = self.path.suffix.lower()
+        if suffix == ".zip":
+            with zipfile.ZipFile(self.path) as archive, archive.open(self.member) as stream:
+                yield stream
+        elif suffix == ".gz":
+            with gzip.open(self.path, "rb") as stream:
+                yield stream
+        elif suffix == ".zst":
+            if zstandard is None:
+                raise RuntimeError(f"Reading {self.path.name} needs the zstandard package (pip install zstandard)")
+            with open(self.path, "rb") as raw, zstandard.ZstdDecompressor().stream_reader(raw) as stream:
+                yield stream
+        else:
+            with open(self.path, "rb") as stream:
+                yield stream
+
+    def size(self) -> Optional[int]:
+        suffix = self.path.suffix.lower()
+        if suffix == ".zip":
+            with zipfile.ZipFile(self.path) as archive:
+                return archive.getinfo(self.member).file_size
+        if suffix == ".gz":
+            with open(self.path, "rb") as raw:
+                raw.seek(-4, os.SEEK_END)
+                return int.from_bytes(raw.read(4), "little")
+        if suffix == ".zst":
+            if zstandard is None:
+                return None
+            with open(self.path, "rb") as raw:
+                size = zstandard.get_frame_parameters(raw.read(18)).content_size
+            return size if size > 0 else None
+        return self.path.stat().st_size
+
+def detect_dataset(name: str) -> Optional[str]:
+    found = {match.lower() for match in DATASET_PATTERN.findall(name)}
+    return found.pop() if len(found) == 1 else None
+
+def archive_sources(path: Path) -> List[CsvSource]:
+    if path.suffix.lower() == ".zip":
+        with zipfile.ZipFile(path) as archive:
+            members = [info.filename for info in archive.infolist() if not info.is_dir() and info.filename.lower().endswith(".csv")]
+    else:
+        members = [None] if path.stem.lower().endswith(".csv") else []
+
+    sources = []
+    for member in members:
+        name = Path(member or path.stem).name
+        dataset = detect_dataset(member or path.name)
+        if dataset is None:
+            logger.warning(f"Skipping {path.name}{':' + member if member else ''}: dataset not recognised from its name")
+            continue
+        sources.append(CsvSource(dataset, name, path, member))
+    return sources
+
+def find_sources(data_path: Path) -> Dict[str, List[CsvSource]]:
+    sources = {dataset: [] for dataset in DATASETS}
+    seen = set()
+
+    for dataset in DATASETS:
+        for csv_file in sorted((data_path / dataset / f"api_data_aadhar_{dataset}").glob("*.csv")):
+            sources[dataset].append(CsvSource(dataset, csv_file.name, csv_file))
+            seen.add((dataset, csv_file.name))
+
+    archives = sorted(path for path in data_path.rglob("*") if path.is_file() and path.suffix.lower() in ARCHIVE_SUFFIXES)
+    for path in archives:
+        for source in archive_sources(path):
+            if (source.dataset, source.name) in seen:
+                logger.info(f"Skipping {source.label}: {source.name} was already found")
+                continue
+            sources[source.dataset].append(source)
+            seen.add((source.dataset, source.name))
+
+    return sources
+
+def estimate_rows(sources: List[CsvSource]) -> Optional[int]:
+    rows = 0
+    for source in sources:
+        with source.open() as stream:
+            sample = stream.read(SAMPLE_BYTES)
+            complete = not stream.read(1)
+        size = len(sample) if complete else source.size()
+        if size is None or not sample.count(b"\n"):
+            return None
+        rows += round(size * sample.count(b"\n") / len(sample)) - 1
+    return rows
+
+def stream_chunks(sources: List[CsvSource], workers: int = None) -> Iterator[pd.DataFrame]:
+    workers = max(1, min(workers or settings.ingest_workers, len(sources)))
+    if workers == 1:
+        for source in sources:
+            logger.info(f"Processing {source.label}...")
+            with source.open() as stream:
+                yield from pd.read_csv(stream, chunksize=CHUNK_ROWS)
+        return
+
+    chunks = queue.Queue(maxsize=settings.ingest_queue_chunks)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read(source: CsvSource):
+        try:
+            logger.info(f"Processing {source.label}...")
+            with source.open() as stream:
+                for chunk in pd.read_csv(stream, chunksize=CHUNK_ROWS):
+                    if not put(chunk):
+                        return
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
+
+    pool = ThreadPoolExecutor(workers, thread_name_prefix="ingest-read")
+    for source in sources:
+        pool.submit(read, source)
+
+    finished = 0
+    try:
+        while finished < len(sources):
+            item = chunks.get()
+            if item is done:
+                finished += 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
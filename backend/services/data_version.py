@@ -0,0 +1,77 @@
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from models.data_version import DataVersion
+from models.risk_zones import RiskZone
+
+settings = get_settings()
+
+class DataVersionTracker:
+
+    def __init__(self, ttl_seconds: float = None):
+        self.ttl_seconds = settings.data_version_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._version: Optional[str] = None
+        self._published_at: Optional[datetime] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _is_fresh(self) -> bool:
+        return self._version is not None and time.monotonic() - self._checked_at < self.ttl_seconds
+
+    def _refresh(self, db: Session):
+        if self._is_fresh():
+            return
+
+        with self._lock:
+            if not self._is_fresh():
+                self._version, self._published_at = self._load(db)
+                self._checked_at = time.monotonic()
+
+    def current(self, db: Session) -> str:
+        self._refresh(db)
+        return self._version
+
+    def published_at(self, db: Session) -> Optional[datetime]:
+        self._refresh(db)
+        return self._published_at
+
+    def refresh(self, db: Session) -> str:
+        with self._lock:
+            self._version, self._published_at = self._load(db)
+            self._checked_at = time.monotonic()
+        return self._version
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = 0.0
+
+    def publish(self, db: Session) -> str:
+        count = db.query(func.count(RiskZone.id)).scalar() or 0
+        now = datetime.now(timezone.utc)
+        version = f"{now.strftime('%Y%m%d%H%M%S')}-{secrets.token_hex(4)}"
+
+        db.add(DataVersion(version=version, risk_zone_count=count, published_at=now))
+        db.commit()
+        self.invalidate()
+
+        return version
+
+    def _load(self, db: Session):
+        published = db.query(DataVersion.version, DataVersion.published_at).order_by(
+            DataVersion.published_at.desc(), DataVersion.id.desc()
+        ).first()
+
+        if published:
+            return published.version, published.published_at
+
+        count, latest = db.query(func.count(RiskZone.id), func.max(RiskZone.created_at)).one()
+        stamp = latest.strftime("%Y%m%d%H%M%S") if latest else "0"
+        return f"{stamp}-{count}", latest
+
+data_version = DataVersionTracker()
@@ -0,0 +1,118 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models.dimensions import State, District
+
+def pincode_key(pincode) -> Optional[int]:
+    pincode = str(pincode).strip()
+    return int(pincode) if pincode.isdigit() else None
+
+def format_pincode(pincode: int) -> str:
+    return f"{int(pincode):06d}"
+
+def allocate_id(connection, table, **values) -> int:
+    match = and_(*(table.c[name] == value for name, value in values.items()))
+    allocated = connection.execute(select(table.c.id).where(match)).scalar()
+    if allocated is not None:
+        return allocated
+
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    if dialect is postgresql:
+        connection.exec_driver_sql(f"LOCK TABLE {table.name} IN SHARE ROW EXCLUSIVE MODE")
+    next_id = select(func.coalesce(func.max(table.c.id), 0) + 1).scalar_subquery()
+    connection.execute(dialect.insert(table).values(id=next_id, **values).on_conflict_do_nothing())
+    return connection.execute(select(table.c.id).where(match)).scalar_one()
+
+class DimensionLookup:
+
+    def __init__(self):
+        self.state_names: Dict[int, str] = {}
+        self.district_names: Dict[int, str] = {}
+        self.district_states: Dict[int, int] = {}
+        self._state_ids: Dict[str, int] = {}
+        self._district_ids: Dict[Tuple[int, str], int] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> "DimensionLookup":
+        states = db.query(State.id, State.name).all()
+        districts = db.query(District.id, District.state_id, District.name).all()
+
+        with self._lock:
+            self.state_names = {row.id: row.name for row in states}
+            self.district_names = {row.id: row.name for row in districts}
+            self.district_states = {row.id: row.state_id for row in districts}
+            self._state_ids = {row.name: row.id for row in states}
+            self._district_ids = {(row.state_id, row.name): row.id for row in districts}
+            self._loaded = True
+        return self
+
+    def ensure_loaded(self, db: Session) -> "DimensionLookup":
+        if not self._loaded:
+            self.load(db)
+        return self
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+
+    def state_name(self, state_id: int) -> Optional[str]:
+        return self.state_names.get(state_id)
+
+    def district_name(self, district_id: int) -> Optional[str]:
+        return self.district_names.get(district_id)
+
+    def district_state_names(self) -> Dict[int, str]:
+        return {district_id: self.state_names[state_id] for district_id, state_id in self.district_states.items()}
+
+    def _state_id(self, db: Session, name: str) -> int:
+        state_id = self._state_ids.get(name)
+        if state_id is None:
+            state_id = allocate_id(db.connection(), State.__table__, name=name)
+            self.state_names[state_id] = name
+            self._state_ids[name] = state_id
+        return state_id
+
+    def _district_id(self, db: Session, state_id: int, name: str) -> int:
+        district_id = self._district_ids.get((state_id, name))
+        if district_id is None:
+            district_id = allocate_id(db.connection(), District.__table__, state_id=state_id, name=name)
+            self.district_names[district_id] = name
+            self.district_states[district_id] = state_id
+            self._district_ids[(state_id, name)] = district_id
+        return district_id
+
+    def encode(self, db: Session, states, districts) -> Tuple[np.ndarray, np.ndarray]:
+        self.ensure_loaded(db)
+        states = np.asarray(states, dtype=str)
+        districts = np.asarray(districts, dtype=str)
+
+        with self._lock:
+            try:
+                return self._encode(db, states, districts)
+            except Exception:
+                self._loaded = False
+                raise
+
+    def _encode(self, db: Session, states: np.ndarray, districts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        state_values, state_codes = np.unique(states, return_inverse=True)
+        state_ids = np.array(
+            [self._state_id(db, name) for name in state_values.tolist()], dtype=np.int16
+        )[state_codes.ravel()]
+
+        district_values, district_codes = np.unique(districts, return_inverse=True)
+        pair_codes = state_ids.astype(np.int64) * len(district_values) + district_codes.ravel()
+        pair_values, pair_inverse = np.unique(pair_codes, return_inverse=True)
+        district_ids = np.array([
+            self._district_id(db, int(code // len(district_values)), district_values[code % len(district_values)])
+            for code in pair_values.tolist()
+        ], dtype=np.int16)[pair_inverse.ravel()]
+
+        return state_ids, district_ids
+
+dimensions = DimensionLookup()
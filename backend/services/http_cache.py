@@ -0,0 +1,70 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import get_db
+from services.data_version import data_version
+
+settings = get_settings()
+
+def cache_control_header() -> str:
+    return (
+        f"public, max-age={settings.http_cache_max_age}, "
+        f"stale-while-revalidate={settings.http_cache_stale_while_revalidate}"
+    )
+
+def compute_etag(version: str, request: Request) -> str:
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{version}|{request.url.path}|{query}".encode()).hexdigest()[:24]
+    return f'W/"{digest}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return any(candidate.removeprefix("W/") == etag.removeprefix("W/") for candidate in candidates)
+
+def not_modified_since(if_modified_since: str, last_modified: Optional[datetime]) -> bool:
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+def cache_headers(version: str, request: Request, last_modified: Optional[datetime]) -> Dict[str, str]:
+    headers = {
+        "ETag": compute_etag(version, request),
+        "Cache-Control": cache_control_header(),
+        "Vary": "Accept-Encoding",
+    }
+    if last_modified is not None:
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+async def conditional_get(request: Request, response: Response, db: Session = Depends(get_db)) -> str:
+    version = data_version.current(db)
+    last_modified = data_version.published_at(db)
+    headers = cache_headers(version, request, last_modified)
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+
+    if if_none_match is not None:
+        if etag_matches(if_none_match, headers["ETag"]):
+            raise HTTPException(status_code=304, headers=headers)
+    elif if_modified_since is not None and not_modified_since(if_modified_since, last_modified):
+        raise HTTPException(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return version
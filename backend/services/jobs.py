@@ -0,0 +1,432 @@
+import json
+import logging
+import multiprocessing
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+JOB_LOCK_KEY = 0x70726176
+
+class JobConflict(Exception):
+
+    def __init__(self, kind: str, job_id: str):
+        super().__init__(f"A {kind} job is already queued or running ({job_id})")
+        self.kind = kind
+        self.job_id = job_id
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def as_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    if moment is None or moment.tzinfo is not None:
+        return moment
+    return moment.replace(tzinfo=timezone.utc)
+
+def update_job(job_id: str, **fields):
+    from database import write_session
+    from models.job import Job
+
+    db = write_session()
+    try:
+        db.query(Job).filter(Job.id == job_id).update(fields)
+        db.commit()
+    finally:
+        db.close()
+
+class JobProgress:
+
+    def __init__(self, job_id: str, interval: float = None):
+        self.job_id = job_id
+        self.interval = settings.job_progress_interval_seconds if interval is None else interval
+        self.stage_name: Optional[str] = None
+        self.stage_started_at: Optional[datetime] = None
+        self.rows_done = 0
+        self.rows_total: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-progress-{job_id[:8]}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def stage(self, name: str, total: Optional[int] = None):
+        self.stage_name = name
+        self.stage_started_at = utcnow()
+        self.rows_done = 0
+        self.rows_total = total
+        logger.info(f"Job {self.job_id}: {name}" + (f" ({total} rows)" if total is not None else ""))
+        self.flush()
+
+    def advance(self, rows: int = 1):
+        self.rows_done += rows
+
+    def flush(self, **fields):
+        update_job(
+            self.job_id,
+            stage=self.stage_name,
+            stage_started_at=self.stage_started_at,
+            rows_done=self.rows_done,
+            rows_total=self.rows_total,
+            updated_at=utcnow(),
+            **fields
+        )
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Job {self.job_id}: progress update failed: {e}")
+
+def run_ingest(db, progress: JobProgress) -> Dict[str, Any]:
+    from scripts.ingest_data import ingest_all
+
+    data_path = Path(settings.data_path)
+    if not data_path.exists():
+        raise FileNotFoundError(f"Data path does not exist: {data_path}")
+    return ingest_all(db, data_path, progress)
+
+def run_enrich(db, progress: JobProgress) -> Dict[str, Any]:
+    from scripts.ingest_data import enrich_pincodes
+
+    return {"enriched": enrich_pincodes(db, progress)}
+
+def run_recompute(db, progress: JobProgress) -> Dict[str, Any]:
+    from scripts.compute_risk_zones import recompute
+
+    return recompute(db, progress)
+
+JOB_HANDLERS = {
+    "ingest": run_ingest,
+    "enrich": run_enrich,
+    "recompute": run_recompute,
+}
+
+def acquire_job_lock():
+    from sqlalchemy import text
+    from database import get_write_engine
+
+    engine = get_write_engine()
+    if engine.dialect.name != "postgresql":
+        return None
+
+    connection = engine.connect()
+    connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": JOB_LOCK_KEY})
+    return connection
+
+def release_job_lock(connection):
+    from sqlalchemy import text
+
+    if connection is None:
+        return
+    try:
+        connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": JOB_LOCK_KEY})
+    finally:
+        connection.close()
+
+def run_job(job_id: str, kind: str) -> str:
+    logging.basicConfig(level=logging.INFO)
+    from database import init_db, write_session
+
+    from services.pipeline_profiler import profiler
+
+    init_db()
+    lock = acquire_job_lock()
+    progress = JobProgress(job_id)
+    db = write_session()
+    status, result, error = "failed", None, None
+    try:
+        started = utcnow()
+        update_job(job_id, status="running", started_at=started, updated_at=started)
+        profiler.start(kind)
+        progress.start()
+        try:
+            result = JOB_HANDLERS[kind](db, progress)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            db.rollback()
+            progress.stop()
+            progress.flush(status="failed", error=error, finished_at=utcnow())
+            logger.error(f"Job {job_id} ({kind}) failed: {e}", exc_info=True)
+            return status
+
+        status = "succeeded"
+        progress.stop()
+        progress.flush(status=status, result=json.dumps(result, default=str), finished_at=utcnow())
+        logger.info(f"Job {job_id} ({kind}) finished in {(utcnow() - started).total_seconds():.1f}s")
+        return status
+    finally:
+        db.close()
+        release_job_lock(lock)
+        try:
+            profiler.write(profiler.finish(status, result, error), Path(settings.pipeline_report_dir) / f"{kind}-{job_id}.json")
+        except Exception as e:
+            logger.warning(f"Job {job_id}: run report not written: {e}")
+
+def job_payload(job) -> Dict[str, Any]:
+    now = utcnow()
+    started_at = as_utc(job.started_at)
+    stage_started_at = as_utc(job.stage_started_at)
+    finished_at = as_utc(job.finished_at)
+
+    percent = eta = None
+    if job.rows_total:
+        percent = round(min(job.rows_done or 0, job.rows_total) / job.rows_total * 100, 1)
+        if job.status == "running" and job.rows_done and stage_started_at:
+            elapsed = (now - stage_started_at).total_seconds()
+            eta = round(elapsed * max(job.rows_total - job.rows_done, 0) / job.rows_done, 1)
+
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "trigger": job.trigger,
+        "stage": job.stage,
+        "rows_done": job.rows_done or 0,
+        "rows_total": job.rows_total,
+        "percent": percent,
+        "eta_seconds": eta,
+        "elapsed_seconds": round(((finished_at or now) - started_at).total_seconds(), 1) if started_at else None,
+        "submitted_at": as_utc(job.submitted_at),
+        "started_at": started_at,
+        "finished_at": finished_at,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+    }
+
+class JobRunner:
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._active: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._heartbeat: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        if self._heartbeat is None:
+            self._stop.clear()
+            self._heartbeat = threading.Thread(target=self._beat, name="job-heartbeat", daemon=True)
+            self._heartbeat.start()
+        return self._executor
+
+    def _beat(self):
+        from database import write_session
+        from models.job import Job
+
+        while not self._stop.wait(settings.job_progress_interval_seconds):
+            with self._lock:
+                job_ids = list(self._active.values())
+            if not job_ids:
+                continue
+            db = write_session()
+            try:
+                db.query(Job).filter(Job.id.in_(job_ids), Job.status.in_(ACTIVE_STATUSES)).update(
+                    {"updated_at": utcnow()}, synchronize_session=False
+                )
+                db.commit()
+            except Exception as e:
+                logger.warning(f"Job heartbeat failed: {e}")
+            finally:
+                db.close()
+
+    def _active_job(self, db, kind: str) -> Optional[str]:
+        from models.job import Job
+
+        if kind in self._active:
+            return self._active[kind]
+
+        return db.query(Job.id).filter(Job.kind == kind, Job.status.in_(ACTIVE_STATUSES)).limit(1).scalar()
+
+    def _expire_stale(self, db, kind: str):
+        from sqlalchemy import or_
+        from models.job import Job
+
+        now = utcnow()
+        stale = now - timedelta(seconds=settings.job_stale_seconds)
+        expired = db.query(Job).filter(
+            Job.kind == kind,
+            Job.status.in_(ACTIVE_STATUSES),
+            Job.id.notin_(list(self._active.values())),
+            or_(Job.updated_at < stale, Job.updated_at.is_(None))
+        ).update({"status": "failed", "error": "stale", "finished_at": now, "updated_at": now}, synchronize_session=False)
+        if expired:
+            logger.warning(f"Marked {expired} stale {kind} job(s) as failed")
+        db.commit()
+
+    def submit(self, kind: str, trigger: str = "api"):
+        from sqlalchemy.exc import IntegrityError
+        from database import write_session
+        from models.job import Job
+
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        db = write_session()
+        try:
+            with self._lock:
+                self._expire_stale(db, kind)
+                active = self._active_job(db, kind)
+                if active:
+                    raise JobConflict(kind, active)
+
+                now = utcnow()
+                job = Job(id=secrets.token_hex(16), kind=kind, status="queued", trigger=trigger, submitted_at=now, updated_at=now)
+                db.add(job)
+                try:
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+                    raise JobConflict(kind, self._active_job(db, kind) or "unknown")
+                db.refresh(job)
+
+                future = self._pool().submit(run_job, job.id, kind)
+                self._active[kind] = job.id
+            future.add_done_callback(lambda done, job_id=job.id: self._finished(kind, job_id, done))
+            logger.info(f"Queued {kind} job {job.id} ({trigger})")
+            return job
+        finally:
+            db.close()
+
+    def _finished(self, kind: str, job_id: str, future):
+        with self._lock:
+            if self._active.get(kind) == job_id:
+                del self._active[kind]
+
+        error = None if future.cancelled() else future.exception()
+        if future.cancelled() or error is not None:
+            if error is not None:
+                logger.error(f"Job {job_id} ({kind}) crashed: {error!r}")
+                with self._lock:
+                    self._executor = None
+            update_job(job_id, status="failed", error=repr(error) if error else "cancelled", finished_at=utcnow(), updated_at=utcnow())
+
+        from services.data_version import data_version
+        data_version.invalidate()
+
+    def recent(self, db, limit: int = 20) -> List:
+        from models.job import Job
+
+        return db.query(Job).order_by(Job.submitted_at.desc()).limit(limit).all()
+
+    def shutdown(self):
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+def cron_field(spec: str, low: int, high: int) -> Set[int]:
+    values = set()
+    for part in spec.split(","):
+        part, _, step = part.partition("/")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(bound) for bound in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"Cron field {spec!r} out of range {low}-{high}")
+        values.update(range(start, end + 1, int(step or 1)))
+    return values
+
+class CronSchedule:
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+
+        self.expression = expression
+        self.minutes = cron_field(fields[0], 0, 59)
+        self.hours = cron_field(fields[1], 0, 23)
+        self.days = cron_field(fields[2], 1, 31)
+        self.months = cron_field(fields[3], 1, 12)
+        self.weekdays = {day % 7 for day in cron_field(fields[4], 0, 7)}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def matches(self, moment: datetime) -> bool:
+        if moment.minute not in self.minutes or moment.hour not in self.hours or moment.month not in self.months:
+            return False
+
+        day = moment.day in self.days
+        weekday = moment.isoweekday() % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+def parse_job_schedule(spec: str) -> Dict[str, CronSchedule]:
+    schedules = {}
+    for entry in spec.split(";"):
+        if not entry.strip():
+            continue
+        kind, _, expression = entry.partition("=")
+        kind = kind.strip()
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind in JOB_SCHEDULE: {kind!r}")
+        schedules[kind] = CronSchedule(expression.strip())
+    return schedules
+
+class JobScheduler:
+
+    def __init__(self, runner: JobRunner):
+        self.runner = runner
+        self.schedules: Dict[str, CronSchedule] = {}
+        self._fired: Dict[str, datetime] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, spec: str = None):
+        self.schedules = parse_job_schedule(settings.job_schedule if spec is None else spec)
+        if not self.schedules or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="job-scheduler", daemon=True)
+        self._thread.start()
+        logger.info("Job schedule: " + ", ".join(f"{kind}={cron.expression}" for kind, cron in self.schedules.items()))
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def tick(self, moment: datetime):
+        minute = moment.replace(second=0, microsecond=0)
+        for kind, cron in self.schedules.items():
+            if self._fired.get(kind) == minute or not cron.matches(minute):
+                continue
+            self._fired[kind] = minute
+            try:
+                self.runner.submit(kind, trigger="schedule")
+            except JobConflict as e:
+                logger.info(f"Skipping scheduled {kind} job: {e}")
+            except Exception as e:
+                logger.warning(f"Scheduled {kind} job could not be queued: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.tick(datetime.now())
+            self._stop.wait(60 - time.time() % 60 + 1)
+
+job_runner = JobRunner()
+job_scheduler = JobScheduler(job_runner)
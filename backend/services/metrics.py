@@ -0,0 +1,282 @@
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger("slow_query")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(Metric):
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{format_labels(self.label_names, labels)} {format_value(value)}")
+        return lines
+
+class Gauge(Metric):
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), collect=None):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[tuple, float] = {}
+        self._collect = collect
+
+    def set(self, value: float, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def render(self) -> List[str]:
+        values = dict(self._values)
+        if self._collect:
+            values.update(self._collect())
+        lines = self.header()
+        for labels, value in sorted(values.items()):
+            if value is not None:
+                lines.append(f"{self.name}{format_labels(self.label_names, labels)} {format_value(value)}")
+        return lines
+
+class Histogram(Metric):
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = format_labels(self.label_names, labels, f'le="{format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_text = format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+class Registry:
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric):
+        self.metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+class RequestStats:
+
+    __slots__ = ("scope", "resolver", "_route", "statements", "db_seconds")
+
+    def __init__(self, scope: dict = None, resolver=None):
+        self.scope = scope
+        self.resolver = resolver
+        self._route = None
+        self.statements = 0
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        if self._route is None:
+            if self.scope is None or "endpoint" not in self.scope:
+                return "unmatched"
+            self._route = self.resolver(self.scope)
+        return self._route
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+REQUEST_LATENCY = Histogram("pravah_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+REQUESTS_IN_FLIGHT = Gauge("pravah_requests_in_flight", "HTTP requests currently being served")
+REQUEST_STATEMENTS = Histogram("pravah_request_db_statements", "SQL statements issued per request", ("route",), STATEMENT_BUCKETS)
+REQUEST_DB_TIME = Histogram("pravah_request_db_seconds", "Total database time per request", ("route",))
+DB_STATEMENTS = Counter("pravah_db_statements_total", "SQL statements executed", ("context",))
+DB_TIME = Counter("pravah_db_seconds_total", "Time spent executing SQL", ("context",))
+SLOW_QUERIES = Counter("pravah_db_slow_queries_total", "SQL statements slower than the slow query threshold", ("context",))
+POOL_WAIT = Histogram("pravah_db_pool_wait_seconds", "Time spent waiting for a pooled connection", ("engine",))
+POOL_TIMEOUTS = Counter("pravah_db_pool_timeouts_total", "Connection checkouts that timed out waiting on the pool", ("engine",))
+
+def record_query(statement: str, duration: float):
+    stats = current_request.get()
+    context = stats.route if stats else "background"
+
+    if stats:
+        stats.statements += 1
+        stats.db_seconds += duration
+
+    DB_STATEMENTS.inc(context)
+    DB_TIME.inc(context, amount=duration)
+
+    if duration * 1000 >= settings.slow_query_threshold_ms:
+        SLOW_QUERIES.inc(context)
+        logger.warning(f"Slow query ({duration * 1000:.1f} ms) in {context}: {' '.join(statement.split())[:500]}")
+
+def record_pool_wait(engine: str, duration: float):
+    POOL_WAIT.observe(duration, engine)
+
+    if duration * 1000 >= settings.db_pool_wait_warn_ms:
+        stats = current_request.get()
+        context = stats.route if stats else "background"
+        logger.warning(f"Waited {duration * 1000:.1f} ms for a {engine} connection in {context}; pool may be undersized")
+
+def record_pool_timeout(engine: str):
+    POOL_TIMEOUTS.inc(engine)
+    logger.error(f"Timed out after {settings.db_pool_timeout_seconds}s waiting for a {engine} connection")
+
+def record_request(method: str, stats: RequestStats, status_code: int, duration: float):
+    REQUEST_LATENCY.observe(duration, method, stats.route, str(status_code))
+    REQUEST_STATEMENTS.observe(stats.statements, stats.route)
+    REQUEST_DB_TIME.observe(stats.db_seconds, stats.route)
+
+    if stats.statements > settings.slow_request_statement_threshold:
+        logger.warning(
+            f"{method} {stats.route} issued {stats.statements} SQL statements "
+            f"({stats.db_seconds * 1000:.1f} ms); possible N+1 query pattern"
+        )
+
+def pool_collector(engines):
+    def collect():
+        values = {}
+        for name, engine in engines().items():
+            pool = engine.pool
+            for metric in ("checkedout", "overflow", "size"):
+                reader = getattr(pool, metric, None)
+                if callable(reader):
+                    values[(name, metric)] = reader()
+        return values
+    return collect
+
+def cache_collector():
+    from services.cache import CACHES
+
+    values = {}
+    for name, cache in CACHES.items():
+        values[(name, "hits")] = cache.hits
+        values[(name, "misses")] = cache.misses
+        values[(name, "entries")] = len(cache)
+        values[(name, "hit_ratio")] = cache.hit_ratio
+    return values
+
+CACHE_STATS = Gauge("pravah_cache", "In-process cache statistics", ("cache", "stat"), collect=cache_collector)
+
+def register_pool_gauges(engines):
+    return Gauge("pravah_db_pool", "Connection pool state", ("engine", "stat"), collect=pool_collector(engines))
+
+class MetricsMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Optional[Dict] = None
+
+    def _route_for(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint) if self._routes is not None else None
+        if route is None:
+            self._routes = {
+                route.endpoint: route.path
+                for route in scope["app"].routes
+                if hasattr(route, "endpoint")
+            }
+            route = self._routes.get(endpoint, getattr(endpoint, "__name__", "unmatched"))
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope, self._route_for)
+        token = current_request.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            current_request.reset(token)
+            record_request(scope["method"], stats, status_code, time.perf_counter() - start)
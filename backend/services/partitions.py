@@ -0,0 +1,66 @@
+from datetime import date
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import text
+
+from config import get_settings
+
+settings = get_settings()
+
+FACT_TABLES = ("biometric_data", "demographic_data", "enrolment_data")
+PARTITIONED = settings.partition_fact_tables and settings.database_url.startswith("postgres")
+
+def partition_table_args() -> dict:
+    return {"postgresql_partition_by": "RANGE (date)"} if PARTITIONED else {}
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+def next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+def is_partitioned(connection, table: str) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+        {"table": table}
+    ).first() is not None
+
+def create_default_partitions(connection):
+    for table in FACT_TABLES:
+        if is_partitioned(connection, table):
+            connection.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+
+def ensure_partitions(connection, table: str, dates: Iterable[date]) -> List[str]:
+    names = []
+    for month in sorted({month_start(value) for value in dates if value is not None}):
+        name = partition_name(table, month)
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+        ))
+        names.append(name)
+    return names
+
+def list_partitions(connection, table: str) -> List[Tuple[str, str, int]]:
+    return [tuple(row) for row in connection.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+    ), {"table": table})]
+
+def detach_partition(connection, table: str, month: date, drop: bool = False, archive_schema: str = None) -> str:
+    name = partition_name(table, month_start(month))
+    connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+
+    if drop:
+        connection.execute(text(f"DROP TABLE {name}"))
+    elif archive_schema:
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+        connection.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+
+    return name
@@ -0,0 +1,78 @@
+import gzip
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Mapping, Optional
+
+import orjson
+from fastapi import Request, Response
+
+from config import get_settings
+from services.cache import VersionedCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+settings = get_settings()
+
+@dataclass(frozen=True)
+class EncodedPayload:
+    body: bytes
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+
+def encode_payload(content: Any) -> EncodedPayload:
+    body = orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+    if len(body) < settings.compression_min_bytes:
+        return EncodedPayload(body=body)
+
+    return EncodedPayload(
+        body=body,
+        gzip=gzip.compress(body, compresslevel=6, mtime=0),
+        br=brotli.compress(body, quality=6) if brotli is not None else None,
+    )
+
+def accepted_encodings(request: Request) -> Dict[str, float]:
+    accepted = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+def payload_response(request: Request, payload: EncodedPayload, headers: Optional[Mapping[str, str]] = None,
+                     status_code: int = 200) -> Response:
+    accepted = accepted_encodings(request)
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    headers.pop("content-length", None)
+    headers.pop("vary", None)
+
+    if payload.br is not None and accepted.get("br", 0) > 0:
+        headers["Content-Encoding"] = "br"
+        body = payload.br
+    elif payload.gzip is not None and accepted.get("gzip", 0) > 0:
+        headers["Content-Encoding"] = "gzip"
+        body = payload.gzip
+    else:
+        body = payload.body
+
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+class PayloadCache(VersionedCache):
+
+    def get_or_build(self, version: str, key: Hashable, build) -> EncodedPayload:
+        payload = self.get(version, key)
+        if payload is None:
+            payload = encode_payload(build())
+            self.set(version, key, payload)
+        return payload
+
+payload_cache = PayloadCache("payloads", max_entries=settings.payload_cache_entries)
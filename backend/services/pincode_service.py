@@ -1,7 +1,15 @@
-import httpx
+import asyncio
+import json
 import logging
-from typing import Optional, Dict, Any
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
 from config import get_settings
+from services.cache import TTLCache
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -33,107 +41,273 @@ FALLBACK_COORDINATES = {
     "160001": {"lat": 30.7333, "lon": 76.7794},
 }
 
-class PincodeService:
+def fallback_info(pincode: str) -> Optional[Dict[str, Any]]:
+    coords = FALLBACK_COORDINATES.get(pincode)
+    if coords is None:
+        return None
+    return {
+        "pincode": pincode,
+        "latitude": coords["lat"],
+        "longitude": coords["lon"],
+        "district": "Unknown",
+        "state": "Unknown"
+    }
+
+def parse_postal_response(pincode: str, response: httpx.Response) -> Optional[Dict[str, Any]]:
+    response.raise_for_status()
+    data = response.json()
+
+    if not data or data[0].get("Status") != "Success" or not data[0].get("PostOffice"):
+        return None
+
+    post_office = data[0]["PostOffice"][0]
+    coords = FALLBACK_COORDINATES.get(pincode, {"lat": None, "lon": None})
+
+    return {
+        "pincode": pincode,
+        "post_office_name": post_office.get("Name"),
+        "district": post_office.get("District"),
+        "state": post_office.get("State"),
+        "division": post_office.get("Division"),
+        "region": post_office.get("Region"),
+        "circle": post_office.get("Circle"),
+        "delivery_status": post_office.get("DeliveryStatus"),
+        "office_type": post_office.get("Type"),
+        "latitude": coords["lat"],
+        "longitude": coords["lon"]
+    }
+
+class CircuitBreaker:
+
+    def __init__(self, failure_threshold: int = None, reset_seconds: float = None):
+        self.failure_threshold = failure_threshold or settings.pincode_breaker_failures
+        self.reset_seconds = settings.pincode_breaker_reset_seconds if reset_seconds is None else reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info("Postal API recovered; circuit closed")
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Postal API failing ({self.failures} consecutive errors); circuit open for {self.reset_seconds:.0f}s")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+class SQLitePincodeStore:
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS pincode_cache "
+                "(pincode TEXT PRIMARY KEY, payload TEXT, expires REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def lookup(self, pincode: str) -> Tuple[bool, Optional[Dict[str, Any]], float]:
+        row = self._connection().execute(
+            "SELECT payload, expires FROM pincode_cache WHERE pincode = ? AND expires > ?", (pincode, time.time())
+        ).fetchone()
+        if row is None:
+            return False, None, 0.0
+        return True, json.loads(row[0]) if row[0] is not None else None, row[1]
+
+    def set(self, pincode: str, info: Optional[Dict[str, Any]], expires: float):
+        connection = self._connection()
+        connection.execute(
+            "INSERT INTO pincode_cache (pincode, payload, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT(pincode) DO UPDATE SET payload = excluded.payload, expires = excluded.expires",
+            (pincode, json.dumps(info) if info is not None else None, expires)
+        )
+
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            connection.execute("DELETE FROM pincode_cache WHERE expires <= ?", (time.time(),))
+
+class _Flight:
+
+    __slots__ = ("done", "result")
 
     def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+
+class PincodeService:
+
+    def __init__(self, store: Optional[SQLitePincodeStore] = None):
         self.base_url = settings.postal_api_url
-        self.cache = {}
+        self.cache = TTLCache("pincodes", max_entries=settings.pincode_cache_entries)
+        self.store = store or (SQLitePincodeStore(settings.pincode_cache_sqlite_path) if settings.pincode_cache_backend == "sqlite" else None)
+        self.breaker = CircuitBreaker()
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop = None
+        self._flights: Dict[str, _Flight] = {}
+        self._async_flights: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
 
-    async def get_pincode_info(self, pincode: str) -> Optional[Dict[str, Any]]:
-        if pincode in self.cache:
-            return self.cache[pincode]
+    def _client_options(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "timeout": settings.pincode_api_timeout_seconds,
+            "limits": httpx.Limits(
+                max_connections=settings.pincode_api_max_connections,
+                max_keepalive_connections=settings.pincode_api_max_connections
+            ),
+        }
+
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(**self._client_options())
+        return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            if self._async_client is not None and not self._async_loop.is_closed():
+                asyncio.run_coroutine_threadsafe(self._async_client.aclose(), self._async_loop)
+            self._async_client = httpx.AsyncClient(**self._client_options())
+            self._async_loop = loop
+            self._async_flights = {}
+        return self._async_client
+
+    async def aclose(self):
+        client, self._async_client = self._async_client, None
+        if client is not None:
+            if self._async_loop is asyncio.get_running_loop():
+                await client.aclose()
+            elif not self._async_loop.is_closed():
+                asyncio.run_coroutine_threadsafe(client.aclose(), self._async_loop)
+        self._async_loop = None
+
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    def cached(self, pincode: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        hit, info = self.cache.lookup(pincode)
+        if hit or self.store is None:
+            return hit, info
 
-        result = None
-        
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/pincode/{pincode}")
-
-                if response.status_code == 200:
-                    data = response.json()
-
-                    if data and data[0]["Status"] == "Success":
-                        post_office = data[0]["PostOffice"][0]
-                        
-                        coords = FALLBACK_COORDINATES.get(pincode, {"lat": None, "lon": None})
-
-                        result = {
-                            "pincode": pincode,
-                            "post_office_name": post_office.get("Name"),
-                            "district": post_office.get("District"),
-                            "state": post_office.get("State"),
-                            "division": post_office.get("Division"),
-                            "region": post_office.get("Region"),
-                            "circle": post_office.get("Circle"),
-                            "delivery_status": post_office.get("DeliveryStatus"),
-                            "office_type": post_office.get("Type"),
-                            "latitude": coords["lat"],
-                            "longitude": coords["lon"]
-                        }
+            hit, info, expires = self.store.lookup(pincode)
+        except sqlite3.Error as e:
+            logger.warning(f"Pincode cache store unavailable: {e}")
+            return False, None
+        if hit:
+            self.cache.set(pincode, info, expires)
+        return hit, info
+
+    def _remember(self, pincode: str, info: Optional[Dict[str, Any]]):
+        ttl = settings.pincode_cache_ttl_seconds if info else settings.pincode_negative_ttl_seconds
+        expires = time.time() + ttl
+        self.cache.set(pincode, info, expires)
+        if self.store is not None:
+            try:
+                self.store.set(pincode, info, expires)
+            except sqlite3.Error as e:
+                logger.warning(f"Pincode cache store unavailable: {e}")
+
+    def _failed(self, pincode: str, error: Exception) -> Optional[Dict[str, Any]]:
+        self.breaker.record_failure()
+        logger.error(f"Error fetching pincode {pincode}: {error}")
+        return fallback_info(pincode)
+
+    def _received(self, pincode: str, response: httpx.Response) -> Optional[Dict[str, Any]]:
+        try:
+            info = parse_postal_response(pincode, response)
         except Exception as e:
-            logger.error(f"Error fetching pincode {pincode}: {e}")
-
-        if not result and pincode in FALLBACK_COORDINATES:
-             coords = FALLBACK_COORDINATES[pincode]
-             result = {
-                 "pincode": pincode,
-                 "latitude": coords["lat"],
-                 "longitude": coords["lon"],
-                 "district": "Unknown",
-                 "state": "Unknown"
-             }
-
-        if result:
-            self.cache[pincode] = result
-            
-        return result
+            return self._failed(pincode, e)
 
-    def get_pincode_info_sync(self, pincode: str) -> Optional[Dict[str, Any]]:
-        if pincode in self.cache:
-            return self.cache[pincode]
+        self.breaker.record_success()
+        info = info or fallback_info(pincode)
+        self._remember(pincode, info)
+        return info
+
+    def _lookup_sync(self, pincode: str) -> Optional[Dict[str, Any]]:
+        if not self.breaker.allow():
+            return fallback_info(pincode)
 
-        result = None
+        try:
+            response = self.client().get(f"/pincode/{pincode}")
+        except Exception as e:
+            return self._failed(pincode, e)
+        return self._received(pincode, response)
+
+    async def _lookup_async(self, pincode: str) -> Optional[Dict[str, Any]]:
+        if not self.breaker.allow():
+            return fallback_info(pincode)
 
         try:
-            response = httpx.get(f"{self.base_url}/pincode/{pincode}", timeout=10.0)
-
-            if response.status_code == 200:
-                data = response.json()
-
-                if data and data[0]["Status"] == "Success":
-                    post_office = data[0]["PostOffice"][0]
-
-                    coords = FALLBACK_COORDINATES.get(pincode, {"lat": None, "lon": None})
-
-                    result = {
-                        "pincode": pincode,
-                        "post_office_name": post_office.get("Name"),
-                        "district": post_office.get("District"),
-                        "state": post_office.get("State"),
-                        "division": post_office.get("Division"),
-                        "region": post_office.get("Region"),
-                        "circle": post_office.get("Circle"),
-                        "delivery_status": post_office.get("DeliveryStatus"),
-                        "office_type": post_office.get("Type"),
-                        "latitude": coords["lat"],
-                        "longitude": coords["lon"]
-                    }
+            response = await self.async_client().get(f"/pincode/{pincode}")
         except Exception as e:
-            logger.error(f"Error fetching pincode {pincode}: {e}")
-
-        if not result and pincode in FALLBACK_COORDINATES:
-             coords = FALLBACK_COORDINATES[pincode]
-             result = {
-                 "pincode": pincode,
-                 "latitude": coords["lat"],
-                 "longitude": coords["lon"],
-                 "district": "Unknown",
-                 "state": "Unknown"
-             }
-
-        if result:
-            self.cache[pincode] = result
-            
-        return result
+            return self._failed(pincode, e)
+        return self._received(pincode, response)
+
+    async def get_pincode_info(self, pincode: str) -> Optional[Dict[str, Any]]:
+        hit, info = self.cached(pincode)
+        if hit:
+            return info
+
+        self.async_client()
+        flight = self._async_flights.get(pincode)
+        if flight is None:
+            flight = self._async_flights[pincode] = asyncio.get_running_loop().create_task(self._lookup_async(pincode))
+            flight.add_done_callback(lambda _: self._async_flights.pop(pincode, None))
+        return await asyncio.shield(flight)
+
+    def get_pincode_info_sync(self, pincode: str) -> Optional[Dict[str, Any]]:
+        hit, info = self.cached(pincode)
+        if hit:
+            return info
+
+        with self._lock:
+            flight = self._flights.get(pincode)
+            leader = flight is None
+            if leader:
+                flight = self._flights[pincode] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            return flight.result
+
+        try:
+            flight.result = self._lookup_sync(pincode)
+        finally:
+            with self._lock:
+                del self._flights[pincode]
+            flight.done.set()
+        return flight.result
 
 pincode_service = PincodeService()
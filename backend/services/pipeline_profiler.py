@@ -0,0 +1,196 @@
+import cProfile
+import json
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from config import get_settings
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class StageStats:
+
+    __slots__ = ("calls", "wall", "cpu", "rows", "peak_rss", "rss_growth")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.rows = 0
+        self.peak_rss: Optional[float] = None
+        self.rss_growth = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "wall_seconds": round(self.wall, 4),
+            "cpu_seconds": round(self.cpu, 4),
+            "rows": self.rows,
+            "rows_per_second": round(self.rows / self.wall, 1) if self.rows and self.wall > 0 else None,
+            "peak_rss_mb": round(self.peak_rss, 1) if self.peak_rss is not None else None,
+            "peak_rss_growth_mb": round(self.rss_growth, 1),
+        }
+
+class StackSampler:
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: Path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class PipelineProfiler:
+
+    def __init__(self):
+        self.pipeline: Optional[str] = None
+        self.stages: Dict[str, StageStats] = {}
+        self.started_at: Optional[datetime] = None
+        self._wall = 0.0
+        self._cpu = 0.0
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+
+    def start(self, pipeline: str, profile: bool = False):
+        self.pipeline = pipeline
+        self.stages = {}
+        self.started_at = datetime.now(timezone.utc)
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+        if profile:
+            self._sampler = StackSampler(threading.get_ident())
+            self._sampler.start()
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    @contextmanager
+    def stage(self, name: str, rows: int = 0) -> Iterator[StageStats]:
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+
+        rss_before = peak_rss_mb()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield stats
+        finally:
+            stats.calls += 1
+            stats.wall += time.perf_counter() - wall
+            stats.cpu += time.process_time() - cpu
+            stats.rows += rows
+            stats.peak_rss = peak_rss_mb()
+            if rss_before is not None:
+                stats.rss_growth += stats.peak_rss - rss_before
+
+    def timed(self, name: str, iterable: Iterable, rows: Callable[[Any], int] = len) -> Iterator[Any]:
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as stats:
+                item = next(iterator, StopIteration)
+                if item is not StopIteration:
+                    stats.rows += rows(item)
+            if item is StopIteration:
+                return
+            yield item
+
+    def finish(self, status: str = "succeeded", result: Any = None, error: Optional[str] = None) -> Dict[str, Any]:
+        if self._profile is not None:
+            self._profile.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+
+        wall = time.perf_counter() - self._wall
+        return {
+            "pipeline": self.pipeline,
+            "status": status,
+            "error": error,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(time.process_time() - self._cpu, 3),
+            "peak_rss_mb": round(peak_rss_mb(), 1) if resource is not None else None,
+            "stages": {name: stats.as_dict() for name, stats in self.stages.items()},
+            "result": result,
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "database": settings.database_url.split(":", 1)[0],
+                "argv": sys.argv,
+            },
+        }
+
+    def write(self, report: Dict[str, Any], path: Optional[Path] = None) -> Path:
+        if path is None:
+            stamp = (self.started_at or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+            path = Path(settings.pipeline_report_dir) / f"{self.pipeline}-{stamp}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        if self._profile is not None:
+            report["profile"] = {"pstats": str(path.with_suffix(".prof")), "collapsed": str(path.with_suffix(".collapsed"))}
+            self._profile.dump_stats(path.with_suffix(".prof"))
+            self._sampler.write(path.with_suffix(".collapsed"))
+            self._profile = None
+            self._sampler = None
+
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        logger.info(f"Run report written to {path}")
+        return path
+
+    def summary(self, report: Dict[str, Any]) -> str:
+        lines = [f"{'stage':<14}{'wall s':>10}{'cpu s':>10}{'rows':>12}{'rows/s':>12}{'peak MB':>10}"]
+        for name, stats in report["stages"].items():
+            lines.append(
+                f"{name:<14}{stats['wall_seconds']:>10.2f}{stats['cpu_seconds']:>10.2f}{stats['rows']:>12}"
+                f"{stats['rows_per_second'] or 0:>12.0f}{stats['peak_rss_mb'] or 0:>10.1f}"
+            )
+        lines.append(f"{'total':<14}{report['wall_seconds']:>10.2f}{report['cpu_seconds']:>10.2f}")
+        return "\n".join(lines)
+
+profiler = PipelineProfiler()
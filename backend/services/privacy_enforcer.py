@@ -1,13 +1,23 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Sequence
+
+import numpy as np
+from sqlalchemy import and_, case, false, null, true
+
 from config import get_settings
 
 settings = get_settings()
 
+MASKED_FIELDS = ("risk_score", "migration_velocity", "biometric_risk", "digital_exclusion")
+
 class PrivacyEnforcer:
 
     def __init__(self, minimum_cell_size: int = None):
         self.minimum_cell_size = minimum_cell_size or settings.minimum_cell_size
 
+    @property
+    def reason(self) -> str:
+        return f"Data suppressed for privacy (n<{self.minimum_cell_size})"
+
     def should_suppress(self, count: int) -> bool:
         return count < self.minimum_cell_size
 
@@ -18,6 +28,70 @@ class PrivacyEnforcer:
             "reason": reason
         }
 
+    def suppression_predicate(self, *counts):
+        return and_(*(count >= self.minimum_cell_size for count in counts))
+
+    def filter_query(self, query, *counts):
+        return query.filter(self.suppression_predicate(*counts))
+
+    def filter_groups(self, query, *counts):
+        return query.having(self.suppression_predicate(*counts))
+
+    def mask_column(self, value, *counts, label: str = None):
+        expression = case((self.suppression_predicate(*counts), value), else_=null())
+        return expression.label(label) if label else expression
+
+    def suppressed_flag(self, *counts, label: str = "suppressed"):
+        return case((self.suppression_predicate(*counts), false()), else_=true()).label(label)
+
+    def suppression_mask(self, counts) -> np.ndarray:
+        counts = np.asarray(counts, dtype=float)
+        return ~(counts >= self.minimum_cell_size)
+
+    def complementary_suppression(self, counts, groups, suppressed=None) -> np.ndarray:
+        counts = np.nan_to_num(np.asarray(counts, dtype=float))
+        suppressed = self.suppression_mask(counts) if suppressed is None else np.asarray(suppressed, dtype=bool)
+        if len(counts) == 0:
+            return suppressed
+
+        _, codes = np.unique(np.asarray(groups), return_inverse=True)
+        codes = codes.ravel()
+
+        order = np.lexsort((counts, ~suppressed, codes))
+        sorted_codes = codes[order]
+        sorted_counts = counts[order]
+        sorted_suppressed = suppressed[order]
+
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        group_of_row = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(order)]))
+        position = np.arange(len(order)) - starts[group_of_row] + 1
+
+        cumulative = np.cumsum(sorted_counts)
+        cumulative -= np.r_[0, cumulative[starts[1:] - 1]][group_of_row]
+
+        primary = np.add.reduceat(sorted_suppressed.astype(int), starts)
+        sizes = np.diff(np.r_[starts, len(order)])
+
+        safe = (position >= 2) & (cumulative >= self.minimum_cell_size) & (position >= primary[group_of_row])
+        first_safe = np.full(len(starts), np.iinfo(np.int64).max)
+        np.minimum.at(first_safe, group_of_row[safe], position[safe])
+        cutoff = np.where(primary > 0, np.minimum(first_safe, sizes), 0)
+
+        result = np.empty_like(suppressed)
+        result[order] = position <= cutoff[group_of_row]
+        return result
+
+    def enforce_on_frame(self, frame, count_field: str = "population", masked_fields: Sequence[str] = MASKED_FIELDS):
+        suppressed = self.suppression_mask(frame[count_field].to_numpy(dtype=float, na_value=np.nan))
+        frame = frame.copy()
+
+        columns = [column for column in (count_field, *masked_fields) if column in frame.columns]
+        frame[columns] = frame[columns].astype(object)
+        frame.loc[suppressed, columns] = None
+        frame["suppressed"] = suppressed
+        frame["suppression_reason"] = np.where(suppressed, self.reason, None)
+        return frame
+
     def enforce_on_record(self, record: Dict[str, Any], count_field: str = "population") -> Dict[str, Any]:
         count = record.get(count_field, 0)
 
@@ -25,44 +99,61 @@ class PrivacyEnforcer:
             return {
                 **record,
                 "suppressed": True,
-                "suppression_reason": f"Data suppressed for privacy (n={count} < {self.minimum_cell_size})",
+                "suppression_reason": self.reason,
                 count_field: None,
-                "risk_score": None,
-                "migration_velocity": None,
-                "biometric_risk": None,
-                "digital_exclusion": None,
+                **{field: None for field in MASKED_FIELDS},
             }
 
         return {**record, "suppressed": False}
 
-    def enforce_on_list(self, records: List[Dict[str, Any]], count_field: str = "population") -> List[Dict[str, Any]]:
-        return [self.enforce_on_record(record, count_field) for record in records]
+    def enforce_on_list(self, records: List[Dict[str, Any]], count_field: str = "population", copy: bool = True) -> List[Dict[str, Any]]:
+        if copy:
+            return [self.enforce_on_record(record, count_field) for record in records]
 
-    def aggregate_safe(self, records: List[Dict[str, Any]], group_by: str, count_field: str = "population") -> List[Dict[str, Any]]:
-        from collections import defaultdict
+        suppressed = self.suppression_mask([record.get(count_field, 0) for record in records])
+        for record, is_suppressed in zip(records, suppressed.tolist()):
+            record["suppressed"] = is_suppressed
+            if is_suppressed:
+                record["suppression_reason"] = self.reason
+                record[count_field] = None
+                for field in MASKED_FIELDS:
+                    record[field] = None
+        return records
 
-        groups = defaultdict(lambda: {"count": 0, "records": []})
+    def aggregate_safe(self, records: Iterable[Mapping[str, Any]], group_by: str, count_field: str = "population",
+                       complementary: bool = False) -> List[Dict[str, Any]]:
+        totals: Dict[Any, List[int]] = {}
 
         for record in records:
             key = record.get(group_by)
-            groups[key]["count"] += record.get(count_field, 0)
-            groups[key]["records"].append(record)
+            entry = totals.get(key)
+            if entry is None:
+                entry = totals[key] = [0, 0]
+            entry[0] += record.get(count_field) or 0
+            entry[1] += 1
+
+        keys = list(totals)
+        counts = [totals[key][0] for key in keys]
+        if complementary:
+            suppressed = self.complementary_suppression(counts, np.zeros(len(keys), dtype=int))
+        else:
+            suppressed = self.suppression_mask(counts)
 
         result = []
-        for key, data in groups.items():
-            if self.should_suppress(data["count"]):
+        for key, count, is_suppressed in zip(keys, counts, suppressed.tolist()):
+            if is_suppressed:
                 result.append({
                     group_by: key,
                     count_field: None,
                     "suppressed": True,
-                    "suppression_reason": f"Aggregated data suppressed (n={data['count']} < {self.minimum_cell_size})"
+                    "suppression_reason": self.reason
                 })
             else:
                 result.append({
                     group_by: key,
-                    count_field: data["count"],
+                    count_field: count,
                     "suppressed": False,
-                    "record_count": len(data["records"])
+                    "record_count": totals[key][1]
                 })
 
         return result
@@ -0,0 +1,120 @@
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.risk_factor import RiskFactor
+from models.risk_zones import RiskZone
+from services.data_version import data_version
+from services.privacy_enforcer import privacy_enforcer
+
+logger = logging.getLogger(__name__)
+
+RISK_WEIGHTS = {
+    "migration": 0.30,
+    "biometric": 0.25,
+    "digital": 0.20,
+    "border": 0.25,
+}
+
+RISK_THRESHOLDS = {
+    "medium": 0.35,
+    "high": 0.55,
+    "critical": 0.75,
+}
+
+RISK_LEVELS = ("low", "medium", "high", "critical")
+
+def level_indices(scores: np.ndarray, thresholds: Dict[str, float]) -> np.ndarray:
+    cuts = np.array([thresholds[level] for level in RISK_LEVELS[1:]])
+    return np.searchsorted(cuts, scores, side="right").astype(np.int8)
+
+def highest(candidates: np.ndarray, scores: np.ndarray, limit: int) -> np.ndarray:
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]] if limit else candidates[:0]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+class RiskScenarioMatrix:
+
+    def __init__(self):
+        self.version: Optional[str] = None
+        self.factors = np.empty((0, len(RISK_WEIGHTS)))
+        self.pincodes = np.empty(0, dtype=object)
+        self.districts = np.empty(0, dtype=object)
+        self.states = np.empty(0, dtype=object)
+        self.populations = np.empty(0, dtype=np.int64)
+        self.baseline_levels = np.empty(0, dtype=np.int8)
+        self.servable = np.empty(0, dtype=bool)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.pincodes)
+
+    def ensure_current(self, db: Session) -> "RiskScenarioMatrix":
+        version = data_version.current(db)
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self._build(db, version)
+        return self
+
+    def _build(self, db: Session, version: str):
+        rows = db.query(
+            RiskZone.pincode,
+            RiskZone.district,
+            RiskZone.state,
+            RiskZone.population,
+            RiskZone.risk_level,
+            RiskZone.is_suppressed,
+            *(getattr(RiskFactor, name) for name in RISK_WEIGHTS)
+        ).join(RiskFactor, RiskFactor.pincode == RiskZone.pincode).order_by(RiskZone.pincode).all()
+
+        columns = list(zip(*rows)) or [()] * (6 + len(RISK_WEIGHTS))
+        self.pincodes = np.array(columns[0], dtype=object)
+        self.districts = np.array(columns[1], dtype=object)
+        self.states = np.array(columns[2], dtype=object)
+        self.populations = np.array(columns[3], dtype=np.int64)
+        self.baseline_levels = np.array([RISK_LEVELS.index(level.value) for level in columns[4]], dtype=np.int8)
+        self.servable = ~np.array(columns[5], dtype=bool) & ~privacy_enforcer.suppression_mask(self.populations)
+        self.factors = np.ascontiguousarray(np.array(columns[6:], dtype=np.float64).T.reshape(len(rows), len(RISK_WEIGHTS)))
+        self.version = version
+        logger.info(f"Risk factor matrix loaded for data version {version} ({len(rows)} zones)")
+
+    def _zone(self, index: int, scores: np.ndarray, levels: np.ndarray) -> Dict[str, Any]:
+        return {
+            "pincode": self.pincodes[index],
+            "district": self.districts[index],
+            "state": self.states[index],
+            "population": int(self.populations[index]),
+            "risk_score": round(float(scores[index]), 4),
+            "risk_level": RISK_LEVELS[levels[index]],
+            "baseline_level": RISK_LEVELS[self.baseline_levels[index]],
+        }
+
+    def score(self, weights: Dict[str, float], thresholds: Dict[str, float], top: int, changed_limit: int) -> Dict[str, Any]:
+        vector = np.array([weights[name] for name in RISK_WEIGHTS])
+        scores = np.clip(self.factors @ vector, 0.0, 1.0)
+        levels = level_indices(scores, thresholds)
+
+        servable = np.flatnonzero(self.servable)
+        changed = servable[levels[servable] != self.baseline_levels[servable]]
+
+        counts = np.bincount(levels, minlength=len(RISK_LEVELS))
+        baseline_counts = np.bincount(self.baseline_levels, minlength=len(RISK_LEVELS))
+
+        return {
+            "version": self.version,
+            "weights": {name: round(float(weight), 6) for name, weight in zip(RISK_WEIGHTS, vector)},
+            "thresholds": thresholds,
+            "total_zones": len(self),
+            "suppressed_zones": int(len(self) - len(servable)),
+            "level_counts": {level: int(counts[i]) for i, level in enumerate(RISK_LEVELS)},
+            "baseline_counts": {level: int(baseline_counts[i]) for i, level in enumerate(RISK_LEVELS)},
+            "top": [self._zone(i, scores, levels) for i in highest(servable, scores, top)],
+            "changed_count": int(len(changed)),
+            "changed": [self._zone(i, scores, levels) for i in highest(changed, scores, changed_limit)],
+        }
+
+risk_scenario_matrix = RiskScenarioMatrix()
@@ -0,0 +1,235 @@
+import bisect
+import heapq
+import logging
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models.pincode_metadata import PincodeMetadata
+from services.data_version import data_version
+
+logger = logging.getLogger(__name__)
+
+FIELD_WEIGHTS = {
+    "district": 0.8,
+    "post_office_name": 0.7,
+    "state": 0.6,
+}
+
+EXACT_QUALITY = 1.0
+PREFIX_QUALITY = 0.9
+FUZZY_QUALITY = 0.75
+FUZZY_PENALTY = 0.1
+MIN_FUZZY_LENGTH = 4
+NGRAM_SIZE = 2
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(value: str) -> List[str]:
+    return TOKEN_PATTERN.findall(value.lower())
+
+def ngrams(token: str, anchored_end: bool = True) -> set:
+    padded = f"^{token}$" if anchored_end else f"^{token}"
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+def max_edits(token: str) -> int:
+    if len(token) < MIN_FUZZY_LENGTH:
+        return 0
+    return 1 if len(token) <= 6 else 2
+
+def bounded_edit_distance(a: str, b: str, limit: int) -> int:
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            )
+            if before is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+class SearchIndex:
+
+    def __init__(self):
+        self.version: Optional[str] = None
+        self.pincodes: List[str] = []
+        self.districts: List[str] = []
+        self.states: List[str] = []
+        self.sorted_pincodes: List[Tuple[str, int]] = []
+        self.values: List[Tuple[str, str, List[int]]] = []
+        self.tokens: List[str] = []
+        self.token_values: Dict[str, List[int]] = {}
+        self.ngram_tokens: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def ensure_current(self, db: Session) -> "SearchIndex":
+        version = data_version.current(db)
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self._build(db, version)
+        return self
+
+    def _build(self, db: Session, version: str):
+        rows = db.query(
+            PincodeMetadata.pincode,
+            PincodeMetadata.district,
+            PincodeMetadata.state,
+            PincodeMetadata.post_office_name
+        ).order_by(PincodeMetadata.pincode).all()
+
+        pincodes = [row.pincode for row in rows]
+        districts = [row.district or "" for row in rows]
+        states = [row.state or "" for row in rows]
+
+        value_docs = defaultdict(list)
+        for doc_id, row in enumerate(rows):
+            for field in FIELD_WEIGHTS:
+                value = getattr(row, field)
+                if value:
+                    value_docs[(field, value)].append(doc_id)
+
+        values = [(field, value, docs) for (field, value), docs in value_docs.items()]
+
+        token_values = defaultdict(list)
+        for value_id, (_, value, _) in enumerate(values):
+            for token in set(tokenize(value)):
+                token_values[token].append(value_id)
+
+        tokens = sorted(token_values)
+        ngram_tokens = defaultdict(list)
+        for token_id, token in enumerate(tokens):
+            for gram in ngrams(token):
+                ngram_tokens[gram].append(token_id)
+
+        self.pincodes = pincodes
+        self.districts = districts
+        self.states = states
+        self.sorted_pincodes = sorted((pincode, doc_id) for doc_id, pincode in enumerate(pincodes))
+        self.values = values
+        self.tokens = tokens
+        self.token_values = dict(token_values)
+        self.ngram_tokens = dict(ngram_tokens)
+        self.version = version
+        logger.info(f"Search index rebuilt for data version {version} ({len(pincodes)} pincodes, {len(tokens)} tokens)")
+
+    def _pincode_matches(self, prefix: str, limit: int) -> List[Tuple[float, int]]:
+        start = bisect.bisect_left(self.sorted_pincodes, (prefix,))
+        matches = []
+        for pincode, doc_id in self.sorted_pincodes[start:start + limit]:
+            if not pincode.startswith(prefix):
+                break
+            score = EXACT_QUALITY if pincode == prefix else PREFIX_QUALITY + 0.1 * len(prefix) / max(len(pincode), 1)
+            matches.append((min(score, EXACT_QUALITY), doc_id))
+        return matches
+
+    def _token_qualities(self, term: str, is_prefix: bool) -> Dict[str, float]:
+        qualities = {}
+
+        if term in self.token_values:
+            qualities[term] = EXACT_QUALITY
+
+        if is_prefix:
+            start = bisect.bisect_left(self.tokens, term)
+            for token in self.tokens[start:]:
+                if not token.startswith(term):
+                    break
+                qualities.setdefault(token, PREFIX_QUALITY)
+
+        edits = max_edits(term)
+        if edits:
+            grams = ngrams(term, anchored_end=not is_prefix)
+            required = max(1, len(grams) - (NGRAM_SIZE + 1) * edits)
+            shared = defaultdict(int)
+            for gram in grams:
+                for token_id in self.ngram_tokens.get(gram, ()):
+                    shared[token_id] += 1
+
+            for token_id, count in shared.items():
+                if count < required:
+                    continue
+                token = self.tokens[token_id]
+                if token in qualities:
+                    continue
+                if is_prefix:
+                    distance = min(
+                        bounded_edit_distance(term, token[:length], edits)
+                        for length in range(max(len(term) - edits, 1), len(term) + edits + 1)
+                    )
+                else:
+                    distance = bounded_edit_distance(term, token, edits)
+                if distance <= edits:
+                    qualities[token] = FUZZY_QUALITY - FUZZY_PENALTY * (distance - 1)
+
+        return qualities
+
+    def _value_matches(self, query: str) -> List[Tuple[float, int]]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        value_scores = None
+        for position, term in enumerate(terms):
+            is_prefix = position == len(terms) - 1
+            term_scores = {}
+            for token, quality in self._token_qualities(term, is_prefix).items():
+                for value_id in self.token_values[token]:
+                    if quality > term_scores.get(value_id, 0.0):
+                        term_scores[value_id] = quality
+
+            if value_scores is None:
+                value_scores = {value_id: [quality] for value_id, quality in term_scores.items()}
+            else:
+                value_scores = {
+                    value_id: qualities + [term_scores[value_id]]
+                    for value_id, qualities in value_scores.items()
+                    if value_id in term_scores
+                }
+            if not value_scores:
+                return []
+
+        normalized = query.strip().lower()
+        ranked = []
+        for value_id, qualities in value_scores.items():
+            field, value, _ = self.values[value_id]
+            quality = sum(qualities) / len(qualities)
+            if value.lower() == normalized:
+                quality = EXACT_QUALITY
+            ranked.append((FIELD_WEIGHTS[field] * quality, value_id))
+        return ranked
+
+    def search(self, query: str, limit: int) -> List[Tuple[str, str, str, float]]:
+        query = query.strip()
+        best: Dict[int, float] = {}
+
+        if query.isdigit():
+            for score, doc_id in self._pincode_matches(query, limit):
+                best[doc_id] = score
+        else:
+            ranked = sorted(self._value_matches(query), key=lambda item: (-item[0], item[1]))
+            for score, value_id in ranked:
+                if len(best) >= limit:
+                    break
+                for doc_id in self.values[value_id][2]:
+                    best.setdefault(doc_id, score)
+
+        top = heapq.nsmallest(limit, best.items(), key=lambda item: (-item[1], self.pincodes[item[0]]))
+        return [
+            (self.pincodes[doc_id], self.districts[doc_id], self.states[doc_id], round(score, 4))
+            for doc_id, score in top
+        ]
+
+search_index = SearchIndex()
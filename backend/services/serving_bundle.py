@@ -0,0 +1,175 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import CreateTable
+
+from config import get_settings
+from models.anomaly_event import AnomalyEvent
+from models.biometric import BiometricData
+from models.data_version import DataVersion
+from models.demographic import DemographicData
+from models.dimensions import District, State
+from models.pincode_metadata import PincodeMetadata
+from models.risk_factor import RiskFactor
+from models.risk_zones import RiskZone
+from models.rollup import RollupCell
+from services.data_version import data_version
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+COPY_BATCH = 20000
+
+SERVING_MODELS = (State, District, PincodeMetadata, RiskZone, RiskFactor, AnomalyEvent, RollupCell)
+HISTORY_MODELS = (BiometricData, DemographicData)
+
+def load_manifest(directory: Path) -> Dict[str, Any]:
+    with open(directory / MANIFEST_NAME) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise RuntimeError(f"Unsupported serving bundle format {manifest.get('format')!r} in {directory / MANIFEST_NAME}")
+    return manifest
+
+def bundle_file(path: str) -> Path:
+    path = Path(path).resolve()
+    if not path.is_dir():
+        return path
+
+    manifest = load_manifest(path)
+    bundle = path / manifest["file"]
+    if bundle.stat().st_size != manifest["bytes"]:
+        raise RuntimeError(f"Serving bundle {bundle} does not match its manifest size")
+    return bundle
+
+def bundle_url(path: str) -> str:
+    return f"sqlite:///file:{quote(str(bundle_file(path)))}?mode=ro&immutable=1&uri=true"
+
+def apply_bundle_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA mmap_size={settings.bundle_mmap_mb * 1024 * 1024}")
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+def copy_rows(db: Session, bundle, table, where=None) -> int:
+    statement = select(table) if where is None else select(table).where(where)
+    result = db.execute(statement.execution_options(yield_per=COPY_BATCH))
+
+    rows = 0
+    for batch in result.mappings().partitions():
+        bundle.execute(table.insert(), [dict(row) for row in batch])
+        rows += len(batch)
+    return rows
+
+def history_filter(db: Session, model, days: int):
+    end = db.query(func.max(model.date)).scalar()
+    if end is None:
+        return None, None
+    start = end - timedelta(days=days)
+    return model.__table__.c.date >= start, {"from": start.isoformat(), "to": end.isoformat()}
+
+def create_indexes(bundle, table):
+    primary_key = {column.name for column in table.primary_key.columns}
+    for index in table.indexes:
+        if {column.name for column in index.columns} != primary_key:
+            index.create(bundle)
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def write_manifest(directory: Path, manifest: Dict[str, Any]):
+    partial = directory / f"{MANIFEST_NAME}.partial"
+    with open(partial, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, directory / MANIFEST_NAME)
+
+def prune_bundles(directory: Path, current: str, keep: int):
+    bundles = sorted(directory.glob("pravah-*.db"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in [path for path in bundles if path.name != current][max(keep - 1, 0):]:
+        path.unlink()
+        logger.info(f"Removed old serving bundle {path.name}")
+
+def export_bundle(db: Session, directory: Optional[str] = None, history_days: Optional[int] = None) -> Dict[str, Any]:
+    directory = Path(directory or settings.bundle_dir)
+    history_days = settings.bundle_history_days if history_days is None else history_days
+    directory.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+
+    version = data_version.refresh(db)
+    published_at = data_version.published_at(db)
+    name = f"pravah-{version}.db"
+    partial = directory / f"{name}.partial"
+    partial.unlink(missing_ok=True)
+
+    tables, history = {}, None
+    engine = create_engine(f"sqlite:///{partial}", poolclass=NullPool)
+    try:
+        with engine.begin() as bundle:
+            bundle.exec_driver_sql("PRAGMA journal_mode=OFF")
+            bundle.exec_driver_sql("PRAGMA synchronous=OFF")
+
+            for model in SERVING_MODELS + HISTORY_MODELS + (DataVersion,):
+                table = model.__table__
+                bundle.execute(CreateTable(table))
+
+                where = None
+                if model in HISTORY_MODELS:
+                    where, window = history_filter(db, model, history_days)
+                    history = history or window
+                elif model is DataVersion:
+                    where = table.c.version == version
+
+                tables[table.name] = copy_rows(db, bundle, table, where)
+                create_indexes(bundle, table)
+
+            bundle.exec_driver_sql(f"PRAGMA user_version={BUNDLE_FORMAT}")
+            bundle.exec_driver_sql("ANALYZE")
+
+        with engine.connect() as bundle:
+            bundle.exec_driver_sql("VACUUM")
+    finally:
+        engine.dispose()
+
+    with open(partial, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(partial, directory / name)
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "data_version": version,
+        "published_at": published_at.isoformat() if published_at else None,
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+        "file": name,
+        "bytes": (directory / name).stat().st_size,
+        "sha256": file_digest(directory / name),
+        "source": db.bind.dialect.name,
+        "history_days": history_days,
+        "history": history,
+        "tables": tables,
+    }
+    write_manifest(directory, manifest)
+    prune_bundles(directory, name, settings.bundle_keep)
+
+    logger.info(
+        f"Exported serving bundle {name} ({manifest['bytes'] / 1024 / 1024:.1f} MB, "
+        f"{sum(tables.values())} rows) in {time.perf_counter() - started:.1f}s"
+    )
+    return manifest
@@ -0,0 +1,253 @@
+import logging
+import math
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from models.risk_zones import RiskZone
+from services.data_version import data_version
+from services.privacy_enforcer import privacy_enforcer
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.195
+
+ZONE_COLUMNS = (
+    RiskZone.pincode,
+    RiskZone.district,
+    RiskZone.state,
+    RiskZone.latitude,
+    RiskZone.longitude,
+    RiskZone.population,
+    RiskZone.risk_score,
+    RiskZone.risk_level,
+    RiskZone.migration_velocity,
+    RiskZone.biometric_risk,
+    RiskZone.digital_exclusion,
+    RiskZone.anomaly_flag,
+    RiskZone.is_suppressed,
+    RiskZone.suppression_reason,
+)
+
+def haversine_km(lat, lon, lats, lons):
+    lat1 = math.radians(lat)
+    lats2 = np.radians(lats)
+    dlat = lats2 - lat1
+    dlon = np.radians(lons) - math.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lats2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def servable_zones_filter():
+    return (
+        RiskZone.is_suppressed == False,
+        privacy_enforcer.suppression_predicate(RiskZone.population),
+        RiskZone.latitude.isnot(None),
+        RiskZone.longitude.isnot(None),
+    )
+
+class GridIndex:
+
+    def __init__(self, latitudes, longitudes, cell_size: float):
+        self.cell_size = cell_size
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+
+        if len(self.latitudes):
+            self.lat0 = float(self.latitudes.min())
+            self.lon0 = float(self.longitudes.min())
+            self.n_rows = int((self.latitudes.max() - self.lat0) // cell_size) + 1
+            self.n_cols = int((self.longitudes.max() - self.lon0) // cell_size) + 1
+        else:
+            self.lat0 = self.lon0 = 0.0
+            self.n_rows = self.n_cols = 0
+
+        rows = ((self.latitudes - self.lat0) // cell_size).astype(np.int64)
+        cols = ((self.longitudes - self.lon0) // cell_size).astype(np.int64)
+        cells = rows * self.n_cols + cols
+
+        self.order = np.argsort(cells, kind="stable")
+        self.cell_start = np.searchsorted(cells[self.order], np.arange(self.n_rows * self.n_cols + 1))
+
+    def __len__(self):
+        return len(self.latitudes)
+
+    def _row(self, lat: float) -> int:
+        return int((lat - self.lat0) // self.cell_size)
+
+    def _col(self, lon: float) -> int:
+        return int((lon - self.lon0) // self.cell_size)
+
+    def _gather(self, spans: List[Tuple[int, int, int]]) -> np.ndarray:
+        chunks = []
+        for row, col_lo, col_hi in spans:
+            if row < 0 or row >= self.n_rows:
+                continue
+            col_lo = max(col_lo, 0)
+            col_hi = min(col_hi, self.n_cols - 1)
+            if col_lo > col_hi:
+                continue
+            start = self.cell_start[row * self.n_cols + col_lo]
+            stop = self.cell_start[row * self.n_cols + col_hi + 1]
+            if stop > start:
+                chunks.append(self.order[start:stop])
+        if not chunks:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(chunks)
+
+    def within(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        if not len(self):
+            return np.empty(0, dtype=np.int64)
+
+        row_lo = max(self._row(min_lat), 0)
+        row_hi = min(self._row(max_lat), self.n_rows - 1)
+        col_lo = self._col(min_lon)
+        col_hi = self._col(max_lon)
+
+        candidates = self._gather([(row, col_lo, col_hi) for row in range(row_lo, row_hi + 1)])
+        lats = self.latitudes[candidates]
+        lons = self.longitudes[candidates]
+        mask = (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+        return candidates[mask]
+
+    def nearest(self, lat: float, lon: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if not len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        k = min(k, len(self))
+        row = self._row(lat)
+        col = self._col(lon)
+
+        if not (0 <= row < self.n_rows and 0 <= col < self.n_cols):
+            candidates = np.arange(len(self))
+        else:
+            max_radius = max(self.n_rows, self.n_cols)
+            found = [self._gather([(row, col, col)])]
+            count = len(found[0])
+            radius = 0
+
+            while radius < max_radius:
+                if count >= k:
+                    candidates = np.concatenate(found)
+                    distances = haversine_km(lat, lon, self.latitudes[candidates], self.longitudes[candidates])
+                    kth = np.partition(distances, k - 1)[k - 1]
+                    edge_lat = min(abs(lat) + radius * self.cell_size, 89.0)
+                    covered_km = radius * self.cell_size * KM_PER_DEGREE * math.cos(math.radians(edge_lat))
+                    if kth <= covered_km:
+                        break
+
+                radius += 1
+                spans = [(row - radius, col - radius, col + radius), (row + radius, col - radius, col + radius)]
+                for r in range(row - radius + 1, row + radius):
+                    spans.append((r, col - radius, col - radius))
+                    spans.append((r, col + radius, col + radius))
+                ring = self._gather(spans)
+                found.append(ring)
+                count += len(ring)
+
+            candidates = np.concatenate(found)
+
+        distances = haversine_km(lat, lon, self.latitudes[candidates], self.longitudes[candidates])
+        if len(candidates) > k:
+            top = np.argpartition(distances, k - 1)[:k]
+            candidates, distances = candidates[top], distances[top]
+        order = np.argsort(distances, kind="stable")
+        return candidates[order], distances[order]
+
+class RiskZoneSpatialIndex:
+
+    def __init__(self, cell_size: float = None):
+        self.cell_size = cell_size or settings.spatial_cell_size_degrees
+        self.version: Optional[str] = None
+        self.rows = []
+        self.scores = np.empty(0)
+        self.grid = GridIndex([], [], self.cell_size)
+        self._lock = threading.Lock()
+
+    def ensure_current(self, db: Session) -> "RiskZoneSpatialIndex":
+        version = data_version.current(db)
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self._build(db, version)
+        return self
+
+    def _build(self, db: Session, version: str):
+        rows = db.query(*ZONE_COLUMNS).filter(*servable_zones_filter()).all()
+
+        self.grid = GridIndex(
+            [row.latitude for row in rows],
+            [row.longitude for row in rows],
+            self.cell_size,
+        )
+        self.scores = np.array([row.risk_score or 0.0 for row in rows], dtype=np.float64)
+        self.rows = rows
+        self.version = version
+        logger.info(f"Spatial index rebuilt for data version {version} ({len(rows)} zones)")
+
+    def within(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float, limit: int) -> list:
+        matches = self.grid.within(min_lat, min_lon, max_lat, max_lon)
+        if len(matches) > limit:
+            matches = matches[np.argpartition(-self.scores[matches], limit - 1)[:limit]]
+        matches = matches[np.argsort(-self.scores[matches], kind="stable")]
+        return [self.rows[i] for i in matches]
+
+    def nearest(self, lat: float, lon: float, k: int) -> List[tuple]:
+        matches, distances = self.grid.nearest(lat, lon, k)
+        return [(self.rows[i], float(d)) for i, d in zip(matches, distances)]
+
+def postgis_available(db: Session) -> bool:
+    if db.bind.dialect.name != "postgresql":
+        return False
+    return db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'postgis'")).first() is not None
+
+def create_spatial_indexes(connection):
+    if connection.dialect.name != "postgresql":
+        return
+    if connection.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'postgis'")).first() is None:
+        return
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_risk_zones_geom ON risk_zones "
+        "USING GIST (ST_SetSRID(ST_MakePoint(longitude, latitude), 4326))"
+    ))
+
+def _zone_point():
+    return func.ST_SetSRID(func.ST_MakePoint(RiskZone.longitude, RiskZone.latitude), 4326)
+
+def query_within(db: Session, min_lat: float, min_lon: float, max_lat: float, max_lon: float, limit: int) -> list:
+    query = db.query(*ZONE_COLUMNS).filter(*servable_zones_filter())
+
+    if postgis_available(db):
+        envelope = func.ST_MakeEnvelope(min_lon, min_lat, max_lon, max_lat, 4326)
+        query = query.filter(_zone_point().op("&&")(envelope))
+    else:
+        query = query.filter(
+            RiskZone.latitude.between(min_lat, max_lat),
+            RiskZone.longitude.between(min_lon, max_lon),
+        )
+
+    return query.order_by(RiskZone.risk_score.desc()).limit(limit).all()
+
+def query_nearest(db: Session, lat: float, lon: float, k: int) -> List[tuple]:
+    query = db.query(*ZONE_COLUMNS).filter(*servable_zones_filter())
+
+    if postgis_available(db):
+        point = func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326)
+        rows = query.order_by(_zone_point().op("<->")(point)).limit(k).all()
+    else:
+        scale = math.cos(math.radians(lat)) ** 2
+        approx = (RiskZone.latitude - lat) * (RiskZone.latitude - lat) + \
+            scale * (RiskZone.longitude - lon) * (RiskZone.longitude - lon)
+        rows = query.order_by(approx).limit(k).all()
+
+    if not rows:
+        return []
+    distances = haversine_km(lat, lon, [r.latitude for r in rows], [r.longitude for r in rows])
+    return sorted(zip(rows, (float(d) for d in distances)), key=lambda item: item[1])
+
+risk_zone_index = RiskZoneSpatialIndex()
@@ -0,0 +1,32 @@
+from datetime import date, timedelta
+from sqlalchemy import Date, func, type_coerce
+
+BUCKETS = ("day", "week", "month")
+
+def date_bucket(column, bucket: str, dialect_name: str):
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unsupported bucket: {bucket}")
+
+    if bucket == "day":
+        return column
+
+    if dialect_name == "postgresql":
+        return func.date_trunc(bucket, column).cast(Date)
+
+    if bucket == "week":
+        return type_coerce(func.date(column, "weekday 0", "-6 days"), Date)
+    return type_coerce(func.date(column, "start of month"), Date)
+
+def previous_bucket(start: date, bucket: str) -> date:
+    if bucket == "week":
+        return start - timedelta(days=7)
+    if bucket == "month":
+        return (start - timedelta(days=1)).replace(day=1)
+    return start - timedelta(days=1)
+
+def bucket_start(value: date, bucket: str) -> date:
+    if bucket == "week":
+        return value - timedelta(days=value.weekday())
+    if bucket == "month":
+        return value.replace(day=1)
+    return value
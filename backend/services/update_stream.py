@@ -0,0 +1,208 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Hashable, List, Optional
+
+import orjson
+from fastapi.responses import StreamingResponse
+
+from config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+KEEPALIVE = b": keepalive\n\n"
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: str
+    stats: Dict[str, Any]
+    anomalies: Dict[Hashable, Dict[str, Any]]
+    risk_levels: Dict[str, Any]
+
+def current_version() -> str:
+    from database import read_session
+    from services.data_version import data_version
+
+    db = read_session()
+    try:
+        return data_version.refresh(db)
+    finally:
+        db.close()
+
+def load_snapshot(version: str) -> Snapshot:
+    from database import read_session
+    from models.risk_zones import RiskZone
+    from routers.anomalies import anomaly_events_query, event_payload
+    from routers.risk_zones import compute_national_stats
+    from services.privacy_enforcer import privacy_enforcer
+
+    db = read_session()
+    try:
+        risk_levels = db.query(RiskZone.pincode, RiskZone.risk_level).filter(RiskZone.is_suppressed == False)
+        risk_levels = privacy_enforcer.filter_query(risk_levels, RiskZone.population)
+        return Snapshot(
+            version=version,
+            stats=compute_national_stats(db),
+            anomalies={(row.pincode, row.dataset, row.date): event_payload(row) for row in anomaly_events_query(db)},
+            risk_levels=dict(risk_levels.all()),
+        )
+    finally:
+        db.close()
+
+def encode_event(event: str, version: str, data: Any) -> bytes:
+    return b"id: %s\nevent: %s\ndata: %s\n\n" % (
+        version.encode(), event.encode(), orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    )
+
+def diff_snapshots(previous: Snapshot, current: Snapshot) -> Dict[str, Any]:
+    added = sorted(
+        (current.anomalies[key] for key in current.anomalies.keys() - previous.anomalies.keys()),
+        key=lambda event: (event["event_date"], event["anomaly_score"] or 0.0),
+        reverse=True
+    )
+    cleared = [
+        {"pincode": pincode, "dataset": dataset, "event_date": day}
+        for pincode, dataset, day in sorted(previous.anomalies.keys() - current.anomalies.keys())
+    ]
+    risk_levels = [
+        {"pincode": pincode, "previous": previous.risk_levels.get(pincode), "risk_level": current.risk_levels.get(pincode)}
+        for pincode in sorted(previous.risk_levels.keys() | current.risk_levels.keys())
+        if previous.risk_levels.get(pincode) != current.risk_levels.get(pincode)
+    ]
+
+    truncated = max(len(added), len(cleared), len(risk_levels)) > settings.stream_max_changes
+    return {
+        "version": current.version,
+        "previous_version": previous.version,
+        "stats": current.stats,
+        "anomalies": None if truncated else {"added": added, "cleared": cleared},
+        "risk_levels": None if truncated else risk_levels,
+        "truncated": truncated
+    }
+
+async def wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+class EventStreamResponse(StreamingResponse):
+
+    def __init__(self, events: AsyncIterator[bytes]):
+        super().__init__(
+            events,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+        try:
+            async for chunk in self.body_iterator:
+                if disconnected.done():
+                    return
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            disconnected.cancel()
+            await self.body_iterator.aclose()
+
+class UpdateBroadcaster:
+
+    def __init__(self, history: int = None):
+        self.version: Optional[str] = None
+        self.subscribers = 0
+        self.broadcasts = 0
+        self._snapshot: Optional[Snapshot] = None
+        self._history: "deque[tuple]" = deque(maxlen=history or settings.stream_history)
+        self._changed = asyncio.Event()
+        self._poller: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def _ensure_polling(self):
+        if self._poller is None or self._poller.done():
+            self._closed = False
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+
+    async def _poll(self):
+        while not self._closed:
+            try:
+                version = await asyncio.to_thread(current_version)
+                if version != self.version:
+                    await self._advance(version)
+            except Exception as e:
+                logger.warning(f"Update stream poll failed: {e}")
+            await asyncio.sleep(settings.stream_poll_seconds)
+
+    async def _advance(self, version: str):
+        snapshot = await asyncio.to_thread(load_snapshot, version)
+        if self._snapshot is not None:
+            message = encode_event("update", version, diff_snapshots(self._snapshot, snapshot))
+            self._history.append((self._snapshot.version, message))
+            self.broadcasts += 1
+            logger.info(f"Broadcasting data version {version} to {self.subscribers} stream subscribers")
+
+        self._snapshot = snapshot
+        self.version = version
+        self._wake()
+
+    def _wake(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _since(self, version: Optional[str]) -> List[bytes]:
+        if version == self.version:
+            return []
+
+        previous = [seen for seen, _ in self._history]
+        if version in previous:
+            return [message for _, message in list(self._history)[previous.index(version):]]
+        return [encode_event("reset", self.version, {"version": self.version})]
+
+    async def _wait(self, changed: asyncio.Event) -> bool:
+        try:
+            await asyncio.wait_for(changed.wait(), settings.stream_keepalive_seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def events(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        self._ensure_polling()
+        self.subscribers += 1
+        try:
+            yield b"retry: %d\n\n" % int(settings.stream_poll_seconds * 1000)
+            while self.version is None and not self._closed:
+                if not await self._wait(self._changed):
+                    yield KEEPALIVE
+            if self._closed:
+                return
+
+            if last_event_id is None:
+                pending = [encode_event("version", self.version, {"version": self.version})]
+            else:
+                pending = self._since(last_event_id)
+            sent = self.version
+
+            while not self._closed:
+                changed = self._changed
+                for message in pending:
+                    yield message
+                if not await self._wait(changed):
+                    yield KEEPALIVE
+                pending = self._since(sent)
+                sent = self.version
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and self._poller is not None:
+                self._poller.cancel()
+                self._poller = None
+
+    def close(self):
+        self._closed = True
+        self._wake()
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+
+update_stream = UpdateBroadcaster()
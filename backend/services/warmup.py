@@ -0,0 +1,69 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+def warm_caches():
+    from database import read_session
+    from routers.anomalies import list_anomalies
+    from routers.risk_zones import compute_national_stats, list_risk_zones
+    from services.data_version import data_version
+    from services.payloads import payload_cache
+    from services.search_index import search_index
+    from services.spatial_index import risk_zone_index
+
+    db = read_session()
+    try:
+        version = data_version.current(db)
+        search_index.ensure_current(db)
+        risk_zone_index.ensure_current(db)
+        payload_cache.get_or_build(version, ("stats/national",), lambda: compute_national_stats(db))
+        payload_cache.get_or_build(version, ("risk-zones", None, None, 100), lambda: list_risk_zones(db, None, None, 100))
+        payload_cache.get_or_build(version, ("anomalies", 50, None, None), lambda: list_anomalies(db, 50))
+    finally:
+        db.close()
+
+class Warmup:
+
+    def __init__(self):
+        self.started_at: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def start(self, before: Callable[[], None] = None):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.run, args=(before,), name="cache-warmup", daemon=True)
+        self._thread.start()
+
+    def run(self, before: Callable[[], None] = None):
+        self.started_at = time.time()
+        start = time.perf_counter()
+        try:
+            if before:
+                before()
+            warm_caches()
+        except Exception as e:
+            self.error = str(e)
+            logger.warning(f"Cache warmup failed: {e}")
+        finally:
+            self.duration = time.perf_counter() - start
+            self._done.set()
+            logger.info(f"Cache warmup finished in {self.duration * 1000:.0f} ms")
+
+    def status(self) -> dict:
+        return {
+            "done": self.done,
+            "duration_ms": round(self.duration * 1000, 1) if self.duration is not None else None,
+            "error": self.error,
+        }
+
+warmup = Warmup()